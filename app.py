@@ -1,14 +1,30 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, abort, Response
 from dotenv import load_dotenv
 import os
+import math
 import requests
 import numpy as np
 import pandas as pd
+import networkx as nx
 from datetime import datetime
 
 # Import Services
 from services import data_loader
 from services import plots
+from services import park_graph
+from services import itinerary
+from services import batch_routing
+from services import td_routing
+from services import congestion
+from services import spatial
+from services import ride_status
+from services import throughput
+from services import live_feed
+from services import ride_stats
+from services import analytics
+from services import tables
+from services import best_times
+from services import anomaly
 
 # Load environment variables
 load_dotenv()
@@ -74,6 +90,8 @@ def signup():
 
     return render_template('signup.html')
 
+ALERT_FEED_SIZE = 8  # alerts shown on the dashboard
+
 @app.route('/dashboard')
 def dashboard():
     if 'user' not in session:
@@ -83,13 +101,26 @@ def dashboard():
     total_visitors, system_health, avg_wait, capacity_pct, target_date = data_loader.get_dashboard_metrics()
     chart_df = data_loader.get_chart_data()
     
+    # Live park-wide wait and its trend from the rolling per-ride stats
+    wait_trend = None
+    park_wait = ride_store().park_average()
+    if park_wait is not None:
+        avg_wait, wait_trend = int(round(park_wait[0])), round(park_wait[1], 1)
+    
+    # Breakdowns and queue spikes flagged as readings come in
+    alerts = anomaly.for_display(ride_detector().alerts(limit=ALERT_FEED_SIZE))
+    
     # 2. Generate Plots
     treemap_json = plots.generate_treemap(chart_df)
     
+    # Hourly waits over all history (a slice of the hour-of-week cube), or
+    # over the latest rows until the analytics mirror has synced
     trend_json = "{}"
-    if chart_df is not None and not chart_df.empty:
+    hourly_trend = analytics.hour_profile()
+    if hourly_trend is None and chart_df is not None and not chart_df.empty:
         chart_df['hour'] = pd.to_datetime(chart_df['work_date']).dt.hour
         hourly_trend = chart_df.groupby('hour')['wait_time_max'].mean().reset_index()
+    if hourly_trend is not None:
         trend_json = plots.generate_trend_area(hourly_trend, 'hour', 'wait_time_max')
 
     return render_template('dashboard.html', 
@@ -97,10 +128,23 @@ def dashboard():
                            total_visitors=total_visitors,
                            system_health=system_health,
                            avg_wait=avg_wait,
+                           avg_wait_time=avg_wait,
+                           wait_trend=wait_trend,
                            treemap_json=treemap_json,
                            trend_json=trend_json,
+                           alerts=alerts,
                            now=datetime.now())
 
+@app.route('/api/alerts')
+def ride_alerts():
+    """Newest ride alerts (breakdowns, reopenings, wait spikes) for the dashboard feed."""
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    detector = ride_detector()
+    down, spiking = detector.status()
+    limit = min(max(request.args.get('limit', ALERT_FEED_SIZE, type=int), 1), anomaly.ALERT_LIMIT)
+    return jsonify({'alerts': anomaly.for_display(detector.alerts(limit=limit)), 'down': down, 'spiking': spiking})
+
 @app.route('/forecast', methods=['GET', 'POST'])
 def forecast():
     if 'user' not in session:
@@ -133,6 +177,10 @@ def plan():
     
     # 1. Fetch Data
     popular_rides, table_data, facilities_df = data_loader.get_plan_data()
+    least_crowded = ride_store().least_crowded(5)
+    if least_crowded:
+        # Smoothed waits, so one quiet reading doesn't top the list
+        popular_rides = [{"name": name, "wait": int(round(wait))} for name, wait in least_crowded]
     
     # 2. Generate Plots
     # Convert popular_rides list of dicts to DF for plotting if needed, or just pass data
@@ -142,19 +190,14 @@ def plan():
     # I should fix data_loader to return DF for plotting or convert here.
     # Let's convert here for simplicity.
     popular_df = pd.DataFrame(popular_rides)
+    
+    # Lowest-wait windows today for every ride with enough history
+    windows = ride_best_times()
+    today = datetime.now().strftime('%a')
+    best_today = best_times.for_day(windows, today)
         
     bar_chart_json = plots.generate_bar_chart(popular_df, 'name', 'wait', 'Top 5 Least Crowded Rides', 'Ride', 'Avg Wait (min)', color_col='wait')
-    # Note: generate_bar_chart returns HTML by default now in plots.py, but plan.html expects JSON?
-    # Wait, plan.html was updated to use JSON in previous steps? No, I updated rides.html and insights.html to use HTML.
-    # I need to check if plan.html uses JSON or HTML.
-    # In previous steps I updated `plan.html` to use `bar_chart_json`.
-    # `plots.generate_bar_chart` returns HTML.
-    # I should update `plan.html` to accept HTML or update `plots.py` to return JSON for this specific chart.
-    # Or better, update `plan.html` to render HTML.
-    # For now, I will assume I need to update `plan.html` later or `plots.py` returns HTML and I pass it as `bar_chart_html`.
-    # Let's check `plots.py` again. `generate_bar_chart` returns `to_html(fig)`.
-    # So I should pass `bar_chart_html` to template.
-    
+
     # 3. Handle Form
     if request.method == 'POST':
         age = float(request.form.get('age'))
@@ -217,171 +260,135 @@ def plan():
                         "match": int(75 + np.random.randint(0, 20)),
                         "img": "https://img.icons8.com/color/96/theme-park.png"
                     })
+            
+            for rec in recommendations:
+                days = best_times.lookup(windows, rec['name'])
+                rec['best'] = days.get(today, [None])[0] if days else None
+
+    return render_template('plan.html', session=session, cluster=cluster, recommendations=recommendations, popular_rides=popular_rides, table_data=table_data, bar_chart_json=bar_chart_json, best_today=best_today)
+
+
 
-    return render_template('plan.html', session=session, cluster=cluster, recommendations=recommendations, popular_rides=popular_rides, table_data=table_data, bar_chart_json=bar_chart_json)
+# Ride capacities change with the season, not the minute
+FACILITIES_TTL = 60 * 60
 
+def rides_summary(df, latest):
+    """ride_status.summarize with arrivals from facility capacities where a ride has one."""
+    rates = None
+    if latest is not None:
+        facilities = data_loader.cached('facilities', data_loader.get_facilities, ttl=FACILITIES_TTL)
+        rates = throughput.current_throughput(df, facilities)
+    return ride_status.summarize(latest, rates)
 
+def ride_best_times():
+    """Best hour windows per ride and weekday, from the analytics cube ({} before the first sync)."""
+    cube = analytics.get_cube()
+    if cube is None:
+        return {}
+    return best_times.best_windows(cube, analytics.ride_names())
+
+def ride_store():
+    """The rolling per-ride stats, topped up from the cached rides frame."""
+    store = ride_stats.get_store()
+    store.ingest_frame(data_loader.cached('rides', data_loader.get_rides_data))
+    return store
+
+def ride_detector():
+    """The breakdown / wait-spike detector, topped up from the cached rides frame."""
+    detector = anomaly.get_detector()
+    detector.ingest_frame(data_loader.cached('rides', data_loader.get_rides_data))
+    return detector
+
+def live_ride_state():
+    """(rows by ride, KPIs) for the live feed, from a fresh rides query."""
+    df = data_loader.get_rides_data()
+    ride_stats.get_store().ingest_frame(df)
+    anomaly.get_detector().ingest_frame(df)
+    latest = df.drop_duplicates('entity_description_short') if not df.empty else None
+    summary = rides_summary(df, latest)
+    rows = {ride.pop('name'): ride for ride in summary.pop('rides')}
+    return rows, summary
+
+# One poller per worker, shared by every connected /rides screen
+ride_feed = live_feed.LiveFeed(live_ride_state)
 
 @app.route('/rides')
 def rides():
     if 'user' not in session:
         return redirect(url_for('login'))
     
-    rides_data = []
-    table_data = []
-    active_count = 0
-    total_count = 0
-    avg_wait = 0
-    max_wait = 0
-    max_wait_ride = "-"
-    throughput = 0
-    bar_chart_html = ""
-    pie_chart_html = ""
+    # 1. Fetch Data (charts come from /api/charts/rides/..., the table from /api/tables/rides)
+    df = data_loader.cached('rides', data_loader.get_rides_data)
+    latest = df.drop_duplicates('entity_description_short') if not df.empty else None
     
-    # 1. Fetch Data
-    df = data_loader.get_rides_data()
-    
-    if not df.empty:
-        latest = df.drop_duplicates('entity_description_short')
-        total_count = len(latest)
-        table_data = latest.head(20).to_dict('records')
-        
-        avg_wait = int(latest['wait_time_max'].mean())
-        max_row = latest.loc[latest['wait_time_max'].idxmax()]
-        max_wait = int(max_row['wait_time_max'])
-        max_wait_ride = max_row['entity_description_short']
-        
-        active_count = len(latest[latest['wait_time_max'] > 0])
-        
-        avg_capacity_per_ride = 24
-        if avg_wait > 0:
-            throughput = int((active_count * avg_capacity_per_ride * 60) / avg_wait)
-        else:
-            throughput = active_count * avg_capacity_per_ride * 4
-        
-        for _, row in latest.iterrows():
-            wait_time = row['wait_time_max']
-            if pd.isna(wait_time) or wait_time == 0:
-                status = "Closed"
-                capacity_pct = 0
-            else:
-                status = "Open"
-                if wait_time < 15: 
-                    capacity_pct = int(40 + (wait_time / 15) * 20)
-                elif wait_time < 45: 
-                    capacity_pct = int(60 + ((wait_time - 15) / 30) * 25)
-                else: 
-                    capacity_pct = int(85 + min((wait_time - 45) / 155, 1) * 15)
-            
-            rides_data.append({
-                "name": row['entity_description_short'],
-                "status": status,
-                "wait": int(wait_time) if not pd.isna(wait_time) else 0,
-                "capacity": capacity_pct
-            })
-        
-        # 2. Generate Plots
-        top_10 = latest.nlargest(10, 'wait_time_max')
-        bar_chart_html = plots.generate_bar_chart(top_10, 'entity_description_short', 'wait_time_max', 'Top 10 Rides by Wait Time', 'Ride', 'Wait Time (min)', color_col='wait_time_max')
-        
-        status_counts = latest['wait_time_max'].apply(lambda x: 'Open' if x > 0 else 'Closed').value_counts()
-        pie_chart_html = plots.generate_pie_chart(None, status_counts.index, values=status_counts.values, title='Ride Status Distribution', hole=0.5)
+    # 2. Status, capacity and throughput for every ride at once
+    summary = rides_summary(df, latest)
 
     return render_template('rides.html', 
                            session=session, 
-                           rides=rides_data, 
-                           table_data=table_data,
-                           active_count=active_count, 
-                           total_count=total_count, 
-                           avg_wait=avg_wait, 
-                           max_wait=max_wait, 
-                           max_wait_ride=max_wait_ride,
-                           throughput=throughput,
-                           bar_chart_html=bar_chart_html,
-                           pie_chart_html=pie_chart_html)
+                           rides=summary['rides'], 
+                           active_count=summary['active_count'], 
+                           total_count=summary['total_count'], 
+                           avg_wait=summary['avg_wait'], 
+                           max_wait=summary['max_wait'], 
+                           max_wait_ride=summary['max_wait_ride'],
+                           throughput=summary['throughput'],
+                           poll_interval=ride_feed.interval)
 
-@app.route('/insights')
-def insights():
+@app.route('/api/rides/live')
+def rides_live():
+    """
+    Server-Sent Events: a "snapshot" event with every ride, then "diff"
+    events with changed rides and KPIs. Each stream holds a server thread
+    (see gunicorn.conf.py); past live_feed.MAX_STREAMS the client gets a 503
+    and polls /api/rides/live/snapshot instead.
+    """
     if 'user' not in session:
-        return redirect(url_for('login'))
-    
-    trend_html = dist_html = scatter_html = heatmap_html = age_html = pie_html = box_html = ""
-    attendance_data = []
-    waiting_data = []
-    visitors_data = []
-    
-    # 1. Fetch Data
-    df_wait, df_vis = data_loader.get_insights_data()
+        return jsonify({'error': 'Not logged in'}), 401
     
-    if not df_wait.empty:
-        attendance_data = df_wait[['work_date', 'entity_description_short', 'wait_time_max']].head(50).copy()
-        attendance_data['work_date'] = pd.to_datetime(attendance_data['work_date'])
-        attendance_data = attendance_data.to_dict('records')
+    subscription = ride_feed.subscribe()
+    if subscription is None:
+        return jsonify({'error': 'Too many live streams, poll /api/rides/live/snapshot'}), 503, {'Retry-After': str(ride_feed.interval)}
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(ride_feed.stream(subscription), mimetype='text/event-stream', headers=headers)
 
-        waiting_data = df_wait[['work_date', 'entity_description_short', 'wait_time_max']].head(50).copy()
-        waiting_data['work_date'] = pd.to_datetime(waiting_data['work_date'])
-        waiting_data = waiting_data.to_dict('records')
+@app.route('/api/rides/live/snapshot')
+def rides_live_snapshot():
+    """Every ride and the KPIs as of the last poll, for clients without a stream."""
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    return jsonify(ride_feed.current())
 
-        # 2. Generate Plots
-        # Instead of trend, show top rides by average wait time (more meaningful with current data)
-        top_rides = df_wait.groupby('entity_description_short')['wait_time_max'].mean().reset_index()
-        top_rides = top_rides.sort_values('wait_time_max', ascending=False).head(10)
-        
-        if len(top_rides) > 0:
-            trend_html = plots.generate_bar_chart(
-                top_rides, 
-                'entity_description_short', 
-                'wait_time_max', 
-                'Top 10 Rides by Average Wait Time', 
-                'Ride', 
-                'Average Wait Time (min)',
-                color_col='wait_time_max'
-            )
-        else:
-            trend_html = ""
-        
-        dist_html = plots.generate_histogram(df_wait, 'wait_time_max', 'Attendance Distribution')
-        scatter_html = plots.generate_scatter_chart(df_wait, 'work_date', 'wait_time_max', 'entity_description_short', size_col=None, title='Wait Time Over Time')
-        
-        heatmap_data = df_wait.groupby(['entity_description_short', 'hour'])['wait_time_max'].mean().reset_index()
-        heatmap_html = plots.generate_heatmap(heatmap_data, 'hour', 'entity_description_short', 'wait_time_max', 'Wait Time Heatmap')
+@app.route('/api/rides/live/stats')
+def rides_live_stats():
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    return jsonify(ride_feed.stats())
+
+@app.route('/insights')
+def insights():
+    if 'user' not in session:
+        return redirect(url_for('login'))
     
-    return render_template('insights.html', session=session,
-                           trend_html=trend_html, dist_html=dist_html,
-                           scatter_html=scatter_html, heatmap_html=heatmap_html,
-                           attendance_data=attendance_data, waiting_data=waiting_data)
+    # Charts come from /api/charts/insights/..., tables from /api/tables/...
+    # Percentiles over all mirrored history, from the merged quantile sketches
+    park_percentiles = analytics.park_percentiles()
+    ride_percentiles = analytics.ride_percentiles()
+    if ride_percentiles is not None:
+        ride_percentiles = ride_percentiles.sort_values('p90', ascending=False).to_dict('records')
+    hour_percentiles = analytics.hourly_percentiles()
+    if hour_percentiles is not None:
+        hour_percentiles = hour_percentiles.to_dict('records')
+    return render_template('insights.html', session=session, park_percentiles=park_percentiles,
+                           ride_percentiles=ride_percentiles, hour_percentiles=hour_percentiles)
 
 @app.route('/map', methods=['GET', 'POST'])
 def smart_map():
     if 'user' not in session:
         return redirect(url_for('login'))
     
-    nodes = {
-        "Entrance": (0, 0),
-        "Hollywood Rip Ride Rockit": (2, 5),
-        "Revenge of the Mummy": (5, 8),
-        "Transformers": (6, 4),
-        "Harry Potter Diagon Alley": (8, 9),
-        "Simpsons Ride": (9, 3),
-        "Men in Black": (7, 1),
-        "E.T. Adventure": (4, 2)
-    }
-    
-    edges = [
-        ("Entrance", "Hollywood Rip Ride Rockit", 5),
-        ("Entrance", "E.T. Adventure", 7),
-        ("Hollywood Rip Ride Rockit", "Revenge of the Mummy", 6),
-        ("Hollywood Rip Ride Rockit", "Transformers", 5),
-        ("Revenge of the Mummy", "Harry Potter Diagon Alley", 4),
-        ("Transformers", "Simpsons Ride", 8),
-        ("Simpsons Ride", "Men in Black", 3),
-        ("Men in Black", "E.T. Adventure", 5),
-        ("Transformers", "Revenge of the Mummy", 4),
-        ("Harry Potter Diagon Alley", "Simpsons Ride", 6)
-    ]
-    
     # 1. Fetch Data
-    wait_times = data_loader.get_map_data(nodes)
+    park = current_park()
     
     # 2. Calculate Path
     start_point = request.form.get('start_point', 'Entrance')
@@ -391,27 +398,16 @@ def smart_map():
     steps = []
     
     if request.method == 'POST':
-        import networkx as nx
-        G = nx.Graph()
-        for node, pos in nodes.items():
-            G.add_node(node, pos=pos, wait=wait_times.get(node, 0))
-        for u, v, walk_time in edges:
-            weight = walk_time + wait_times.get(v, 0)
-            G.add_edge(u, v, weight=weight, walk=walk_time)
-            
         try:
-            path = nx.shortest_path(G, source=start_point, target=end_point, weight='weight')
-            total_time = int(nx.shortest_path_length(G, source=start_point, target=end_point, weight='weight'))
-            for i in range(len(path)-1):
-                u, v = path[i], path[i+1]
-                steps.append({'target': v, 'walk': G[u][v]['walk'], 'wait': G.nodes[v]['wait']})
-        except nx.NetworkXNoPath:
+            path, total_time, steps = park.route(start_point, end_point)
+            congestion.get_congestion_model().record_path(path)
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
             flash('No path found between these points.', 'danger')
     
     # 3. Generate Map
-    map_json = plots.generate_map_json(nodes, edges, wait_times, path)
+    map_json = plots.generate_map_json(park, path)
     
-    return render_template('map.html', session=session, nodes=nodes.keys(), start_point=start_point, end_point=end_point, path=path, total_time=total_time, steps=steps, map_json=map_json)
+    return render_template('map.html', session=session, nodes=park.attractions, start_point=start_point, end_point=end_point, path=path, total_time=total_time, steps=steps, map_json=map_json)
 
 @app.route('/health')
 def health():
@@ -430,12 +426,12 @@ def health():
         rmse = np.sqrt(mean_squared_error(df_cv['y'], df_cv['yhat']))
         mape = np.mean(np.abs((df_cv['y'] - df_cv['yhat']) / df_cv['y'])) * 100
         
-    cv_html, res_html, clus_html = plots.generate_health_charts(df_cv, df_vis, None)
+    cv_json, res_json, clus_json = plots.generate_health_charts(df_cv, df_vis, None)
 
     return render_template('health.html', session=session,
                            mae=mae, rmse=rmse, mape=mape,
-                           cv_html=cv_html, res_html=res_html,
-                           clus_html=clus_html)
+                           cv_json=cv_json, res_json=res_json,
+                           clus_json=clus_json)
 
 @app.route('/assistant', methods=['GET', 'POST'])
 def assistant():
@@ -480,7 +476,19 @@ def assistant():
             response = "I can help with wait times, recommendations, and park information."
             msg_lower = msg.lower()
             
-            if "wait" in msg_lower or "time" in msg_lower:
+            windows = ride_best_times()
+            today = datetime.now().strftime('%a')
+            ride = next((name for name in windows if name.lower() in msg_lower), None)
+            
+            if windows and ("best time" in msg_lower or "when" in msg_lower or ride):
+                if ride and windows[ride].get(today):
+                    response = best_times.describe(ride, windows[ride][today])
+                else:
+                    quiet = best_times.for_day(windows, today)[:3]
+                    if quiet:
+                        response = "Quietest windows today: " + "; ".join(
+                            f"{name} {w['start']}-{w['end']} (~{w['wait']:.0f} min)" for name, w in quiet) + "."
+            elif "wait" in msg_lower or "time" in msg_lower:
                 response = f"Current average wait time is around {stats['avg_wait']} minutes. The least crowded rides are usually water attractions and shows."
             elif "recommend" in msg_lower or "suggest" in msg_lower:
                 response = "I recommend visiting thrill rides early in the morning when wait times are lowest, and family attractions in the afternoon."
@@ -501,6 +509,314 @@ def assistant():
     return render_template('assistant.html', session=session, chat_history=session.get('chat_history', []), stats=stats)
 
 
+# ----------------------------------------------------------------------------
+# CHART API
+# ----------------------------------------------------------------------------
+# Pages render their shell first and fetch each chart from here in parallel.
+# Chart builders take the page's (cached) frame and return a chart spec.
+
+def insights_frame():
+    # Keep the local mirror the history charts read from up to date
+    analytics.maybe_sync(data_loader.get_supabase_client)
+    df_wait, df_vis = data_loader.cached('insights', data_loader.get_insights_data)
+    return df_wait
+
+def rides_frame():
+    df = data_loader.cached('rides', data_loader.get_rides_data)
+    return df.drop_duplicates('entity_description_short') if not df.empty else df
+
+# The aggregate charts read the full history from the analytics mirror and
+# fall back to the page's recent rows until the first sync has run.
+
+def insights_trend_chart(df_wait):
+    # Top rides by average wait time (more meaningful than a trend with current data)
+    top_rides = analytics.top_rides(10)
+    if top_rides is None:
+        top_rides = df_wait.groupby('entity_description_short')['wait_time_max'].mean().reset_index()
+        top_rides = top_rides.sort_values('wait_time_max', ascending=False).head(10)
+    return plots.generate_bar_chart(top_rides, 'entity_description_short', 'wait_time_max', 'Top 10 Rides by Average Wait Time', 'Ride', 'Average Wait Time (min)', color_col='wait_time_max')
+
+def insights_heatmap_chart(df_wait):
+    heatmap_data = analytics.ride_hour_profile()
+    if heatmap_data is None:
+        heatmap_data = df_wait.groupby(['entity_description_short', 'hour'])['wait_time_max'].mean().reset_index()
+    return plots.generate_heatmap(heatmap_data, 'hour', 'entity_description_short', 'wait_time_max', 'Wait Time Heatmap')
+
+# Days of history on the "Wait Time Over Time" chart, and its points over
+# all rides (about what the chart drew from the raw rows)
+SCATTER_DAYS = 14
+SCATTER_POINTS = 2000
+
+def insights_scatter_chart(df_wait):
+    # Rolled-up waits at a tier chosen for the range, not every raw sample,
+    # then thinned so the figure as a whole stays within SCATTER_POINTS
+    series = analytics.wait_series(days=SCATTER_DAYS, target=plots.DOWNSAMPLE_TARGET)
+    if series is not None:
+        df_wait = series[1]
+    return plots.generate_scatter_chart(df_wait, 'work_date', 'wait_time_max', 'entity_description_short', size_col=None,
+                                        title='Wait Time Over Time', max_total=SCATTER_POINTS)
+
+def rides_status_chart(latest):
+    status_counts = ride_status.status_counts(latest['wait_time_max'])
+    return plots.generate_pie_chart(None, status_counts.index, values=status_counts.values, title='Ride Status Distribution', hole=0.5)
+
+CHARTS = {
+    'insights': (insights_frame, {
+        'trend': insights_trend_chart,
+        'scatter': insights_scatter_chart,
+        'heatmap': insights_heatmap_chart,
+    }),
+    'rides': (rides_frame, {
+        'bar': lambda latest: plots.generate_bar_chart(latest.nlargest(10, 'wait_time_max'), 'entity_description_short', 'wait_time_max', 'Top 10 Rides by Wait Time', 'Ride', 'Wait Time (min)', color_col='wait_time_max'),
+        'status': rides_status_chart,
+    }),
+}
+
+# Browsers may reuse a chart for as long as the data cache keeps it
+CHART_MAX_AGE = data_loader.CACHE_TTL
+
+@app.route('/api/charts/<page>/<chart>')
+def chart_api(page, chart):
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    if page not in CHARTS or chart not in CHARTS[page][1]:
+        abort(404)
+    
+    load_frame, builders = CHARTS[page]
+    df = load_frame()
+    spec = builders[chart](df) if df is not None and not df.empty else "{}"
+    
+    response = app.response_class(spec, mimetype='application/json')
+    response.cache_control.private = True
+    response.cache_control.max_age = CHART_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
+
+# ----------------------------------------------------------------------------
+# TABLE API
+# ----------------------------------------------------------------------------
+# Raw-data tables are fetched a page at a time (keyset pagination, see
+# services/tables.py) instead of being rendered into the page.
+
+def ride_table_rows():
+    """One row per ride for the /rides table: live wait, status and trends."""
+    df = data_loader.cached('rides', data_loader.get_rides_data)
+    if df.empty:
+        return []
+    latest = df.drop_duplicates('entity_description_short')
+    trends = ride_store().stats()
+    updated = pd.to_datetime(latest['work_date']).dt.strftime('%Y-%m-%d %H:%M').tolist()
+    rows = []
+    for ride, when in zip(ride_status.summarize(latest)['rides'], updated):
+        trend = trends.get(ride['name']) or {}
+        rows.append({
+            'name': ride['name'], 'wait': ride['wait'], 'status': ride['status'],
+            'p50': trend.get('p50'), 'p90': trend.get('p90'), 'slope': trend.get('slope'),
+            'updated': when,
+        })
+    return tables.json_safe(rows)
+
+@app.route('/api/tables/<table>')
+def table_api(table):
+    """
+    A page of a raw-data table. Query args: sort, order (asc/desc), limit,
+    after (the previous page's "next" cursor), q (text search), from/to
+    (dates) and min/max (values). Returns {columns, rows, next}.
+    """
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    if table == 'rides':
+        spec = tables.RIDE_TABLE
+    elif table in tables.TABLES:
+        spec = tables.TABLES[table]
+    else:
+        abort(404)
+    try:
+        options = tables.parse_args(spec, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    page = {'rows': [], 'next': None}
+    mirrored = analytics.attendance_rows() if table == 'attendance' else None
+    if table == 'rides':
+        page = tables.page_rows(ride_table_rows(), spec, options)
+    elif mirrored is not None:
+        page = tables.page_rows(mirrored, spec, options)
+    else:
+        supabase = data_loader.get_supabase_client()
+        if supabase:
+            try:
+                page = tables.fetch_page(supabase, table, options)
+            except Exception as e:
+                print(f"Supabase Error (Table {table}): {e}")
+                return jsonify({'error': 'Could not load the table'}), 502
+    return jsonify({'columns': spec['columns'], 'sort': options['sort'], 'order': options['order'], **page})
+
+# ----------------------------------------------------------------------------
+# ROUTING API
+# ----------------------------------------------------------------------------
+
+def park_wait_times(park):
+    return data_loader.cached('map', lambda: data_loader.get_map_data(park.attractions))
+
+# Attendance is a daily figure; it only sets the congestion background
+ATTENDANCE_TTL = 15 * 60
+
+def current_park():
+    """The shared park graph with the latest waits and walkway congestion."""
+    park = park_graph.get_park_graph()
+    park.update_waits(park_wait_times(park))
+    model = congestion.get_congestion_model()
+    model.set_attendance(data_loader.cached('attendance', data_loader.get_latest_attendance, ttl=ATTENDANCE_TTL))
+    model.apply()
+    return park
+
+# Hourly profiles move slowly; refresh them far less often than live waits
+WAIT_PROFILE_TTL = 15 * 60
+
+def format_minute(minute):
+    minute = int(round(minute)) % td_routing.MINUTES_PER_DAY
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+@app.route('/api/route')
+def route_api():
+    """
+    Time-dependent route: /api/route?start=...&end=...&depart=HH:MM
+    Waits come from each ride's hourly profile at the expected arrival time.
+    """
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    park = current_park()
+    profile = data_loader.cached('wait_profile', lambda: data_loader.get_wait_profile(park.attractions), ttl=WAIT_PROFILE_TTL)
+    
+    start = request.args.get('start', 'Entrance')
+    end = request.args.get('end', 'Harry Potter Diagon Alley')
+    if request.args.get('depart'):
+        try:
+            hours, minutes = (int(part) for part in request.args['depart'].split(':'))
+        except ValueError:
+            hours = minutes = -1
+        if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+            return jsonify({'error': '"depart" must be HH:MM (00:00-23:59)'}), 400
+        depart = hours * 60 + minutes
+    else:
+        now = datetime.now()
+        depart = now.hour * 60 + now.minute
+    try:
+        router = td_routing.TimeDependentRouter(park, td_routing.profile_matrix(park, profile))
+        path, arrival, steps = router.route(start, end, depart)
+        congestion.get_congestion_model().record_path(path)
+    except nx.NodeNotFound as e:
+        return jsonify({'error': str(e)}), 400
+    except nx.NetworkXNoPath as e:
+        return jsonify({'error': str(e)}), 422
+    except ValueError as e:
+        print(f"Routing Error: {e}")
+        return jsonify({'error': f'Could not route from {start} to {end}'}), 422
+    
+    return jsonify({
+        'path': path,
+        'depart': format_minute(depart),
+        'arrival': format_minute(arrival),
+        'total_time': round(arrival - depart, 1),
+        'steps': steps,
+    })
+
+@app.route('/api/itinerary', methods=['POST'])
+def itinerary_api():
+    """
+    Orders a set of must-do attractions. JSON body:
+    {"stops": [...], "start": "Entrance", "return_to_start": false, "time_budget": 0.25}
+    """
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    payload = request.get_json(silent=True) or {}
+    stops = payload.get('stops')
+    if not isinstance(stops, list) or not stops:
+        return jsonify({'error': '"stops" must be a non-empty list of attractions'}), 400
+    
+    park = current_park()
+    
+    try:
+        time_budget = min(float(payload.get('time_budget', itinerary.DEFAULT_TIME_BUDGET)), itinerary.DEFAULT_TIME_BUDGET)
+        result = itinerary.plan_itinerary(park, stops,
+                                          start=payload.get('start', 'Entrance'),
+                                          return_to_start=bool(payload.get('return_to_start', False)),
+                                          time_budget=time_budget)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except nx.NetworkXNoPath as e:
+        return jsonify({'error': str(e)}), 422
+    
+    return jsonify(result)
+
+# Upper bound on results per nearby query
+MAX_NEARBY = 50
+
+@app.route('/api/nearby')
+def nearby_api():
+    """
+    Closest attractions with a short line:
+    /api/nearby?near=<attraction>|x=..&y=..&k=5&radius=..&max_wait=..
+    """
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    park = current_park()
+    near = request.args.get('near')
+    try:
+        if near:
+            if near not in park.index:
+                return jsonify({'error': f"Node {near} not found in graph"}), 400
+            x, y = park.nodes[near]
+        else:
+            x, y = float(request.args['x']), float(request.args['y'])
+        k = min(int(request.args.get('k', 5)), MAX_NEARBY)
+        radius = float(request.args['radius']) if request.args.get('radius') else None
+        max_wait = float(request.args['max_wait']) if request.args.get('max_wait') else None
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Give "near" or numeric "x" and "y"; k, radius and max_wait must be numbers'}), 400
+    
+    results = spatial.get_attraction_index().nearby(x, y, k=k, radius=radius, max_wait=max_wait, exclude=(near,) if near else ())
+    return jsonify({'x': x, 'y': y, 'results': results})
+
+# Upper bound on pairs per batch request
+MAX_BATCH_PAIRS = 50000
+
+@app.route('/api/routes/batch', methods=['POST'])
+def batch_route_api():
+    """
+    Routes many trips at once under the current waits. JSON body:
+    {"pairs": [{"start": ..., "end": ..., "count": 1}, ...], "include_paths": true, "record": false}
+    Returns every route plus the visitor load on each walkway. With
+    "record", the loads also feed the walkway congestion model.
+    """
+    if 'user' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('pairs')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': '"pairs" must be a non-empty list of {"start", "end"} objects'}), 400
+    if len(items) > MAX_BATCH_PAIRS:
+        return jsonify({'error': f'At most {MAX_BATCH_PAIRS} pairs per request'}), 413
+    
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('start'), str) or not isinstance(item.get('end'), str):
+            return jsonify({'error': 'Each pair needs "start" and "end" names'}), 400
+        count = item.get('count', 1)
+        # json accepts NaN and Infinity, which would stick in the congestion loads
+        if isinstance(count, bool) or not isinstance(count, (int, float)) or not math.isfinite(count) or count < 0:
+            return jsonify({'error': '"count" must be a finite non-negative number'}), 400
+        pairs.append((item['start'], item['end'], count))
+    
+    park = current_park()
+    model = congestion.get_congestion_model() if payload.get('record') else None
+    return jsonify(batch_routing.route_batch(park, pairs, include_paths=bool(payload.get('include_paths', True)), congestion=model))
+
 @app.route('/logout')
 def logout():
     session.pop('user', None)
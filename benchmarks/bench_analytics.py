@@ -0,0 +1,184 @@
+"""
+/insights aggregates over a season of history: pandas groupby on the full
+waiting_times frame against the columnar mirror in services.analytics
+(cold = partials computed from the files, warm = partials cached), checked
+for identical results first. bench_sketch compares the per-ride quantile
+sketches with exact percentiles; bench_cube times the hour-of-week cube's
+incremental updates and views against pandas (and checks the best-time
+windows on a ride closed overnight); bench_rollups times chart
+series at the tier picked for each range, and what compaction frees.
+
+    python -m benchmarks.bench_analytics
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from services import analytics
+from services import sketch
+from services import best_times
+from services.wait_cube import WaitCube
+from benchmarks.common import make_waiting_times, timeit, print_table
+
+def pandas_aggregates(df):
+    hour = pd.to_datetime(df['work_date']).dt.hour
+    top = df.groupby('entity_description_short')['wait_time_max'].mean().nlargest(10)
+    heat = df.assign(hour=hour).groupby(['entity_description_short', 'hour'])['wait_time_max'].mean()
+    return top, heat
+
+def reset():
+    analytics._rides = None
+    analytics._partials.clear()
+    analytics._merged_cache.clear()
+    analytics._cube = None
+
+def mirror_aggregates():
+    return analytics.top_rides(10), analytics.ride_hour_profile(), analytics.wait_histogram()
+
+def main(days=(7, 90, 365), n_rides=40):
+    rows = []
+    for n_days in days:
+        # One 15-minute sample per ride around the clock
+        df = make_waiting_times(n_rows=n_days * 96 * n_rides, n_rides=n_rides)
+        with tempfile.TemporaryDirectory() as folder:
+            analytics.MIRROR_DIR = folder
+            reset()
+            analytics.append_waits(df)
+
+            top, heat = pandas_aggregates(df)
+            mirror_top, mirror_heat, _ = mirror_aggregates()
+            assert np.allclose(top.values, mirror_top['wait_time_max'].values)
+            merged = mirror_heat.set_index(['entity_description_short', 'hour'])['wait_time_max']
+            assert np.allclose(heat.sort_index().values, merged.sort_index().values)
+
+            def cold():
+                reset()
+                mirror_aggregates()
+
+            rows.append([
+                f"{n_days}",
+                f"{len(df):,}",
+                f"{timeit(lambda: pandas_aggregates(df), repeat=3):.1f}",
+                f"{timeit(cold, repeat=3):.1f}",
+                f"{timeit(mirror_aggregates):.1f}",
+            ])
+        reset()
+    print_table(["days", "rows", "pandas ms", "mirror cold ms", "mirror warm ms"], rows)
+
+def bench_sketch(n_days=365, n_rides=40):
+    df = make_waiting_times(n_rows=n_days * 96 * n_rides, n_rides=n_rides)
+    with tempfile.TemporaryDirectory() as folder:
+        analytics.MIRROR_DIR = folder
+        reset()
+        analytics.append_waits(df)
+        ms = timeit(lambda: analytics.ride_percentiles(), repeat=3)
+        sketched = analytics.ride_percentiles().set_index('ride')
+        reset()
+
+    # The bound holds against the nearest-rank quantile; pandas'
+    # interpolated one is shown for reference
+    waits = df.groupby('entity_description_short')['wait_time_max']
+    rows = []
+    for q, col in zip([0.5, 0.9, 0.99], ['p50', 'p90', 'p99']):
+        errors = []
+        for method in ('inverted_cdf', 'linear'):
+            truth = waits.apply(lambda s: np.quantile(s.to_numpy(), q, method=method)).reindex(sketched.index).to_numpy(dtype=float)
+            errors.append(np.abs(sketched[col].to_numpy() - truth) / np.maximum(truth, 1))
+        assert errors[0].max() <= sketch.RELATIVE_ACCURACY
+        rows.append([col, f"{errors[0].max() * 100:.2f}%", f"{errors[0].mean() * 100:.2f}%", f"{errors[1].max() * 100:.2f}%"])
+    print_table(["quantile", "max rel. error", "mean rel. error", "max vs interpolated"], rows)
+    print(f"{n_days} days: {ms:.1f} ms per query, ride sketches {n_rides * sketch.N_BUCKETS * 4 / 1024:.0f} KiB per day")
+
+def pandas_profiles(df):
+    when = pd.to_datetime(df['work_date'])
+    df = df.assign(Day=when.dt.day_name().str.slice(0, 3), Hour=when.dt.hour)
+    by_day_hour = df.groupby(['Day', 'Hour'])['wait_time_max'].mean()
+    by_ride_hour = df.groupby(['entity_description_short', 'Hour'])['wait_time_max'].mean()
+    by_hour = df.groupby('Hour')['wait_time_max'].mean()
+    return by_day_hour, by_ride_hour, by_hour
+
+def cube_profiles():
+    return analytics.day_hour_profile(), analytics.ride_hour_profile(), analytics.hour_profile()
+
+def bench_cube(n_days=365, n_rides=40, page=1000):
+    df = make_waiting_times(n_rows=n_days * 96 * n_rides, n_rides=n_rides)
+    with tempfile.TemporaryDirectory() as folder:
+        analytics.MIRROR_DIR = folder
+        reset()
+        analytics.append_waits(df)
+        cube = analytics.get_cube()
+        codes = np.arange(page) % n_rides
+        stamps = np.full(page, 1751328000) + np.arange(page) * 60
+        waits = np.random.default_rng(1).uniform(0, 90, page)
+        rows = [
+            ["pandas groupby (3 views)", f"{timeit(lambda: pandas_profiles(df), repeat=3):.1f}"],
+            ["cube slices (3 views)", f"{timeit(cube_profiles):.1f}"],
+            [f"cube add ({page} rows)", f"{timeit(lambda: cube.add(stamps, codes, waits)):.1f}"],
+            ["cube rebuild (all history)", f"{timeit(analytics.rebuild_cube, repeat=1):.1f}"],
+        ]
+        size = os.path.getsize(os.path.join(folder, 'cube.npz'))
+        reset()
+    print_table(["operation", "ms"], rows)
+    print(f"cube for {n_rides} rides: {size / 1024:.0f} KiB on disk")
+
+def check_best_windows(n_weeks=4):
+    """A ride posting 0 while closed overnight must not get its closed hours as best windows."""
+    hours = np.arange(n_weeks * 7 * 24)
+    ts = 1750032000 + hours * 3600  # from a Monday midnight
+    hour = hours % 24
+    open_ = (hour >= 9) & (hour < 22)
+    # Quiet at opening, busy mid-afternoon; 0 while closed
+    wait = np.where(open_, 20 + 40 * np.exp(-((hour - 15) ** 2) / 8.0), 0.0)
+    cube = WaitCube()
+    cube.add(np.repeat(ts, 4), np.zeros(len(ts) * 4, dtype=int), np.repeat(wait, 4))
+    windows = best_times.best_windows(cube, ["Night Owl"])["Night Owl"]
+    for day in best_times.DAYS:
+        starts = [int(w['start'][:2]) for w in windows[day]]
+        assert all(9 <= start <= 22 - best_times.WINDOW_HOURS for start in starts), (day, starts)
+        assert starts[0] == 9 and windows[day][0]['wait'] > 0
+
+def folder_size(folder):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(folder) for f in files)
+
+def bench_rollups(n_days=365, n_rides=40):
+    df = make_waiting_times(n_rows=n_days * 96 * n_rides, n_rides=n_rides)
+    when = pd.to_datetime(df['work_date'])
+    rows = []
+    with tempfile.TemporaryDirectory() as folder:
+        analytics.MIRROR_DIR = folder
+        reset()
+        analytics.append_waits(df)
+        for days, freq in ((1, '5min'), (14, 'h'), (n_days, 'D')):
+            recent = df[when >= when.max().normalize() - pd.Timedelta(days=days - 1)]
+            stamps = pd.to_datetime(recent['work_date']).dt.floor(freq)
+
+            def raw():
+                recent.groupby([stamps, 'entity_description_short'])['wait_time_max'].agg(['mean', 'min', 'max'])
+
+            tier, series = analytics.wait_series(days=days)
+            # Each bucket's wait_time_max is its highest posted wait, as in the raw rows
+            peak = recent.groupby([stamps.rename('work_date'), 'entity_description_short'])['wait_time_max'].max()
+            got = series.set_index(['work_date', 'entity_description_short'])['wait_time_max']
+            assert np.allclose(got.sort_index().to_numpy(), peak.sort_index().to_numpy(dtype=float))
+            rows.append([
+                f"{days} days", tier, f"{len(series):,}",
+                f"{timeit(raw, repeat=3):.1f}",
+                f"{timeit(lambda: analytics.wait_series(days=days)):.1f}",
+            ])
+        before = folder_size(folder)
+        analytics.compact()
+        after = folder_size(folder)
+        reset()
+    print_table(["range", "tier", "points", "raw groupby ms", "rollup ms"], rows)
+    print(f"mirror on disk: {before / 2**20:.1f} MiB, {after / 2**20:.1f} MiB after compaction")
+
+if __name__ == '__main__':
+    main()
+    print()
+    bench_sketch()
+    print()
+    bench_cube()
+    check_best_windows()
+    print()
+    bench_rollups()
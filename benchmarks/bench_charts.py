@@ -0,0 +1,63 @@
+"""
+Chart payload report: bytes each page ships for its charts.
+
+"before" re-inflates every spec into the legacy to_html fragment the pages
+used to embed (template + per-chart plotly.js bootstrap), "after" is the
+spec itself. Pages are the charts they load, as registered in app.CHARTS.
+
+    python -m benchmarks.bench_charts
+"""
+import json
+import pandas as pd
+import plotly.graph_objects as go
+
+from services import plots
+from benchmarks.common import make_waiting_times, print_table
+
+def to_html(fig):
+    """The fragment the pages embedded before they loaded chart specs."""
+    return fig.to_html(full_html=False, include_plotlyjs='cdn', config={'responsive': True, 'displayModeBar': False})
+
+def legacy_size(spec_json):
+    spec = json.loads(spec_json)
+    if not spec:
+        return 0
+    return len(to_html(go.Figure(spec)).encode())
+
+def page_charts():
+    df_wait = make_waiting_times(2000)
+    df_wait['hour'] = pd.to_datetime(df_wait['work_date']).dt.hour
+
+    top_rides = df_wait.groupby('entity_description_short')['wait_time_max'].mean().reset_index()
+    top_rides = top_rides.sort_values('wait_time_max', ascending=False).head(10)
+    heatmap_data = df_wait.groupby(['entity_description_short', 'hour'])['wait_time_max'].mean().reset_index()
+
+    latest = df_wait.drop_duplicates('entity_description_short')
+    status_counts = latest['wait_time_max'].apply(lambda x: 'Open' if x > 0 else 'Closed').value_counts()
+
+    return {
+        '/insights': {
+            'trend': plots.generate_bar_chart(top_rides, 'entity_description_short', 'wait_time_max', 'Top 10 Rides by Average Wait Time', 'Ride', 'Average Wait Time (min)', color_col='wait_time_max'),
+            'scatter': plots.generate_scatter_chart(df_wait, 'work_date', 'wait_time_max', 'entity_description_short', title='Wait Time Over Time'),
+            'heatmap': plots.generate_heatmap(heatmap_data, 'hour', 'entity_description_short', 'wait_time_max', 'Wait Time Heatmap'),
+        },
+        '/rides': {
+            'bar': plots.generate_bar_chart(latest.nlargest(10, 'wait_time_max'), 'entity_description_short', 'wait_time_max', 'Top 10 Rides by Wait Time', 'Ride', 'Wait Time (min)', color_col='wait_time_max'),
+            'pie': plots.generate_pie_chart(None, status_counts.index, values=status_counts.values, title='Ride Status Distribution'),
+        },
+    }
+
+def main():
+    rows = []
+    for page, charts in page_charts().items():
+        page_before = page_after = 0
+        for name, spec in charts.items():
+            before, after = legacy_size(spec), len(spec.encode())
+            page_before += before
+            page_after += after
+            rows.append([page, name, before, after, f"{100 * (1 - after / before):.0f}%"])
+        rows.append([page, "TOTAL", page_before, page_after, f"{100 * (1 - page_after / page_before):.0f}%"])
+    print_table(["page", "chart", "html bytes", "spec bytes", "saved"], rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+figures.* builders vs plotly.express for the charts app.py renders.
+
+Each row first checks visual equivalence: the builder-based generate_*
+output must decode to the same spec as the plotly.express reference below
+(the pre-builder implementation) once typed arrays are expanded. Then both
+are timed end to end, serialization included. tests/test_figures.py
+asserts the same equivalence for every chart.
+
+    python -m benchmarks.bench_figures
+"""
+import base64
+import json
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from services import plots
+from benchmarks.common import make_waiting_times, timeit, print_table
+
+STYLE = dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(family="Outfit", color="#142C63"))
+PANEL = dict(height=350, margin=dict(l=50, r=20, t=60, b=50), **STYLE)
+GRID = dict(xaxis=dict(showgrid=False), yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)'))
+
+def px_bar(df, x_col, y_col, title, x_label, y_label, color_col=None):
+    fig = px.bar(df, x=x_col, y=y_col, title=title, labels={x_col: x_label, y_col: y_label},
+                 color=color_col if color_col else y_col,
+                 color_continuous_scale='Viridis' if color_col else None)
+    if not color_col:
+        fig.update_traces(marker_color='#3b82f6')
+    fig.update_layout(**STYLE, **GRID)
+    return plots.to_spec(fig)
+
+def px_pie(names, values, title):
+    fig = px.pie(values=values, names=names, title=title, hole=0.5)
+    fig.update_layout(height=350, paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Outfit", color="#142C63"),
+                      margin=dict(l=20, r=20, t=60, b=20), showlegend=True)
+    return plots.to_spec(fig)
+
+def px_histogram(df, x_col, title):
+    fig = px.histogram(df, x=x_col, nbins=30, title=title, color_discrete_sequence=['#142C63'])
+    fig.update_layout(**PANEL)
+    return plots.to_spec(fig)
+
+def px_area(df, x_col, y_col):
+    fig = px.area(df, x=x_col, y=y_col, color_discrete_sequence=['#3b82f6'])
+    fig.update_layout(margin=dict(t=10, l=0, r=0, b=0), **STYLE, **GRID)
+    return plots.to_spec(fig)
+
+def px_heatmap(df, x_col, y_col, z_col, title):
+    fig = px.density_heatmap(df, x=x_col, y=y_col, z=z_col, title=title, color_continuous_scale='Viridis')
+    fig.update_layout(**PANEL)
+    return plots.to_spec(fig)
+
+def expand(obj):
+    """Decodes typed arrays so specs compare by value, not by encoding."""
+    if isinstance(obj, dict):
+        if 'bdata' in obj and 'dtype' in obj:
+            arr = np.frombuffer(base64.b64decode(obj['bdata']), dtype=obj['dtype']).astype(float)
+            if 'shape' in obj:
+                arr = arr.reshape([int(n) for n in str(obj['shape']).split(',')])
+            return arr.tolist()
+        return {k: expand(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [expand(v) for v in obj]
+    if isinstance(obj, int) and not isinstance(obj, bool):
+        return float(obj)
+    return obj
+
+def equivalent(a, b):
+    return expand(json.loads(a)) == expand(json.loads(b))
+
+def cases():
+    df_wait = make_waiting_times(2000)
+    df_wait['hour'] = pd.to_datetime(df_wait['work_date']).dt.hour
+    top = df_wait.groupby('entity_description_short')['wait_time_max'].mean().reset_index().head(10)
+    hourly = df_wait.groupby('hour')['wait_time_max'].mean().reset_index()
+    heat = df_wait.groupby(['entity_description_short', 'hour'])['wait_time_max'].mean().reset_index()
+    counts = df_wait['wait_time_max'].apply(lambda x: 'Open' if x > 0 else 'Closed').value_counts()
+    bar_args = (top, 'entity_description_short', 'wait_time_max', 'Top 10', 'Ride', 'Wait (min)')
+
+    return {
+        'bar (viridis)': (lambda: plots.generate_bar_chart(*bar_args, color_col='wait_time_max'),
+                          lambda: px_bar(*bar_args, color_col='wait_time_max')),
+        'bar (flat)': (lambda: plots.generate_bar_chart(*bar_args),
+                       lambda: px_bar(*bar_args)),
+        'pie': (lambda: plots.generate_pie_chart(None, counts.index, values=counts.values, title='Ride Status'),
+                lambda: px_pie(counts.index, counts.values, 'Ride Status')),
+        'histogram': (lambda: plots.generate_histogram(df_wait, 'wait_time_max', 'Distribution'),
+                      lambda: px_histogram(df_wait, 'wait_time_max', 'Distribution')),
+        'area': (lambda: plots.generate_trend_area(hourly, 'hour', 'wait_time_max'),
+                 lambda: px_area(hourly, 'hour', 'wait_time_max')),
+        'heatmap': (lambda: plots.generate_heatmap(heat, 'hour', 'entity_description_short', 'wait_time_max', 'Heatmap'),
+                    lambda: px_heatmap(heat, 'hour', 'entity_description_short', 'wait_time_max', 'Heatmap')),
+    }
+
+def main():
+    rows = []
+    for name, (builder, reference) in cases().items():
+        same = equivalent(builder(), reference())
+        t_builder, t_px = timeit(builder, repeat=20), timeit(reference, repeat=20)
+        rows.append([name, "yes" if same else "NO", f"{t_px:.2f}", f"{t_builder:.2f}", f"{t_px / t_builder:.1f}x"])
+    print_table(["chart", "equivalent", "px ms", "builder ms", "speedup"], rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+/map figure build time and payload for growing park graphs: the original
+per-edge loop (legacy_map_json below) against plots.generate_map_json in
+SVG and WebGL mode.
+
+    python -m benchmarks.bench_map
+"""
+import json
+import numpy as np
+
+from services import plots
+from services.park_graph import ParkGraph, validate_topology
+from benchmarks.common import make_park, as_topology, timeit, print_table
+
+def legacy_map_json(park, path):
+    """The pre-WebGL generate_map_json: Python loops, plain JSON lists."""
+    G = park.G
+    edge_x, edge_y = [], []
+    for edge in G.edges():
+        x0, y0 = G.nodes[edge[0]]['pos']
+        x1, y1 = G.nodes[edge[1]]['pos']
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+    path_x, path_y = [], []
+    for u, v in zip(path, path[1:]):
+        x0, y0 = G.nodes[u]['pos']
+        x1, y1 = G.nodes[v]['pos']
+        path_x.extend([x0, x1, None])
+        path_y.extend([y0, y1, None])
+    node_x, node_y, node_text, node_color, node_size = [], [], [], [], []
+    for node in G.nodes():
+        x, y = G.nodes[node]['pos']
+        wait = G.nodes[node]['wait']
+        node_x.append(x)
+        node_y.append(y)
+        node_text.append(f"{node}<br>Wait: {wait} min")
+        node_color.append("#A6D86B" if wait < 15 else "#F57C00" if wait < 45 else "#D92B7D")
+        node_size.append(30 if node in path else 20)
+    data = [
+        {'x': edge_x, 'y': edge_y, 'mode': 'lines', 'type': 'scatter'},
+        {'x': path_x, 'y': path_y, 'mode': 'lines', 'type': 'scatter'},
+        {'x': node_x, 'y': node_y, 'mode': 'markers+text', 'text': [n if n in path else "" for n in G.nodes()],
+         'hovertext': node_text, 'marker': {'color': node_color, 'size': node_size}, 'type': 'scatter'},
+    ]
+    return json.dumps({'data': data, 'layout': {}})
+
+def main(sizes=(100, 1000, 5000)):
+    rows = []
+    for n_nodes in sizes:
+        park = ParkGraph(**validate_topology(as_topology(*make_park(n_nodes))))
+        rng = np.random.default_rng(8)
+        park.update_waits({name: int(w) for name, w in zip(park.names, rng.integers(0, 60, n_nodes))})
+        path = park.route(park.names[0], park.names[-1])[0]
+        for label, build in [
+            ("legacy", lambda: legacy_map_json(park, path)),
+            ("svg", lambda: plots.generate_map_json(park, path, webgl=False)),
+            ("webgl", lambda: plots.generate_map_json(park, path, webgl=True)),
+        ]:
+            rows.append([n_nodes, len(park.edges), label, f"{timeit(build, 5):.1f}", f"{len(build()) / 1024:.0f}"])
+    print("Map figure build (ms) and payload (KB)")
+    print_table(["nodes", "edges", "mode", "build ms", "KB"], rows)
+
+if __name__ == '__main__':
+    main()
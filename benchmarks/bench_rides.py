@@ -0,0 +1,229 @@
+"""
+/rides status, capacity and throughput: the original iterrows loop
+(legacy_rides below) against services.ride_status.summarize, checked for
+identical output first.
+
+    python -m benchmarks.bench_rides
+"""
+import numpy as np
+import pandas as pd
+
+from services import ride_status
+from services import throughput
+from services.ride_stats import RideStats, WINDOW
+from services.anomaly import AnomalyDetector
+from benchmarks.common import make_waiting_times, timeit, print_table
+
+def legacy_rides(latest):
+    """The pre-vectorised body of app.rides()."""
+    rides_data = []
+    avg_wait = int(latest['wait_time_max'].mean())
+    max_row = latest.loc[latest['wait_time_max'].idxmax()]
+    active_count = len(latest[latest['wait_time_max'] > 0])
+    avg_capacity_per_ride = 24
+    if avg_wait > 0:
+        throughput = int((active_count * avg_capacity_per_ride * 60) / avg_wait)
+    else:
+        throughput = active_count * avg_capacity_per_ride * 4
+    for _, row in latest.iterrows():
+        wait_time = row['wait_time_max']
+        if pd.isna(wait_time) or wait_time == 0:
+            status = "Closed"
+            capacity_pct = 0
+        else:
+            status = "Open"
+            if wait_time < 15:
+                capacity_pct = int(40 + (wait_time / 15) * 20)
+            elif wait_time < 45:
+                capacity_pct = int(60 + ((wait_time - 15) / 30) * 25)
+            else:
+                capacity_pct = int(85 + min((wait_time - 45) / 155, 1) * 15)
+        rides_data.append({
+            "name": row['entity_description_short'],
+            "status": status,
+            "wait": int(wait_time) if not pd.isna(wait_time) else 0,
+            "capacity": capacity_pct
+        })
+    status_counts = latest['wait_time_max'].apply(lambda x: 'Open' if x > 0 else 'Closed').value_counts()
+    return {
+        'total_count': len(latest), 'active_count': active_count,
+        'avg_wait': avg_wait, 'max_wait': int(max_row['wait_time_max']),
+        'max_wait_ride': max_row['entity_description_short'], 'throughput': throughput,
+        'rides': rides_data,
+    }, status_counts
+
+def vectorized(latest):
+    return ride_status.summarize(latest), ride_status.status_counts(latest['wait_time_max'])
+
+def main(sizes=(100, 1000, 10000, 50000)):
+    rows = []
+    for n_rides in sizes:
+        latest = make_waiting_times(n_rides, n_rides=n_rides)
+        # A few rides with no reading at all
+        latest.loc[latest.sample(frac=0.02, random_state=1).index, 'wait_time_max'] = np.nan
+        before, after = legacy_rides(latest), vectorized(latest)
+        for ride in after[0]['rides']:
+            ride.pop('throughput')
+        assert before[0] == after[0]
+        assert before[1].to_dict() == after[1].to_dict()
+        rows.append([n_rides, f"{timeit(lambda: legacy_rides(latest), 3):.1f}", f"{timeit(lambda: vectorized(latest), 3):.1f}"])
+    print("/rides status + capacity + throughput")
+    print_table(["rides", "iterrows ms", "numpy ms"], rows)
+    print()
+    bench_throughput()
+    print()
+    bench_rolling()
+    print()
+    bench_anomaly()
+
+def bench_throughput(sizes=(2000, 20000, 200000), n_rides=50):
+    facilities = pd.DataFrame({
+        'facility_name': [f"{name} ride" for name in make_waiting_times(n_rides, n_rides=n_rides)['entity_description_short'].unique()],
+        'type': np.resize(['Coaster', 'Family', 'Show', 'Water'], n_rides),
+        'capacity': np.resize([24, 20, 300, 12], n_rides),
+    })
+    rows = []
+    for n_rows in sizes:
+        df = make_waiting_times(n_rows, n_rides=n_rides)
+        throughput._snapshot = None
+        cold = timeit(lambda: throughput.hourly_throughput(df, facilities), 3)
+        throughput.snapshot_throughput(df, facilities)
+        warm = timeit(lambda: throughput.snapshot_throughput(df, facilities), 3)
+        hourly = throughput.hourly_throughput(df, facilities)
+        rows.append([n_rows, len(hourly), f"{cold:.1f}", f"{warm:.2f}", f"{throughput.current_throughput(df, facilities).sum():.0f}"])
+    print(f"Hourly throughput per ride ({n_rides} rides)")
+    print_table(["rows", "ride-hours", "compute ms", "snapshot hit ms", "park arrivals/h"], rows)
+    check_throughput()
+
+def check_throughput():
+    """Facility matching and arrivals on a hand-made park."""
+    facilities = pd.DataFrame({
+        'facility_name': ["The Big Coaster", "Big Thunder Mountain", "The Haunted Mansion", "Splash Falls"],
+        'capacity': [24, 24, 24, 24],
+        'cycle_minutes': [2.5, 2.5, 2.5, 2.5],
+    })
+    capacity = throughput.facility_capacity(facilities)
+    caps = throughput.match_rides(["Big Thunder Mountain Railroad", "Haunted Mansion", "The Simpsons Ride", "Big Splash"], capacity)
+    assert caps['hourly'].iloc[:2].tolist() == [576.0, 576.0]
+    assert caps['hourly'].iloc[2:].isna().all()  # a shared "the" or "big" is not a match
+    assert throughput.match_facility("Big Thunder", {name: throughput.name_tokens(name) for name in
+                                                     ["big thunder mountain", "big thunder lake"]}) is None
+
+    # Two steady queues of different length serve the same, a growing one takes in more
+    stamps = pd.date_range("2025-06-30 10:00", periods=8, freq="15min")
+    df = pd.DataFrame({
+        'entity_description_short': np.repeat(["Big Thunder Mountain", "The Big Coaster", "Splash Falls"], 8),
+        'work_date': np.tile(stamps, 3),
+        'wait_time_max': np.concatenate([np.full(8, 38.0), np.full(8, 99.0), np.linspace(30, 65, 8)]),
+    })
+    rates = throughput.current_throughput(df, facilities)
+    assert rates["Big Thunder Mountain"] == rates["The Big Coaster"] == 576.0
+    assert rates["Splash Falls"] > 576.0
+
+    # Rides with no facility keep the flat estimate instead of adding 0
+    latest = pd.DataFrame({'entity_description_short': ["Big Thunder Mountain", "Unlisted Ride", "Closed Ride"],
+                           'wait_time_max': [38.0, 30.0, 0.0]})
+    summary = ride_status.summarize(latest, rates)
+    per_ride = [ride['throughput'] for ride in summary['rides']]
+    assert per_ride == [576, int(ride_status.throughput([30.0])[0]), 0]
+    assert summary['throughput'] == sum(per_ride)
+
+
+def pandas_rolling(df):
+    """Per-ride stats recomputed from the frame, as the pages did."""
+    d = df.assign(t=pd.to_datetime(df['work_date'])).sort_values('t')
+    tail = d.groupby('entity_description_short').tail(WINDOW)
+    g = tail.groupby('entity_description_short')['wait_time_max']
+    return pd.DataFrame({'mean': g.mean(), 'p50': g.quantile(0.5), 'p90': g.quantile(0.9), 'latest': g.last()})
+
+def bench_rolling(n_rides=200, n_rows=20000):
+    df = make_waiting_times(n_rows, n_rides=n_rides)
+    store = RideStats()
+    store.ingest_frame(df)
+    ref, got = pandas_rolling(df), store.stats()
+    assert all(abs(ref.loc[name, 'mean'] - got[name]['mean']) < 0.06 for name in ref.index)
+    minute = [1e9]
+
+    def add_one():
+        minute[0] += 1
+        store.add("Transformers", minute[0], 30)
+
+    rows = [
+        ["pandas recompute", f"{timeit(lambda: pandas_rolling(df), 3):.2f}"],
+        ["store.stats()", f"{timeit(store.stats, 3):.2f}"],
+        ["store.add() x1000", f"{timeit(lambda: [add_one() for _ in range(1000)], 3):.2f}"],
+        ["first ingest_frame", f"{timeit(lambda: RideStats().ingest_frame(df), 3):.2f}"],
+    ]
+    print(f"Rolling per-ride stats ({n_rides} rides, {n_rows} rows, window {WINDOW})")
+    print_table(["operation", "ms"], rows)
+
+def with_incidents(df, ride, at):
+    """`df` with `ride` down (0 min) for an hour from step `at` and its queue at 150 min two hours later."""
+    df = df.copy()
+    stamps = np.sort(df['work_date'].unique())
+    mine = df['entity_description_short'] == ride
+    down = mine & df['work_date'].isin(stamps[at:at + 4])
+    spike = mine & (df['work_date'] == stamps[at + 12])
+    df.loc[down, 'wait_time_max'] = 0
+    df.loc[spike, 'wait_time_max'] = 150
+    return df, stamps
+
+def bench_anomaly(sizes=(20000, 200000, 1000000), n_rides=200):
+    rows = []
+    for n_rows in sizes:
+        df = make_waiting_times(n_rows, n_rides=n_rides)
+        ride = df['entity_description_short'].iloc[0]
+        n_steps = n_rows // n_rides
+        df, stamps = with_incidents(df, ride, at=n_steps - 20)
+        ms = timeit(lambda: AnomalyDetector().ingest_frame(df), 3)
+        detector = AnomalyDetector(limit=n_rows)
+        detector.ingest_frame(df)
+        alerts = detector.alerts(limit=n_rows, since=pd.Timestamp(stamps[n_steps - 21]).timestamp())
+        kinds = {a['kind'] for a in alerts if a['ride'] == ride}
+        assert {'down', 'reopened', 'spike'} <= kinds, kinds
+        rows.append([n_rows, f"{ms:.1f}", f"{n_rows / ms * 1000:,.0f}", len(detector.alerts(limit=n_rows))])
+    print(f"Breakdown / spike detection ({n_rides} rides, one reading per ride per 15 min)")
+    print_table(["readings", "ingest ms", "readings/s", "alerts"], rows)
+
+    # One reading at a time, as a single poller would feed it
+    detector = AnomalyDetector()
+    t = [1_750_000_000]
+
+    def add_many():
+        for _ in range(1000):
+            t[0] += 60
+            detector.add("Transformers", t[0], 30)
+
+    print(f"detector.add() x1000: {timeit(add_many, 3):.2f} ms")
+    check_closing()
+
+def staggered_park(days=5, n_rides=30, seed=3):
+    """
+    09:00-22:15 readings every 15 minutes, each ride up to 2 minutes late
+    and 10% of readings missing; every ride reads 0 from 22:00 (closing),
+    and "Ride 0" breaks down for an hour on the last afternoon.
+    """
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(36, 90) * 15
+    day = np.repeat(np.arange(days), len(minutes))
+    minute = np.tile(minutes, days)
+    stamps = np.datetime64("2025-06-02") + day.astype('timedelta64[D]') + minute.astype('timedelta64[m]')
+    t = np.repeat(stamps, n_rides) + rng.integers(0, 120, len(stamps) * n_rides).astype('timedelta64[s]')
+    ride = np.tile(np.arange(n_rides), len(stamps))
+    hour = np.repeat(minute / 60, n_rides)
+    wait = np.maximum(5, 25 + 15 * np.sin((hour - 9) / 13 * np.pi) + rng.normal(0, 4, len(t))).round()
+    wait[hour >= 22] = 0
+    wait[(ride == 0) & (np.repeat(day, n_rides) == days - 1) & (hour >= 14) & (hour < 15)] = 0
+    keep = rng.random(len(t)) >= 0.1
+    return pd.DataFrame({'entity_description_short': np.char.add("Ride ", ride.astype(str))[keep],
+                         'work_date': t[keep], 'wait_time_max': wait[keep]})
+
+def check_closing():
+    """Nightly closings raise nothing even when rides report out of step; the breakdown does."""
+    detector = AnomalyDetector(limit=10000)
+    detector.ingest_frame(staggered_park())
+    downs = [a['ride'] for a in detector.alerts(limit=10000) if a['kind'] == 'down']
+    assert downs == ["Ride 0"], downs
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Routing benchmarks on a synthetic park (services.park_graph.ParkGraph).
+
+    python -m benchmarks.bench_routing
+"""
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+from services import itinerary
+from services import td_routing
+from services import batch_routing
+from services import congestion
+from services import spatial
+from services.spatial import AttractionIndex
+from services.park_graph import ParkGraph, validate_topology
+from benchmarks.common import make_park, as_topology, timeit, print_table
+
+def random_waits(park, seed=0):
+    rng = np.random.default_rng(seed)
+    return {name: int(w) for name, w in zip(park.names, rng.integers(0, 60, len(park.names)))}
+
+def bench_itinerary(n_nodes=400, sizes=(5, 10, 20), trials=5):
+    nodes, edges = make_park(n_nodes)
+    park = ParkGraph(nodes, edges)
+    park.update_waits(random_waits(park))
+    rng = np.random.default_rng(1)
+
+    rows = []
+    for size in sizes:
+        times, totals, gaps, methods = [], [], [], set()
+        for _ in range(trials):
+            stops = list(rng.choice(park.names[1:], size, replace=False))
+            result = itinerary.plan_itinerary(park, stops)
+            times.append(result["elapsed_ms"])
+            totals.append(result["total_time"])
+            methods.add(result["method"])
+            if size <= itinerary.EXACT_MAX_STOPS:
+                # How far the heuristic alone would have been from optimal
+                cost, walk, _, _ = itinerary._leg_costs(park, ["Entrance"] + stops)
+                heuristic = itinerary._two_opt(walk, itinerary._nearest_neighbour(cost), False, time.perf_counter() + 1)
+                gaps.append(itinerary._route_cost(cost, heuristic, False) / result["total_time"] - 1)
+        rows.append([
+            size, "/".join(sorted(methods)),
+            f"{np.median(times):.1f}", f"{max(times):.1f}",
+            f"{np.mean(totals):.0f}",
+            f"{100 * np.mean(gaps):.1f}%" if gaps else "-",
+        ])
+    print(f"Itinerary ordering ({n_nodes}-node park, budget {itinerary.DEFAULT_TIME_BUDGET * 1000:.0f} ms)")
+    print_table(["stops", "method", "median ms", "max ms", "avg minutes", "2-opt gap"], rows)
+    check_itinerary_matches_routes(park)
+
+def check_itinerary_matches_routes(park, seed=2):
+    """Under congestion, every leg and the total agree with route() over the same legs."""
+    rng = np.random.default_rng(seed)
+    park.update_delays(rng.uniform(0, 5, len(park.edges)))
+    stops = list(rng.choice(park.names[1:], 6, replace=False))
+    for closed in (False, True):
+        result = itinerary.plan_itinerary(park, stops, return_to_start=closed)
+        here, total = "Entrance", 0.0
+        for leg in result["legs"]:
+            path, _, steps = park.route(here, leg["target"])
+            minutes = sum(step["walk"] + step["wait"] for step in steps)
+            assert leg["path"] == path and abs(leg["walk"] + leg["wait"] - minutes) < 1e-6
+            here, total = leg["target"], total + minutes
+        assert abs(result["total_time"] - total) < 1e-6
+        assert abs(result["walk_time"] + result["wait_time"] - total) < 1e-6
+    park.update_delays(np.zeros(len(park.edges)))
+
+def random_profiles(park, seed=0):
+    # Smooth daily curves peaking mid-afternoon, scaled per ride
+    rng = np.random.default_rng(seed)
+    hours = np.arange(24)
+    shape = np.exp(-((hours - 14) ** 2) / 18.0)
+    scale = rng.uniform(5, 90, len(park.names))
+    return {name: (5 + s * shape).tolist() for name, s in zip(park.names, scale)}
+
+def bench_time_dependent(sizes=(400, 2000, 5000), queries=30):
+    rows = []
+    for n_nodes in sizes:
+        nodes, edges = make_park(n_nodes)
+        park = ParkGraph(nodes, edges)
+        router = td_routing.TimeDependentRouter(park, td_routing.profile_matrix(park, random_profiles(park)))
+        rng = np.random.default_rng(2)
+        pairs = [tuple(rng.choice(park.names, 2, replace=False)) for _ in range(queries)]
+
+        plain, astar = [], []
+        for start, end in pairs:
+            depart = int(rng.integers(9 * 60, 18 * 60))
+            t0 = time.perf_counter()
+            _, arrive_plain, _ = router.route(start, end, depart, use_astar=False)
+            t1 = time.perf_counter()
+            _, arrive_astar, _ = router.route(start, end, depart)
+            t2 = time.perf_counter()
+            assert abs(arrive_plain - arrive_astar) < 1e-6
+            plain.append((t1 - t0) * 1000)
+            astar.append((t2 - t1) * 1000)
+        rows.append([n_nodes, len(edges), f"{np.median(plain):.2f}", f"{np.median(astar):.2f}", f"{np.percentile(astar, 95):.2f}"])
+
+        # With every hour at the current wait both routers charge the same
+        # costs, so they must agree on the total
+        park.update_waits(random_waits(park))
+        flat = td_routing.TimeDependentRouter(park, td_routing.profile_matrix(park, {}))
+        for start, end in pairs:
+            dist, _ = park.shortest_tree(park.index[start])
+            _, arrive, _ = flat.route(start, end, 600)
+            assert abs((arrive - 600) - dist[park.index[end]]) < 1e-6
+    print("Time-dependent routing (median over random start/end/departure)")
+    print_table(["nodes", "edges", "dijkstra ms", "A* ms", "A* p95 ms"], rows)
+
+def bench_topology(sizes=(1000, 5000, 10000), queries=50):
+    rows = []
+    for n_nodes in sizes:
+        data = as_topology(*make_park(n_nodes))
+        t0 = time.perf_counter()
+        park = ParkGraph(**validate_topology(data))
+        build = (time.perf_counter() - t0) * 1000
+        park.update_waits(random_waits(park))
+        rng = np.random.default_rng(3)
+        pairs = [tuple(rng.choice(park.attractions, 2, replace=False)) for _ in range(queries)]
+        park.route(*pairs[0])  # first call builds the weight matrix
+
+        times = []
+        for start, end in pairs:
+            t0 = time.perf_counter()
+            park.route(start, end)
+            times.append((time.perf_counter() - t0) * 1000)
+        mode = "all-pairs" if park.all_pairs else "dijkstra"
+        rows.append([n_nodes, len(data["walkways"]), mode, f"{build:.0f}", f"{np.median(times):.2f}", f"{np.percentile(times, 95):.2f}"])
+    print("Topology load + route() latency (after a wait update)")
+    print_table(["nodes", "walkways", "mode", "load ms", "median ms", "p95 ms"], rows)
+
+def bench_batch(n_nodes=5000, n_pairs=10000, n_sources=(20, 200)):
+    park = ParkGraph(**validate_topology(as_topology(*make_park(n_nodes))))
+    park.update_waits(random_waits(park))
+    rows = []
+    for k in n_sources:
+        rng = np.random.default_rng(4)
+        starts = rng.choice(park.attractions, k, replace=False)
+        pairs = [(str(rng.choice(starts)), str(rng.choice(park.attractions))) for _ in range(n_pairs)]
+
+        t0 = time.perf_counter()
+        single = [park.route(start, end)[1] for start, end in pairs[:500]]
+        per_pair = (time.perf_counter() - t0) / 500 * n_pairs * 1000
+        result = batch_routing.route_batch(park, pairs)
+        assert all(int(r["total_time"]) == t for r, t in zip(result["routes"], single))
+        rows.append([n_pairs, k, f"{per_pair:.0f}", f"{result['elapsed_ms']:.0f}", len(result["edge_loads"])])
+    print(f"Batch routing ({n_nodes}-node park; per-pair time extrapolated from 500 calls)")
+    print_table(["pairs", "sources", "route() loop ms", "batch ms", "loaded edges"], rows)
+
+def bench_congestion(n_nodes=5000, n_pairs=5000, party=4, rounds=6):
+    """
+    Routes the same crowd every 10 minutes, feeding each round's loads back
+    through the congestion model, and reports how the peak walkway load
+    spreads out and what one record + apply cycle costs.
+    """
+    park = ParkGraph(**validate_topology(as_topology(*make_park(n_nodes))))
+    park.update_waits(random_waits(park))
+    model = congestion.CongestionModel(park)
+    rng = np.random.default_rng(5)
+    hubs = rng.choice(park.attractions, 10, replace=False)
+    pairs = [(str(rng.choice(hubs)), str(rng.choice(park.attractions)), party) for _ in range(n_pairs)]
+
+    rows = []
+    now = time.time()
+    for r in range(rounds):
+        result = batch_routing.route_batch(park, pairs, include_paths=False)
+        loads = np.array([e["count"] for e in result["edge_loads"]], dtype=float)
+        avg_time = np.mean([route["total_time"] for route in result["routes"]])
+        now += 600
+        t0 = time.perf_counter()
+        loaded = park.edge_index(*zip(*[(park.index[e["from"]], park.index[e["to"]]) for e in result["edge_loads"]]))
+        model.record(loaded, loads, now)
+        changed = model.apply(now)
+        cycle = (time.perf_counter() - t0) * 1000
+        rows.append([r, f"{loads.max():.0f}", f"{np.percentile(loads, 99):.0f}", f"{avg_time:.1f}", len(changed), f"{cycle:.2f}"])
+    print(f"Congestion feedback ({n_nodes}-node park, {n_pairs} parties of {party} from 10 hubs every 10 min)")
+    print_table(["round", "peak load", "p99 load", "avg minutes", "edges changed", "record+apply ms"], rows)
+
+def bench_nearby(sizes=(1000, 5000, 20000, 50000, 100000), queries=500):
+    """Full scan vs KD-tree per query, both forced, with identical answers checked."""
+    rows = []
+    for n_nodes in sizes:
+        park = ParkGraph(**validate_topology(as_topology(*make_park(n_nodes))))
+        park.update_waits(random_waits(park))
+        index = AttractionIndex(park)
+        rng = np.random.default_rng(6)
+        points = rng.uniform(0, park.xy.max(), (queries, 2))
+        waits = park.wait_array()[index.ids]
+        tree = cKDTree(index.xy)
+
+        def scan():
+            for x, y in points:
+                index._scan(x, y, 5, np.inf, waits, 10, [])
+
+        def query():
+            for x, y in points:
+                index._query(x, y, 5, np.inf, waits, 10, [])
+
+        index.tree = tree
+        for x, y in points[:50]:
+            assert np.allclose(index._scan(x, y, 5, np.inf, waits, 10, [])[0], index._query(x, y, 5, np.inf, waits, 10, [])[0])
+        rows.append([n_nodes, len(index.names), f"{timeit(scan, 3) / queries:.3f}", f"{timeit(query, 3) / queries:.3f}",
+                     "scan" if len(index.names) <= spatial.BRUTE_FORCE_MAX else "kd-tree"])
+    print("Nearest 5 attractions with wait <= 10 min (per query)")
+    print_table(["nodes", "attractions", "scan ms", "kd-tree ms", "nearby() uses"], rows)
+
+def main():
+    bench_topology()
+    print()
+    bench_batch()
+    print()
+    bench_congestion()
+    print()
+    bench_nearby()
+    print()
+    bench_itinerary()
+    print()
+    bench_time_dependent()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Figure serialization: PlotlyJSONEncoder vs services.serializer.
+
+Figures are built the same way the generate_* functions build them, on
+synthetic data sized like the real Supabase pulls, and serialized the way
+plots.to_spec does (template stripped). Newer plotly releases pre-encode
+arrays inside to_plotly_json; those are decoded back to numpy so every
+version is measured on the arrays plotly 5.x hands over.
+
+    python -m benchmarks.bench_serializer
+"""
+import base64
+import json
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.express as px
+import plotly.graph_objects as go
+
+from services import serializer
+from benchmarks.common import make_waiting_times, timeit, print_table
+
+def real_figures():
+    df_wait = make_waiting_times(2000)
+    df_wait['hour'] = pd.to_datetime(df_wait['work_date']).dt.hour
+    heatmap_data = df_wait.groupby(['entity_description_short', 'hour'])['wait_time_max'].mean().reset_index()
+    top_rides = heatmap_data.groupby('entity_description_short')['wait_time_max'].mean().reset_index().head(10)
+
+    forecast_df = pd.DataFrame({
+        'ds': pd.date_range('2025-07-01', periods=365),
+        'yhat': np.random.default_rng(0).integers(12000, 25000, 365),
+    })
+
+    return {
+        'scatter (2000 pts)': px.scatter(df_wait, x='work_date', y='wait_time_max', color='entity_description_short'),
+        'heatmap (ride x hour)': px.density_heatmap(heatmap_data, x='hour', y='entity_description_short', z='wait_time_max'),
+        'histogram': px.histogram(df_wait, x='wait_time_max', nbins=30),
+        'bar (top 10)': px.bar(top_rides, x='entity_description_short', y='wait_time_max', color='wait_time_max'),
+        'forecast (365 days)': go.Figure(go.Scatter(x=forecast_df['ds'], y=forecast_df['yhat'], mode='lines+markers')),
+    }
+
+def as_numpy(obj):
+    if isinstance(obj, dict):
+        if 'bdata' in obj and 'dtype' in obj:
+            arr = np.frombuffer(base64.b64decode(obj['bdata']), dtype=obj['dtype'])
+            if 'shape' in obj:
+                arr = arr.reshape([int(n) for n in str(obj['shape']).split(',')])
+            return arr
+        return {k: as_numpy(v) for k, v in obj.items() if k != 'template'}
+    if isinstance(obj, list):
+        return [as_numpy(v) for v in obj]
+    return obj
+
+def main():
+    rows = []
+    for name, fig in real_figures().items():
+        fig_json = as_numpy(fig.to_plotly_json())
+        legacy = json.dumps(fig_json, cls=plotly.utils.PlotlyJSONEncoder)
+        plain = serializer.dumps(fig_json)
+        typed = serializer.dumps(fig_json, typed_arrays=True)
+        t_legacy = timeit(lambda: json.dumps(fig_json, cls=plotly.utils.PlotlyJSONEncoder))
+        t_plain = timeit(lambda: serializer.dumps(fig_json))
+        t_typed = timeit(lambda: serializer.dumps(fig_json, typed_arrays=True))
+        rows.append([
+            name,
+            f"{t_legacy:.2f}", f"{t_plain:.2f}", f"{t_typed:.2f}",
+            f"{t_legacy / t_typed:.1f}x",
+            len(legacy), len(plain), len(typed),
+        ])
+    print_table(["chart", "encoder ms", "lists ms", "typed ms", "speedup", "encoder B", "lists B", "typed B"], rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run any benchmark from the project root, e.g. `python -m benchmarks.bench_charts`.
+Data is synthetic but shaped like the Supabase tables the app pulls.
+"""
+import time
+import numpy as np
+import pandas as pd
+
+RIDE_NAMES = [
+    "Hollywood Rip Ride Rockit", "Revenge of the Mummy", "Transformers",
+    "Harry Potter Diagon Alley", "Simpsons Ride", "Men in Black",
+    "E.T. Adventure", "Jurassic Park River", "Hulk Coaster", "Spider-Man",
+    "Popeye Barges", "Dudley Do-Right", "Kong Skull Island", "Hagrid's Motorbike",
+    "Jaws Lagoon", "Fast & Furious", "Minion Mayhem", "Shrek 4-D",
+    "Water World Show", "Dragon Challenge",
+]
+
+def make_waiting_times(n_rows=2000, n_rides=len(RIDE_NAMES), seed=42):
+    """
+    Synthetic `waiting_times` frame: one row per ride per 15-minute sample,
+    newest first, with `work_date` as ISO strings like the Supabase payload.
+    """
+    rng = np.random.default_rng(seed)
+    rides = np.array([RIDE_NAMES[i % len(RIDE_NAMES)] + ("" if i < len(RIDE_NAMES) else f" {i}") for i in range(n_rides)])
+    n_steps = int(np.ceil(n_rows / n_rides))
+    stamps = pd.date_range(end="2025-06-30 22:00", periods=n_steps, freq="15min")
+    work_date = np.repeat(stamps.values, n_rides)[:n_rows]
+    names = np.tile(rides, n_steps)[:n_rows]
+    hours = pd.DatetimeIndex(work_date).hour.values
+    base = 10 + 40 * np.exp(-((hours - 14) ** 2) / 18.0)
+    waits = np.maximum(0, base + rng.normal(0, 12, n_rows)).round()
+    waits[rng.random(n_rows) < 0.05] = 0
+    df = pd.DataFrame({
+        "entity_description_short": names,
+        "wait_time_max": waits.astype(int),
+        "work_date": pd.DatetimeIndex(work_date).strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    return df.iloc[::-1].reset_index(drop=True)
+
+def timeit(fn, repeat=5):
+    """Best-of-`repeat` wall time of `fn()` in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+def make_park(n_nodes=400, seed=7):
+    """
+    Synthetic park layout for routing benchmarks: a jittered square grid of
+    points joined by walkways to their right/down neighbours plus a few
+    diagonal shortcuts. Returns (nodes, edges) as ParkGraph takes them.
+    """
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n_nodes)))
+    names = ["Entrance"] + [f"Stop {i}" for i in range(1, n_nodes)]
+    xy = np.array([(i % side, i // side) for i in range(n_nodes)], dtype=float)
+    xy += rng.uniform(-0.3, 0.3, xy.shape)
+    nodes = {name: (round(x * 10, 1), round(y * 10, 1)) for name, (x, y) in zip(names, xy)}
+
+    def walk(a, b):
+        return max(1, int(round(np.hypot(*(xy[a] - xy[b])) * 3)))
+
+    edges = []
+    for i in range(n_nodes):
+        right, down, diag = i + 1, i + side, i + side + 1
+        if (i + 1) % side and right < n_nodes:
+            edges.append((names[i], names[right], walk(i, right)))
+        if down < n_nodes:
+            edges.append((names[i], names[down], walk(i, down)))
+        if (i + 1) % side and diag < n_nodes and rng.random() < 0.2:
+            edges.append((names[i], names[diag], walk(i, diag)))
+    return nodes, edges
+
+def as_topology(nodes, edges):
+    """make_park output in the data/park_topology.json layout."""
+    return {
+        "nodes": [{"name": name, "x": x, "y": y, "kind": "junction" if i % 4 else "ride"} for i, (name, (x, y)) in enumerate(nodes.items())],
+        "walkways": [{"from": u, "to": v, "minutes": w} for u, v, w in edges],
+    }
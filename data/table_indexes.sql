@@ -0,0 +1,18 @@
+-- Indexes behind the keyset-paginated table API (services/tables.py).
+-- Each sortable column is paired with the id tie-breaker, so "the next page
+-- after (value, id)" is a single index range scan in either direction.
+-- Run once in the Supabase SQL editor.
+
+create index if not exists waiting_times_work_date_id on waiting_times (work_date, id);
+create index if not exists waiting_times_ride_id on waiting_times (entity_description_short, id);
+create index if not exists waiting_times_wait_id on waiting_times (wait_time_max, id);
+-- Ride search (ilike '%...%')
+create extension if not exists pg_trgm;
+create index if not exists waiting_times_ride_trgm on waiting_times using gin (entity_description_short gin_trgm_ops);
+
+create index if not exists attendance_usage_date_id on attendance (usage_date, id);
+create index if not exists attendance_attendance_id on attendance (attendance, id);
+
+create index if not exists visitors_age_id on visitors (age, id);
+create index if not exists visitors_weight_id on visitors (weight_kg, id);
+create index if not exists visitors_accompanied_id on visitors (accompanied_with, id);
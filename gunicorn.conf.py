@@ -0,0 +1,16 @@
+"""
+gunicorn settings, read from the working directory by `gunicorn app:app`.
+
+Threaded workers: every open /rides page holds a Server-Sent Events stream
+(/api/rides/live) for as long as it is open, which would tie up a sync
+worker completely. Each worker serves up to `threads` requests at once and
+keeps at most live_feed.MAX_STREAMS of them for streams.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+# Streams stay open indefinitely; only a silent worker counts as hung
+timeout = 60
@@ -0,0 +1,631 @@
+"""
+Local columnar mirror of the Supabase history for /insights.
+
+waiting_times is kept as one NumPy .npz file per day (ts seconds, ride code,
+wait) and attendance as one file per year, under MIRROR_DIR; /insights
+pages its attendance table from there. Visitors are not mirrored: no
+insights view reads them. Ride names are dictionary-encoded in rides.json, which
+every worker shares: codes are only ever appended, under a file lock, and a
+worker rereads the file whenever it changes.
+
+Whenever a day's raw rows change, its rollup file is rewritten next to them:
+ride x hour count / sum / min / max, a sparse quantile sketch per ride and
+hour, the wait histogram and, where it at most halves the day's rows
+(readings finer than 5 minutes), the 5-minute tier (services.rollups).
+Other days serve 5-minute charts from their raw rows. Every query reads
+rollups only, so a query over a season merges a few hundred small arrays
+instead of scanning rows. compact() later drops raw days older than
+RAW_RETENTION_DAYS and 5-minute tiers older than FIVE_MIN_RETENTION_DAYS;
+their rollups keep serving every view. Files are written compressed.
+
+Sync pulls only rows newer than the mirror in pages and runs in a
+background thread, at most once per SYNC_INTERVAL per worker. A first
+backfill can also be run by hand:
+
+    python -m services.analytics
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows: a single dev server, no other workers to race
+    fcntl = None
+import numpy as np
+import pandas as pd
+
+from services import sketch
+from services import rollups
+from services.wait_cube import WaitCube, DAYS
+
+MIRROR_DIR = os.environ.get("ANALYTICS_DIR", "data/mirror")
+SYNC_INTERVAL = 5 * 60  # seconds between background syncs
+PAGE_SIZE = 1000  # rows per Supabase request
+MAX_SYNC_ROWS = 50000  # per sync; a long backfill continues on the next one
+HIST_STEP = 5  # minutes per wait histogram bin
+HIST_MAX = 300  # waits above this land in the last bin
+RAW_RETENTION_DAYS = 14
+FIVE_MIN_RETENTION_DAYS = 90
+FIVE_MIN_MAX_SHARE = 0.5  # 5-minute rows per raw row for the tier to be worth storing
+
+_lock = threading.RLock()
+_partials = {}  # path -> (file version, partial aggregates)
+_merged_cache = {}  # (start, end) -> (file versions, merged aggregates)
+_cube = None  # (file version, WaitCube)
+_rides = None  # (rides.json mtime, code -> name)
+_last_sync = 0.0
+_syncing = False
+
+def _path(*parts):
+    return os.path.join(MIRROR_DIR, *parts)
+
+def _save(path, **arrays):
+    # Write then rename, so readers never see half a partition
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+def _load(path, keys=None):
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in (keys or data.files)}
+
+def _has(path, key):
+    """Whether a partition holds `key` (reads the zip directory only)."""
+    with np.load(path, allow_pickle=False) as data:
+        return key in data.files
+
+def _rides_mtime():
+    try:
+        return os.stat(_path("rides.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _read_rides():
+    try:
+        with open(_path("rides.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def ride_names():
+    """Ride names by code, reread whenever another worker has added rides."""
+    global _rides
+    with _lock:
+        mtime = _rides_mtime()
+        if _rides is None or _rides[0] != mtime:
+            _rides = (mtime, _read_rides())
+        return _rides[1]
+
+@contextmanager
+def _rides_lock():
+    """Exclusive lock on the ride dictionary across worker processes."""
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    with open(_path("rides.lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _encode_rides(names):
+    """Codes for `names`, extending the dictionary with new rides."""
+    global _rides
+    rides = ride_names()
+    index = {name: i for i, name in enumerate(rides)}
+    if all(name in index for name in pd.unique(names)):
+        return np.array([index[name] for name in names], dtype=np.int32)
+    with _lock, _rides_lock():
+        # Another worker may have added rides since; append to what is on disk
+        rides = _read_rides()
+        index = {name: i for i, name in enumerate(rides)}
+        new = [name for name in pd.unique(names) if name not in index]
+        for name in new:
+            index[name] = len(rides)
+            rides.append(name)
+        if new:
+            tmp = _path(f"rides.json.{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(rides, f)
+            os.replace(tmp, _path("rides.json"))
+        _rides = (_rides_mtime(), rides)
+    return np.array([index[name] for name in names], dtype=np.int32)
+
+# ----------------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------------
+
+def _partitions(folder):
+    folder = _path(folder)
+    if not os.path.isdir(folder):
+        return []
+    names = sorted(f for f in os.listdir(folder) if f.startswith("date=") and f.endswith(".npz") and ".tmp" not in f)
+    return [(name[5:-4], os.path.join(folder, name)) for name in names]
+
+def wait_partitions():
+    """Sorted (date string, path) of the raw waiting_times partitions."""
+    return _partitions("waiting_times")
+
+def rollup_partitions():
+    """Sorted (date string, path) of the daily rollup files."""
+    return _partitions("rollups")
+
+def latest_timestamp():
+    """Newest mirrored work_date (seconds), or None for an empty mirror."""
+    parts = rollup_partitions()
+    if not parts:
+        return None
+    last = _load(parts[-1][1], ("last_ts",))["last_ts"]
+    return int(last) if last >= 0 else None
+
+def _valid_rows(data):
+    """(ts, ride, wait) of one day's raw rows that carry a wait."""
+    ride, wait, ts = data["ride"].astype(np.int64), data["wait"].astype(float), data["ts"]
+    ok = ~np.isnan(wait)
+    return ts[ok], ride[ok], wait[ok]
+
+def _day_rollup(data, n_rides):
+    """Everything the views need from one day's raw rows (see the module docstring)."""
+    last = int(data["ts"].max()) if len(data["ts"]) else -1
+    ts, ride, wait = _valid_rows(data)
+    hour = (ts // 3600) % 24
+    cells, counts = np.unique((ride * 24 + hour) * sketch.N_BUCKETS + sketch.bucket_index(wait), return_counts=True)
+    bins = np.minimum(wait // HIST_STEP, HIST_MAX // HIST_STEP).astype(np.int64)
+    roll = {
+        "last_ts": np.int64(last),
+        "hist": np.bincount(bins, minlength=HIST_MAX // HIST_STEP + 1),
+        # Sparse (ride x hour x bucket) quantile sketch: flat indices and counts
+        "sketch": np.stack([cells, counts]),
+        "cells": rollups.hour_cells(ride, hour, wait, n_rides),
+    }
+    five = rollups.five_minute(ts, ride, wait, n_rides)
+    if len(five["five_slot"]) <= FIVE_MIN_MAX_SHARE * len(ts):
+        roll.update(five)
+    return roll
+
+def _five_tier(day, path):
+    """
+    One day's 5-minute tier: stored in its rollup, else computed from its
+    raw rows; None once neither is left.
+    """
+    if _has(path, "five_slot"):
+        return _load(path, rollups.FIVE_KEYS)
+    raw = _path("waiting_times", f"date={day}.npz")
+    if not os.path.exists(raw):
+        return None
+    return rollups.five_minute(*_valid_rows(_load(raw)), len(ride_names()))
+
+def backfill_rollups():
+    """Writes the rollup of any raw day that lacks one (mirrors from before rollups)."""
+    with _lock:
+        have = {day for day, _ in rollup_partitions()}
+        n = len(ride_names())
+        for day, path in wait_partitions():
+            if day not in have:
+                _save(_path("rollups", f"date={day}.npz"), **_day_rollup(_load(path), n))
+
+def compact(today=None):
+    """
+    Drops raw days older than RAW_RETENTION_DAYS and 5-minute tiers older
+    than FIVE_MIN_RETENTION_DAYS (counted back from the newest mirrored
+    day), once their rollups exist, and 5-minute tiers no smaller than
+    FIVE_MIN_MAX_SHARE of their day (written before that rule). Returns
+    (raw days, 5-minute tiers) removed.
+    """
+    if today is None:
+        latest = latest_timestamp()
+        if latest is None:
+            return 0, 0
+        today = np.datetime64(latest, "s").astype("datetime64[D]")
+    raw_before = str(today - RAW_RETENTION_DAYS)
+    five_before = str(today - FIVE_MIN_RETENTION_DAYS)
+    raw_removed = five_removed = 0
+    with _lock:
+        rolled = {day: path for day, path in rollup_partitions()}
+        for day, path in wait_partitions():
+            if day < raw_before and day in rolled:
+                os.remove(path)
+                raw_removed += 1
+        for day, path in rolled.items():
+            if not _has(path, "five_slot"):
+                continue
+            data = _load(path)
+            if day < five_before or len(data["five_slot"]) > FIVE_MIN_MAX_SHARE * data["cells"][0].sum():
+                _save(path, **{k: v for k, v in data.items() if not k.startswith("five_")})
+                five_removed += 1
+    return raw_removed, five_removed
+
+def _seconds(dates):
+    """Wall-clock seconds of `dates` as written (offsets dropped, like .dt.hour sees them)."""
+    stamps = pd.to_datetime(pd.Series(dates))
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.to_numpy().astype("datetime64[s]").astype(np.int64)
+
+def append_waits(df):
+    """
+    Adds waiting_times rows (work_date, entity_description_short,
+    wait_time_max) to their day partitions, skipping rows already there.
+    Returns the number of rows written.
+    """
+    if df is None or df.empty:
+        return 0
+    ts = _seconds(df["work_date"])
+    wait = pd.to_numeric(df["wait_time_max"], errors="coerce").to_numpy(dtype=np.float32)
+    with _lock:
+        # Taken before the partitions change, so a missing cube is rebuilt without these rows
+        cube = get_cube() or WaitCube()
+        ride = _encode_rides(df["entity_description_short"].astype(str).to_numpy())
+        day = ts // 86400
+        written = 0
+        fresh = []
+        compacted = {day for day, _ in rollup_partitions()} - {day for day, _ in wait_partitions()}
+        for d in np.unique(day):
+            rows = day == d
+            name = f"date={np.datetime64(int(d), 'D')}.npz"
+            path = _path("waiting_times", name)
+            if name[5:-4] in compacted:
+                # Raw rows of this day are gone; late rows for it are not merged
+                continue
+            new = {"ts": ts[rows], "ride": ride[rows], "wait": wait[rows]}
+            if os.path.exists(path):
+                old = _load(path)
+                merged = {key: np.concatenate([old[key], new[key]]) for key in new}
+            else:
+                merged = new
+            # One row per (ride, timestamp), ordered by time; old rows come
+            # first, so a kept index past them is a row not seen before
+            key = merged["ts"] * 100000 + merged["ride"]
+            _, first = np.unique(key, return_index=True)
+            kept = {name: arr[first] for name, arr in merged.items()}
+            added = first[first >= len(merged["ts"]) - len(new["ts"])]
+            fresh.append({name: arr[added] for name, arr in merged.items()})
+            written += len(added)
+            _save(path, **kept)
+            _save(_path("rollups", name), **_day_rollup(kept, len(ride_names())))
+        if written:
+            cube.add(*(np.concatenate([f[name] for f in fresh]) for name in ("ts", "ride", "wait")))
+            _save_cube(cube)
+        return written
+
+def save_attendance(df):
+    """Replaces the attendance partitions (one per year) from (id, usage_date, attendance)."""
+    if df is None or df.empty:
+        return 0
+    days = pd.to_datetime(df["usage_date"]).to_numpy().astype("datetime64[D]")
+    visitors = pd.to_numeric(df["attendance"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    ids = pd.to_numeric(df["id"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    years = days.astype("datetime64[Y]")
+    with _lock:
+        for year in np.unique(years):
+            rows = years == year
+            order = np.argsort(days[rows], kind="stable")
+            _save(_path("attendance", f"year={year}.npz"), day=days[rows][order].astype(np.int64),
+                  attendance=visitors[rows][order], id=ids[rows][order])
+    return len(df)
+
+def sync(supabase, max_rows=MAX_SYNC_ROWS):
+    """
+    Pulls waiting_times rows newer than the mirror (oldest first, in pages),
+    plus the small attendance table. Returns rows mirrored.
+
+    Each page restarts at the last timestamp it saw (inclusive), so rides
+    sharing that timestamp across a page boundary are not lost; the rows
+    already mirrored are dropped by append_waits.
+    """
+    backfill_rollups()
+    since = latest_timestamp()
+    total = 0
+    try:
+        while total < max_rows:
+            query = supabase.table("waiting_times").select("work_date, entity_description_short, wait_time_max")
+            if since is not None:
+                query = query.gte("work_date", str(np.datetime64(since, "s")))
+            response = query.order("work_date").range(0, PAGE_SIZE - 1).execute()
+            page = pd.DataFrame(response.data)
+            if page.empty:
+                break
+            written = append_waits(page)
+            total += written
+            since = int(_seconds(page["work_date"]).max())
+            if len(page) < PAGE_SIZE or not written:
+                break
+
+        compact()
+
+        response = supabase.table("attendance").select("id, usage_date, attendance").execute()
+        save_attendance(pd.DataFrame(response.data))
+    except Exception as e:
+        print(f"Analytics Sync Error: {e}")
+    return total
+
+def maybe_sync(get_client):
+    """Starts a background sync if the last one is SYNC_INTERVAL old."""
+    global _last_sync, _syncing
+    with _lock:
+        if _syncing or time.monotonic() - _last_sync < SYNC_INTERVAL:
+            return
+        _syncing = True
+
+    def run():
+        global _last_sync, _syncing
+        try:
+            supabase = get_client()
+            if supabase:
+                sync(supabase)
+        finally:
+            with _lock:
+                _last_sync = time.monotonic()
+                _syncing = False
+
+    threading.Thread(target=run, daemon=True).start()
+
+# ----------------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------------
+
+def _version(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+PARTIAL_KEYS = ("hist", "sketch", "cells")
+
+def _partial(path, version):
+    """Per-day aggregates from a rollup file, re-read only when the file changes."""
+    with _lock:
+        hit = _partials.get(path)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+    data = _load(path, PARTIAL_KEYS)
+    cells = rollups.unpack_cells(data["cells"])
+    n = len(cells["cell_count"])
+    cell, bucket = np.divmod(data["sketch"][0], sketch.N_BUCKETS)
+    counts = data["sketch"][1]
+    partial = {
+        "rides": n,
+        "sum": cells["cell_sum"].sum(axis=1),
+        "count": cells["cell_count"].sum(axis=1),
+        "hist": data["hist"],
+        # Quantile sketches per ride and per hour of day
+        "ride_sketch": np.bincount((cell // 24) * sketch.N_BUCKETS + bucket, weights=counts,
+                                   minlength=n * sketch.N_BUCKETS).astype(np.int64).reshape(n, sketch.N_BUCKETS),
+        "hour_sketch": np.bincount((cell % 24) * sketch.N_BUCKETS + bucket, weights=counts,
+                                   minlength=24 * sketch.N_BUCKETS).astype(np.int64).reshape(24, sketch.N_BUCKETS),
+        # Hourly and daily tiers
+        **cells,
+    }
+    with _lock:
+        _partials[path] = (version, partial)
+    return partial
+
+def _merged(start=None, end=None):
+    """Partials of the days in [start, end] (YYYY-MM-DD), summed."""
+    parts = [p for day, p in rollup_partitions() if (start is None or day >= start) and (end is None or day <= end)]
+    if not parts:
+        return None
+    versions = [(path, _version(path)) for path in parts]
+    with _lock:
+        hit = _merged_cache.get((start, end))
+        if hit is not None and hit[0] == versions:
+            return hit[1]
+    partials = [_partial(path, version) for path, version in versions]
+    n = max(p["rides"] for p in partials)
+    total = {
+        "sum": np.zeros(n), "count": np.zeros(n, dtype=np.int64),
+        "hist": np.zeros(HIST_MAX // HIST_STEP + 1, dtype=np.int64),
+        "ride_sketch": np.zeros((n, sketch.N_BUCKETS), dtype=np.int64),
+        "hour_sketch": np.zeros((24, sketch.N_BUCKETS), dtype=np.int64),
+    }
+    for p in partials:
+        k = p["rides"]
+        total["sum"][:k] += p["sum"]
+        total["count"][:k] += p["count"]
+        total["hist"] += p["hist"]
+        total["ride_sketch"][:k] += p["ride_sketch"]
+        total["hour_sketch"] += p["hour_sketch"]
+    total["rides"] = ride_names()[:n]
+    total["days"] = len(parts)
+    with _lock:
+        _merged_cache[(start, end)] = (versions, total)
+    return total
+
+def top_rides(k=10, start=None, end=None):
+    """Rides with the highest mean wait: DataFrame(entity_description_short, wait_time_max), or None."""
+    m = _merged(start, end)
+    if m is None or not m["count"].any():
+        return None
+    seen = np.flatnonzero(m["count"])
+    mean = m["sum"][seen] / m["count"][seen]
+    best = seen[np.argsort(-mean, kind="stable")[:k]]
+    return pd.DataFrame({
+        "entity_description_short": [m["rides"][i] for i in best],
+        "wait_time_max": m["sum"][best] / m["count"][best],
+    })
+
+def wait_histogram(start=None, end=None):
+    """(bin lower edges, counts) of every mirrored wait, or None."""
+    m = _merged(start, end)
+    if m is None or not m["hist"].any():
+        return None
+    return np.arange(len(m["hist"])) * HIST_STEP, m["hist"]
+
+def wait_series(days=None, start=None, end=None, target=rollups.TARGET_POINTS):
+    """
+    Mean / min / max wait per ride over time from the rollups, at the finest
+    tier that keeps each ride within `target` points over the range (the
+    last `days` days, or [start, end] as YYYY-MM-DD). Returns (tier,
+    DataFrame as rollups.to_frame) or None for an empty range.
+    """
+    parts = rollup_partitions()
+    if not parts:
+        return None
+    end = end or parts[-1][0]
+    if days is not None:
+        start = str(np.datetime64(end) - (days - 1))
+    start = start or parts[0][0]
+    parts = [(day, path) for day, path in parts if start <= day <= end]
+    if not parts:
+        return None
+    span = ((np.datetime64(end) - np.datetime64(start)).astype(int) + 1) * 86400
+    versions = [(day, path, _version(path)) for day, path in parts]
+
+    # 5-minute tiers are dropped from old days by compact()
+    oldest_five = str(np.datetime64(parts[-1][0]) - (FIVE_MIN_RETENTION_DAYS - 1))
+    available = ("hour", "day") if start < oldest_five else ("5min", "hour", "day")
+    tier = rollups.pick_tier(span, available, target)
+    rolls = None
+    if tier == "5min":
+        rolls = [_five_tier(day, path) for day, path, _ in versions]
+        if any(roll is None for roll in rolls):
+            # A day with neither a stored tier nor raw rows left
+            tier = rollups.pick_tier(span, ("hour", "day"), target)
+    rows = []
+    for k, (day, path, version) in enumerate(versions):
+        number = int(np.datetime64(day).astype("datetime64[D]").astype(np.int64))
+        roll = rolls[k] if tier == "5min" else _partial(path, version)
+        rows.append(rollups.tier_rows(number, roll, tier))
+    if not rows:
+        return None
+    return tier, rollups.to_frame(rows, ride_names())
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+def _percentile_frame(counts, qs):
+    values = sketch.quantiles(counts, qs)
+    frame = pd.DataFrame(values, columns=[f"p{round(q * 100)}" for q in qs])
+    frame["samples"] = counts.sum(axis=1)
+    return frame
+
+def ride_percentiles(qs=PERCENTILES, start=None, end=None):
+    """
+    Wait percentiles per ride over the mirrored history, from the merged
+    quantile sketches: DataFrame(ride, p50, p90, p99, samples), or None.
+    """
+    m = _merged(start, end)
+    if m is None or not m["count"].any():
+        return None
+    seen = np.flatnonzero(m["count"])
+    frame = _percentile_frame(m["ride_sketch"][seen], qs)
+    frame.insert(0, "ride", [m["rides"][i] for i in seen])
+    return frame
+
+def hourly_percentiles(qs=PERCENTILES, start=None, end=None):
+    """Wait percentiles per hour of day over every ride: DataFrame(hour, p50, ...), or None."""
+    m = _merged(start, end)
+    if m is None or not m["hour_sketch"].any():
+        return None
+    hours = np.flatnonzero(m["hour_sketch"].sum(axis=1))
+    frame = _percentile_frame(m["hour_sketch"][hours], qs)
+    frame.insert(0, "hour", hours)
+    return frame
+
+def park_percentiles(qs=PERCENTILES, start=None, end=None):
+    """{'p50': ..., 'p90': ..., 'p99': ..., 'samples': n} over every wait, or None."""
+    m = _merged(start, end)
+    if m is None or not m["count"].any():
+        return None
+    return _percentile_frame(m["hour_sketch"].sum(axis=0, keepdims=True), qs).iloc[0].to_dict()
+
+# ----------------------------------------------------------------------------
+# Hour-of-week cube
+# ----------------------------------------------------------------------------
+
+def _save_cube(cube):
+    global _cube
+    path = _path("cube.npz")
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    cube.save(path)
+    _cube = (_version(path), cube)
+
+def rebuild_cube():
+    """Recomputes the cube from every day's rollup."""
+    with _lock:
+        cube = WaitCube(len(ride_names()))
+        for day, path in rollup_partitions():
+            data = _load(path, ("cells", "sketch"))
+            cells = rollups.unpack_cells(data["cells"])
+            number = int(np.datetime64(day).astype("datetime64[D]").astype(np.int64))
+            cube.add_cells(number, cells["cell_count"], cells["cell_sum"], cells["cell_max"], *data["sketch"])
+        _save_cube(cube)
+        return cube
+
+def get_cube():
+    """
+    The ride x weekday x hour cube of every mirrored wait, or None for an
+    empty mirror. Reloaded when another worker has rewritten it.
+    """
+    global _cube
+    path = _path("cube.npz")
+    with _lock:
+        if not os.path.exists(path):
+            return rebuild_cube() if rollup_partitions() else None
+        version = _version(path)
+        if _cube is None or _cube[0] != version:
+            _cube = (version, WaitCube.load(path))
+        return _cube[1]
+
+def ride_hour_profile():
+    """Mean wait per ride and hour of day: DataFrame(entity_description_short, hour, wait_time_max), or None."""
+    cube = get_cube()
+    if cube is None or not cube.count.any():
+        return None
+    mean, count = cube.mean(("ride", "hour"))
+    ride, hour = np.nonzero(count)
+    names = ride_names()
+    return pd.DataFrame({
+        "entity_description_short": [names[i] for i in ride],
+        "hour": hour,
+        "wait_time_max": mean[ride, hour],
+    })
+
+def day_hour_profile():
+    """Mean wait over all rides per weekday and hour: DataFrame(Day, Hour, Crowd Level), or None."""
+    cube = get_cube()
+    if cube is None or not cube.count.any():
+        return None
+    mean, count = cube.mean(("day", "hour"))
+    day, hour = np.nonzero(count)
+    return pd.DataFrame({"Day": [DAYS[d] for d in day], "Hour": hour, "Crowd Level": mean[day, hour]})
+
+def hour_profile():
+    """Mean wait over all rides and days per hour: DataFrame(hour, wait_time_max), or None."""
+    cube = get_cube()
+    if cube is None or not cube.count.any():
+        return None
+    mean, count = cube.mean(("hour",))
+    hour = np.flatnonzero(count)
+    return pd.DataFrame({"hour": hour, "wait_time_max": mean[hour]})
+
+def attendance_rows():
+    """
+    Every mirrored attendance row as {id, usage_date ('YYYY-MM-DD'),
+    attendance}, for services.tables.page_rows; None before the first sync
+    (or while the mirror predates row ids).
+    """
+    folder = _path("attendance")
+    if not os.path.isdir(folder):
+        return None
+    paths = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".npz") and ".tmp" not in f]
+    if not paths or not all(_has(path, "id") for path in paths):
+        return None
+    parts = [_load(path) for path in paths]
+    days = np.concatenate([p["day"] for p in parts]).astype("datetime64[D]").astype(str)
+    ids = np.concatenate([p["id"] for p in parts])
+    counts = np.concatenate([p["attendance"] for p in parts])
+    return [{"id": i, "usage_date": d, "attendance": a} for i, d, a in zip(ids.tolist(), days.tolist(), counts.tolist())]
+
+if __name__ == "__main__":
+    from services import data_loader
+    client = data_loader.get_supabase_client()
+    if not client:
+        print("Supabase is not configured")
+    else:
+        while True:
+            rows = sync(client)
+            print(f"Mirrored {rows} rows (up to {latest_timestamp()})")
+            if rows < MAX_SYNC_ROWS:
+                break
@@ -0,0 +1,231 @@
+"""
+Online anomaly detection over incoming waiting_times: ride breakdowns and
+queue spikes.
+
+Each ride keeps an EWMA of its wait and an EWMA of the absolute residual
+around it (a running mean absolute deviation), so a new reading costs O(1):
+its residual against the EWMA is scaled by the deviation into a robust
+z-score, and the state is updated with the residual clipped to CLIP_Z
+deviations, so one outlier cannot drag the baseline along with it.
+
+  * spike: z >= SPIKE_Z and at least SPIKE_MIN_JUMP minutes over the EWMA
+    (raised once; re-armed when the wait falls back under RESET_Z)
+  * down: a ride whose EWMA was at least DOWN_MIN_WAIT minutes, and at
+    least DOWN_Z deviations above 0, reads 0 DOWN_READINGS times in a row
+    (a lone 0 is usually a posting glitch)
+  * reopened: a ride reported down reads above 0 again
+
+Clipping starts once a ride has WARMUP readings, so the baseline settles
+quickly at first.
+
+A round where most rides drop to 0 together is the park closing, not a
+breakdown, and raises nothing. Frames are ingested one round at a time: the
+readings posted in one SAMPLE_INTERVAL slot (rounded to the nearest, so
+rides reporting a little early or late still share it), at most one per
+ride, so every update is vectorised across rides.
+"""
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+ALPHA = 0.2  # EWMA weight of a new reading
+WARMUP = 8  # readings a ride needs before it can raise alerts
+MIN_SCALE = 5.0  # floor on the deviation (waits are posted in 5-minute steps)
+SPIKE_Z = 4.0
+RESET_Z = 2.0
+SPIKE_MIN_JUMP = 15.0  # minutes
+CLIP_Z = 3.0
+DOWN_MIN_WAIT = 10.0  # minutes; rides usually this quiet close unnoticed
+DOWN_READINGS = 2
+DOWN_Z = 1.5
+CLOSING_SHARE = 0.5  # share of rides dropping to 0 in one round that means the park closed
+MAX_GAP = 6 * 3600  # seconds without a reading (overnight) after which the next raises nothing
+ALERT_LIMIT = 200
+SAMPLE_INTERVAL = 15 * 60  # seconds between waiting_times postings
+
+# Ride states
+OPEN, DOWN, CLOSED = 0, 1, 2  # CLOSED: at 0 without an alert (park closing, quiet ride)
+
+class AnomalyDetector:
+    def __init__(self, alpha=ALPHA, limit=ALERT_LIMIT):
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.names = []
+        self.index = {}
+        self._ingested = None
+        self._alerts = deque(maxlen=limit)
+        self._allocate(16)
+
+    def _allocate(self, rows):
+        """(Re)sizes every per-ride array to `rows` rows, keeping contents."""
+        def grow(name, fill, dtype=float):
+            new = np.full(rows, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+        grow('_last_t', 0, np.int64)
+        grow('_count', 0, np.int64)
+        grow('_mean', 0.0)
+        grow('_dev', 0.0)
+        grow('_state', OPEN, np.int8)
+        grow('_spiking', False, bool)
+        grow('_zeros', 0, np.int64)  # current run of readings at 0
+
+    def _row(self, name):
+        r = self.index.get(name)
+        if r is None:
+            r = len(self.names)
+            if r == len(self._count):
+                self._allocate(2 * r)
+            self.names.append(name)
+            self.index[name] = r
+        return r
+
+    def observe(self, rows, ts, waits):
+        """
+        Scores one round of readings: ride rows (distinct), their times
+        (seconds since the epoch) and waits. Readings not newer than the
+        ride's last one, or without a wait, are ignored. Returns the number
+        of readings used.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        ts = np.asarray(ts, dtype=np.int64)
+        y = np.asarray(waits, dtype=float)
+        keep = (ts > self._last_t[rows]) & ~np.isnan(y)
+        rows, ts, y = rows[keep], ts[keep], y[keep]
+        if not len(rows):
+            return 0
+
+        # A ride's first open reading seeds its baseline; the first reading
+        # after a long gap (overnight) keeps the baseline but raises nothing
+        fresh = self._count[rows] == 0
+        self._mean[rows[fresh]], self._dev[rows[fresh]] = y[fresh], 0.0
+        restart = fresh | (ts - self._last_t[rows] > MAX_GAP)
+        self._state[rows[restart]] = np.where(y[restart] > 0, OPEN, CLOSED)
+        self._spiking[rows[restart]] = False
+
+        mean, dev, state = self._mean[rows], self._dev[rows], self._state[rows]
+        scale = np.maximum(1.25 * dev, MIN_SCALE)  # mean abs deviation -> sigma
+        resid = y - mean
+        z = resid / scale
+        armed = ~restart & (self._count[rows] >= WARMUP)
+        zero = y <= 0
+
+        # Drops to 0: a breakdown, unless most of the park goes at once
+        zeros = np.where(zero, self._zeros[rows] + 1, 0)
+        drop = zero & (state == OPEN)
+        closing = drop.sum() > 1 and drop.sum() >= CLOSING_SHARE * max((state == OPEN).sum(), 1)
+        settled = drop & (closing | (zeros >= DOWN_READINGS))
+        down = settled & armed & (mean >= DOWN_MIN_WAIT) & (z <= -DOWN_Z) & ~closing
+        reopened = ~zero & (state == DOWN)
+        spiking = self._spiking[rows]
+        spike = ~zero & armed & ~spiking & (z >= SPIKE_Z) & (resid >= SPIKE_MIN_JUMP)
+
+        self._state[rows] = np.where(down, DOWN, np.where(settled, CLOSED, np.where(zero, state, OPEN)))
+        self._zeros[rows] = zeros
+        self._spiking[rows] = np.where(spiking, z >= RESET_Z, spike)
+
+        # Readings at 0 leave the baseline alone, so a reopened ride is
+        # judged against how it ran before
+        step = np.where(zero, 0.0, self.alpha)
+        clipped = np.where(armed, np.clip(resid, -CLIP_Z * scale, CLIP_Z * scale), resid)
+        self._mean[rows] = mean + step * clipped
+        self._dev[rows] = dev + step * (np.abs(clipped) - dev)
+        self._count[rows] += ~zero
+        self._last_t[rows] = ts
+
+        flagged = np.flatnonzero(down | reopened | spike)
+        for i in flagged[np.argsort(ts[flagged], kind='stable')].tolist():
+            kind = 'down' if down[i] else 'reopened' if reopened[i] else 'spike'
+            self._alerts.append({
+                'ride': self.names[rows[i]], 'kind': kind, 'ts': int(ts[i]),
+                'wait': round(float(y[i]), 1), 'expected': round(float(mean[i]), 1),
+                'score': round(float(z[i]), 1),
+            })
+        return len(rows)
+
+    def add(self, name, ts, wait):
+        """Scores a single reading; returns whether it was used."""
+        with self.lock:
+            return self.observe([self._row(name)], [ts], [wait]) > 0
+
+    def ingest_frame(self, df):
+        """
+        Scores the readings of a waiting_times frame that are newer than
+        what each ride has seen, oldest first. The same snapshot (row count,
+        first and last timestamps) is skipped outright.
+        """
+        if df is None or df.empty:
+            return 0
+        key = (len(df), str(df['work_date'].iloc[0]), str(df['work_date'].iloc[-1]))
+        with self.lock:
+            if key == self._ingested:
+                return 0
+        stamps = pd.to_datetime(pd.Series(df['work_date']))
+        if stamps.dt.tz is not None:
+            stamps = stamps.dt.tz_localize(None)
+        ts = stamps.to_numpy().astype('datetime64[s]').astype(np.int64)
+        waits = pd.to_numeric(df['wait_time_max'], errors='coerce').to_numpy(dtype=float)
+        names = df['entity_description_short'].to_numpy()
+        added = 0
+        with self.lock:
+            rows = np.array([self._row(name) for name in names], dtype=np.int64)
+            # One round per posting slot; a ride with several readings in a
+            # slot (finer sampling) has them spread over sub-rounds, in order
+            slot = (ts + SAMPLE_INTERVAL // 2) // SAMPLE_INTERVAL
+            by_ride = np.lexsort((ts, rows, slot))
+            first = np.r_[True, (slot[by_ride][1:] != slot[by_ride][:-1]) | (rows[by_ride][1:] != rows[by_ride][:-1])]
+            starts = np.flatnonzero(first)
+            rank = np.empty(len(rows), dtype=np.int64)
+            rank[by_ride] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+            order = np.lexsort((ts, rank, slot))
+            cut = np.flatnonzero((np.diff(slot[order]) != 0) | (np.diff(rank[order]) != 0)) + 1
+            for part in np.split(order, cut):
+                added += self.observe(rows[part], ts[part], waits[part])
+            self._ingested = key
+        return added
+
+    def alerts(self, limit=20, since=None):
+        """Newest alerts first; `since` (seconds since the epoch) keeps later ones only."""
+        with self.lock:
+            recent = list(self._alerts)
+        if since is not None:
+            recent = [a for a in recent if a['ts'] > since]
+        return recent[::-1][:limit]
+
+    def status(self):
+        """Rides currently down, and currently spiking, by name."""
+        with self.lock:
+            n = len(self.names)
+            down = np.flatnonzero(self._state[:n] == DOWN)
+            spiking = np.flatnonzero(self._spiking[:n])
+            return [self.names[r] for r in down], [self.names[r] for r in spiking]
+
+def describe(alert):
+    """One line for an alert, for the dashboard feed."""
+    if alert['kind'] == 'down':
+        return f"{alert['ride']} dropped to 0 min (usually ~{alert['expected']:.0f} min) - possible breakdown"
+    if alert['kind'] == 'reopened':
+        return f"{alert['ride']} is running again ({alert['wait']:.0f} min)"
+    return f"{alert['ride']} queue jumped to {alert['wait']:.0f} min (usually ~{alert['expected']:.0f} min)"
+
+def for_display(alerts):
+    """Alerts with their `text` and wall-clock `time` ('Jun 30 14:15') added."""
+    return [
+        dict(a, text=describe(a), time=pd.Timestamp(a['ts'], unit='s').strftime('%b %d %H:%M'))
+        for a in alerts
+    ]
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_detector():
+    """This worker's AnomalyDetector."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = AnomalyDetector()
+    return _detector
@@ -0,0 +1,77 @@
+"""
+Batch routing for guest-flow analysis: many (start, end) pairs routed at
+once under the current waits, with the resulting load on every walkway.
+
+Pairs are grouped by start so each distinct start costs one single-source
+search (or one table row when the all-pairs table is current), however many
+destinations it has.
+"""
+import time
+import numpy as np
+
+# Sources solved per scipy call; bounds the (sources x nodes) matrices held
+SOURCE_CHUNK = 256
+
+def route_batch(park, pairs, include_paths=True, congestion=None):
+    """
+    Routes every (start, end) or (start, end, count) in `pairs`. `count` is
+    how many visitors take that trip (default 1) and weights the edge loads.
+
+    Returns {"routes": [...], "edge_loads": [...], "sources": n,
+    "elapsed_ms": ms}. Routes keep the input order; a pair with an unknown
+    node or no path gets an "error" instead of a path. When `congestion`
+    (a CongestionModel) is given, the loads are recorded into it as well.
+    """
+    started = time.perf_counter()
+    routes = [None] * len(pairs)
+    by_source = {}
+    for k, pair in enumerate(pairs):
+        start, end = pair[0], pair[1]
+        count = pair[2] if len(pair) > 2 else 1
+        unknown = [node for node in (start, end) if node not in park.index]
+        if unknown:
+            routes[k] = {'start': start, 'end': end, 'error': f"Node {unknown[0]} not found in graph"}
+            continue
+        by_source.setdefault(park.index[start], []).append((k, park.index[end], count))
+
+    hops_from, hops_to, hop_counts = [], [], []
+    sources = list(by_source)
+    for chunk_start in range(0, len(sources), SOURCE_CHUNK):
+        chunk = sources[chunk_start:chunk_start + SOURCE_CHUNK]
+        dist, pred = park.shortest_trees(chunk)
+        for row, src in enumerate(chunk):
+            pred_row = pred[row].tolist()
+            for k, dst, count in by_source[src]:
+                start, end = park.names[src], park.names[dst]
+                if not np.isfinite(dist[row, dst]):
+                    routes[k] = {'start': start, 'end': end, 'error': f"No path between {start} and {end}."}
+                    continue
+                path = [dst]
+                while path[-1] != src:
+                    path.append(pred_row[path[-1]])
+                path.reverse()
+                hops_from.extend(path[:-1])
+                hops_to.extend(path[1:])
+                hop_counts.extend([count] * (len(path) - 1))
+                route = {'start': start, 'end': end, 'total_time': float(dist[row, dst])}
+                if include_paths:
+                    route['path'] = [park.names[i] for i in path]
+                routes[k] = route
+
+    edge_loads = []
+    if hops_from:
+        edge_ids = park.edge_index(hops_from, hops_to)
+        loads = np.bincount(edge_ids, weights=np.asarray(hop_counts, dtype=float), minlength=len(park.edges))
+        if congestion is not None:
+            congestion.record(np.flatnonzero(loads), loads[loads > 0])
+        for e in np.flatnonzero(loads)[np.argsort(-loads[loads > 0], kind='stable')]:
+            u, v, walk = park.edges[e]
+            count = float(loads[e])
+            edge_loads.append({'from': u, 'to': v, 'count': int(count) if count.is_integer() else count})
+
+    return {
+        'routes': routes,
+        'edge_loads': edge_loads,
+        'sources': len(sources),
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+    }
@@ -0,0 +1,113 @@
+"""
+"Best time to ride": each attraction's lowest-wait hour windows per weekday.
+
+Windows are scored from the hour-of-week cube (services.wait_cube) in one
+vectorized pass over every ride and weekday: cumulative sums along the hour
+axis give the mean wait of every WINDOW_HOURS-long window at once. Only
+open readings count (a posted 0 means the ride is closed, not that it has
+no queue), windows touching an hour with fewer than MIN_SAMPLES of them
+are ruled out, and the TOP_WINDOWS lowest non-overlapping ones are kept.
+Results are cached until the cube changes.
+"""
+import threading
+import numpy as np
+
+from services.wait_cube import DAYS
+
+WINDOW_HOURS = 2
+TOP_WINDOWS = 3
+MIN_SAMPLES = 3  # open readings an hour needs (per ride and weekday) to be scored
+
+_cache = None  # (cube key, windows)
+_lock = threading.Lock()
+
+def score_windows(cube, hours=WINDOW_HOURS, top=TOP_WINDOWS, min_samples=MIN_SAMPLES):
+    """
+    (start, wait, day_mean) arrays for every ride and weekday:
+    start[r, d, k] is the first hour of the k-th best window (-1 if none),
+    wait[r, d, k] its mean wait, day_mean[r, d] the ride's mean that day,
+    all over open readings only.
+    """
+    # Closed readings are 0 and add nothing to the sum
+    count, total = cube.open_count(), cube.sum
+    n = len(count)
+    if n == 0 or hours > 24:
+        return np.full((n, 7, top), -1), np.full((n, 7, top), np.nan), np.full((n, 7), np.nan)
+
+    # Window sums for every start hour from prefix sums along the hour axis
+    pad = [(0, 0), (0, 0), (1, 0)]
+    c_sum = np.pad(np.cumsum(count, axis=2), pad)
+    w_sum = np.pad(np.cumsum(total, axis=2), pad)
+    scored = np.pad(np.cumsum(count >= min_samples, axis=2), pad)
+    win_count = c_sum[:, :, hours:] - c_sum[:, :, :-hours]
+    win_total = w_sum[:, :, hours:] - w_sum[:, :, :-hours]
+    valid = (scored[:, :, hours:] - scored[:, :, :-hours]) == hours
+    mean = np.full(win_count.shape, np.inf)
+    np.divide(win_total, win_count, out=mean, where=valid & (win_count > 0))
+
+    # Greedy picks, each ruling out the windows overlapping it
+    starts = np.arange(mean.shape[2])
+    start = np.full((n, 7, top), -1)
+    wait = np.full((n, 7, top), np.nan)
+    for k in range(top):
+        best = mean.argmin(axis=2)
+        best_wait = np.take_along_axis(mean, best[..., None], axis=2)[..., 0]
+        found = np.isfinite(best_wait)
+        start[..., k] = np.where(found, best, -1)
+        wait[..., k] = np.where(found, best_wait, np.nan)
+        overlap = np.abs(starts[None, None, :] - best[..., None]) < hours
+        mean[overlap & found[..., None]] = np.inf
+
+    day_count = count.sum(axis=2)
+    day_mean = np.full(day_count.shape, np.nan)
+    np.divide(total.sum(axis=2), day_count, out=day_mean, where=day_count > 0)
+    return start, wait, day_mean
+
+def best_windows(cube, names, hours=WINDOW_HOURS):
+    """
+    {ride: {'Mon': [{'start', 'end', 'wait', 'saving'}, ...], ...}} for every
+    ride with scored windows, best first. `saving` is minutes below the
+    ride's average for that day. Cached until the cube changes.
+    """
+    global _cache
+    key = (id(cube), int(cube.count.sum()), len(names), hours)
+    with _lock:
+        if _cache is not None and _cache[0] == key:
+            return _cache[1]
+
+    start, wait, day_mean = score_windows(cube, hours)
+    windows = {}
+    for r, d, k in zip(*np.nonzero(start >= 0)):
+        ride = windows.setdefault(names[r], {})
+        ride.setdefault(DAYS[d], []).append({
+            'start': f"{start[r, d, k]:02d}:00",
+            'end': f"{(start[r, d, k] + hours) % 24:02d}:00",
+            'wait': round(float(wait[r, d, k]), 1),
+            'saving': round(float(day_mean[r, d] - wait[r, d, k]), 1),
+        })
+    with _lock:
+        _cache = (key, windows)
+    return windows
+
+def lookup(windows, name):
+    """
+    Windows of the ride called `name`: exact (case-insensitive) match first,
+    else the first ride containing its first word, like the map matches
+    facility names to rides. None if nothing matches.
+    """
+    by_name = {ride.lower(): ride for ride in windows}
+    key = str(name).lower()
+    if key not in by_name:
+        word = key.split()[0] if key.split() else key
+        key = next((ride for ride in by_name if word in ride), None)
+    return windows[by_name[key]] if key is not None else None
+
+def for_day(windows, day):
+    """[(ride, best window)] for weekday `day` ('Mon'...), lowest wait first."""
+    rows = [(ride, days[day][0]) for ride, days in windows.items() if days.get(day)]
+    return sorted(rows, key=lambda row: row[1]['wait'])
+
+def describe(name, day_windows):
+    """One sentence on a ride's best windows for a day, for the assistant."""
+    spans = [f"{w['start']}-{w['end']} (~{w['wait']:.0f} min)" for w in day_windows]
+    return f"The best times to ride {name} today are " + ", ".join(spans) + "."
@@ -0,0 +1,96 @@
+"""
+Walkway congestion: per-edge guest flow estimated from recently routed trips
+plus an attendance-based background, turned into extra walking minutes with
+the BPR volume-delay curve (walk * (1 + a * (flow / capacity) ** b)) and
+pushed into the park graph's edge weights.
+
+Recorded trips decay exponentially, so the flow estimate is a running rate
+that needs no history to be kept; recording is O(path length) and refreshing
+the delays is one vectorised pass over the edges.
+"""
+import math
+import time
+import threading
+import numpy as np
+
+from services import park_graph
+
+DEFAULT_CAPACITY = 1500  # guests per hour a walkway carries before slowing down
+BPR_ALPHA = 0.15
+BPR_BETA = 4
+MAX_DELAY_RATIO = 3  # a jammed walkway is slow, not closed: delay <= 3x walk
+MEMORY_MINUTES = 30  # time constant of the decay on recorded trips
+# Only a share of guests use the app, so one routed party stands for several
+GUESTS_PER_ROUTE = 10
+# Uniform prior from daily attendance: guests spread over the opening hours,
+# each walking a few walkways an hour
+OPEN_HOURS = 12
+WALKWAYS_PER_GUEST_HOUR = 4
+# Delays are rounded to this many minutes so small drifts in flow do not
+# invalidate the route table
+DELAY_STEP = 0.5
+
+class CongestionModel:
+    """Running per-edge flow estimate for one ParkGraph."""
+
+    def __init__(self, park):
+        self.park = park
+        self.capacity = np.array([c or DEFAULT_CAPACITY for c in park.capacities], dtype=float)
+        self.walk = np.array([w for u, v, w in park.edges], dtype=float)
+        self.background = np.zeros(len(park.edges))
+        self._recent = np.zeros(len(park.edges))  # decayed guest count
+        self._stamp = time.time()
+        self._attendance = None
+        self.lock = threading.Lock()
+
+    def _decay(self, now):
+        if now > self._stamp:
+            self._recent *= math.exp(-(now - self._stamp) / (MEMORY_MINUTES * 60))
+            self._stamp = now
+
+    def record(self, edge_ids, guests=GUESTS_PER_ROUTE, now=None):
+        """Adds `guests` (a number or one per edge) to the given edges."""
+        with self.lock:
+            self._decay(now or time.time())
+            np.add.at(self._recent, np.asarray(edge_ids, dtype=np.int64), guests)
+
+    def record_path(self, path, guests=GUESTS_PER_ROUTE, now=None):
+        if len(path) > 1:
+            self.record(self.park.path_edges(path), guests, now)
+
+    def set_attendance(self, attendance):
+        """Background flow from the day's attendance, shared by capacity."""
+        with self.lock:
+            if attendance == self._attendance:
+                return
+            self._attendance = attendance
+            per_hour = (attendance or 0) / OPEN_HOURS * WALKWAYS_PER_GUEST_HOUR
+            self.background = per_hour * self.capacity / self.capacity.sum()
+
+    def flow(self, now=None):
+        """Estimated guests per hour on every edge."""
+        with self.lock:
+            self._decay(now or time.time())
+            return self.background + self._recent * (60 / MEMORY_MINUTES)
+
+    def delays(self, now=None):
+        """Extra walking minutes per edge at the current flow."""
+        ratio = self.flow(now) / self.capacity
+        delay = self.walk * np.minimum(BPR_ALPHA * ratio ** BPR_BETA, MAX_DELAY_RATIO)
+        return np.round(delay / DELAY_STEP) * DELAY_STEP
+
+    def apply(self, now=None):
+        """Pushes the current delays into the park graph; returns changed edges."""
+        return self.park.update_delays(self.delays(now))
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_congestion_model():
+    """This worker's CongestionModel for the shared park graph."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = CongestionModel(park_graph.get_park_graph())
+    return _model
@@ -5,8 +5,12 @@ import os
 from dotenv import load_dotenv
 import joblib
 import tensorflow as tf
+import threading
+import time
 from datetime import datetime
 
+from services import analytics
+
 # Load environment variables
 load_dotenv()
 
@@ -47,6 +51,25 @@ def get_supabase_client():
         return None
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Per-worker cache of recent pulls: a page shell and the chart requests it
+# fires in parallel share a single Supabase query.
+CACHE_TTL = 60
+_cache = {}
+_cache_lock = threading.Lock()
+
+def cached(key, loader, ttl=CACHE_TTL):
+    """
+    Returns loader()'s result, reusing it for `ttl` seconds. Concurrent
+    callers for the same key wait for the first one instead of re-querying.
+    """
+    with _cache_lock:
+        entry = _cache.setdefault(key, {'lock': threading.Lock(), 'time': None, 'value': None})
+    with entry['lock']:
+        if entry['time'] is None or time.monotonic() - entry['time'] > ttl:
+            entry['value'] = loader()
+            entry['time'] = time.monotonic()
+        return entry['value']
+
 def get_dashboard_metrics():
     """
     Fetches and calculates dashboard metrics.
@@ -96,6 +119,26 @@ def get_dashboard_metrics():
 
     return total_visitors, system_health, avg_wait, capacity_pct, target_date
 
+def get_latest_attendance():
+    """
+    Total attendance on the most recent day in the attendance table.
+    """
+    supabase = get_supabase_client()
+    if not supabase:
+        return 0
+    
+    try:
+        latest_date_query = supabase.table("attendance").select("usage_date").order("usage_date", desc=True).limit(1).execute()
+        if not latest_date_query.data:
+            return 0
+        target_date = latest_date_query.data[0]['usage_date']
+        visitors_query = supabase.table("attendance").select("attendance").eq("usage_date", target_date).execute()
+        visitors_df = pd.DataFrame(visitors_query.data)
+        return int(visitors_df['attendance'].sum()) if not visitors_df.empty else 0
+    except Exception as e:
+        print(f"Error fetching attendance: {e}")
+        return 0
+
 def get_chart_data():
     """
     Fetches detailed data for dashboard charts.
@@ -190,6 +233,22 @@ def get_rides_data():
             
     return df
 
+def get_facilities():
+    """
+    Fetches the facilities table with whatever capacity columns it carries.
+    """
+    supabase = get_supabase_client()
+    df = pd.DataFrame()
+    
+    if supabase:
+        try:
+            response = supabase.table("facilities").select("*").execute()
+            df = pd.DataFrame(response.data)
+        except Exception as e:
+            print(f"Supabase Error (Facilities): {e}")
+            
+    return df
+
 def get_insights_data():
     """
     Fetches data for insights page (waiting times and visitors).
@@ -244,6 +303,34 @@ def get_map_data(nodes):
         
     return wait_times
 
+def get_wait_profile(nodes):
+    """
+    Hourly wait profile for map nodes: {node: [24 mean waits, index = hour]}
+    from waiting_times history, matched like get_map_data. Nodes with no
+    history are left out.
+    """
+    supabase = get_supabase_client()
+    profile = {}
+    
+    if supabase:
+        try:
+            response = supabase.table("waiting_times").select("entity_description_short, wait_time_max, work_date").order("work_date", desc=True).limit(5000).execute()
+            df = pd.DataFrame(response.data)
+            
+            if not df.empty:
+                df['hour'] = pd.to_datetime(df['work_date']).dt.hour
+                for node in nodes:
+                    match = df[df['entity_description_short'].str.contains(node.split()[0], case=False, na=False)]
+                    if match.empty:
+                        continue
+                    hourly = match.groupby('hour')['wait_time_max'].mean()
+                    # Hours without samples are interpolated, wrapping around midnight
+                    profile[node] = np.interp(np.arange(24), hourly.index, hourly.values, period=24).tolist()
+        except Exception as e:
+            print(f"Supabase Error (Wait Profile): {e}")
+    
+    return profile
+
 def get_health_data():
     """
     Fetches data for health page (Crowd, Rec, Sentiment).
@@ -339,8 +426,15 @@ def get_forecast_dashboard_data():
         })
         today_forecast = int(forecast_df.iloc[0]['yhat'])
 
-    # 2. Heatmap Data (Real Aggregation from Supabase)
-    if supabase:
+    # 2. Heatmap Data: the weekday x hour slice of the analytics cube over all
+    # history, or a real aggregation of recent rows until the mirror has synced
+    profile = analytics.day_hour_profile()
+    if profile is not None:
+        heatmap_df = profile
+        hourly_avg = analytics.hour_profile().set_index('hour')['wait_time_max']
+        peak_time = f"{int(hourly_avg.idxmax()):02d}:00"
+        optimal_time = f"{int(hourly_avg.idxmin()):02d}:00"
+    elif supabase:
         try:
             # Fetch historical wait times to simulate density
             response = supabase.table("waiting_times").select("work_date, wait_time_max").limit(1000).execute()
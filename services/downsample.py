@@ -0,0 +1,69 @@
+import numpy as np
+
+def _bucket_view(starts, ends, n):
+    """
+    Pads variable-width buckets [starts[i], ends[i]) into a 2D index array so
+    every bucket can be reduced with one numpy call. Returns (idx, valid).
+    """
+    width = int((ends - starts).max())
+    idx = starts[:, None] + np.arange(width)[None, :]
+    valid = idx < ends[:, None]
+    return np.minimum(idx, n - 1), valid
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets. Returns the indices (sorted) of the
+    `n_out` points that best preserve the visual shape of the series.
+    `x` must be sorted ascending; first and last points are always kept.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    idx, valid = _bucket_view(starts, ends, n)
+
+    # Average of each bucket; the "next" point for bucket b is bucket b+1's average
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = ends - starts
+    next_x = np.append(((cx[ends] - cx[starts]) / counts)[1:], x[-1])
+    next_y = np.append(((cy[ends] - cy[starts]) / counts)[1:], y[-1])
+
+    bx, by = x[idx], y[idx]
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    # Each pick depends on the previous one, so only the bucket loop stays in Python
+    for b in range(len(starts)):
+        area = np.abs((x[a] - next_x[b]) * (by[b] - y[a]) - (x[a] - bx[b]) * (next_y[b] - y[a]))
+        area[~valid[b]] = -1.0
+        a = idx[b, area.argmax()]
+        out[b + 1] = a
+    return out
+
+def minmax(x, y, n_out):
+    """
+    Min/max bucketing: splits the series into n_out // 2 buckets and keeps
+    the lowest and highest point of each, so every peak and trough survives.
+    Fully vectorized. Returns sorted, unique indices.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    idx, valid = _bucket_view(edges[:-1], edges[1:], n)
+    vals = y[idx]
+    rows = np.arange(len(idx))
+    lo = idx[rows, np.where(valid, vals, np.inf).argmin(axis=1)]
+    hi = idx[rows, np.where(valid, vals, -np.inf).argmax(axis=1)]
+    return np.unique(np.concatenate(([0, n - 1], lo, hi)))
+
+METHODS = {'lttb': lttb, 'minmax': minmax}
@@ -0,0 +1,156 @@
+"""
+Thin figure builders for the hot charts.
+
+Each function returns a plain {data, layout} dict built straight from numpy
+arrays, matching what plotly.express emits for the same call (minus the
+layout template, which plots.to_spec strips anyway) without constructing and
+validating a full graph_objects.Figure.
+"""
+import numpy as np
+import plotly.colors
+
+def _values(values):
+    if hasattr(values, 'to_numpy'):
+        return values.to_numpy()
+    return np.asarray(values)
+
+def colorscale(scale):
+    """'Viridis' or a list of colors -> plotly's [[position, color], ...] form."""
+    if isinstance(scale, str):
+        scale = getattr(plotly.colors.sequential, scale)
+    n = len(scale)
+    return [[i / (n - 1), color] for i, color in enumerate(scale)]
+
+def _axis(anchor, title):
+    return {'anchor': anchor, 'domain': [0.0, 1.0], 'title': {'text': title}}
+
+def _layout(x_title, y_title, title=None, **extra):
+    layout = {
+        'xaxis': _axis('y', x_title),
+        'yaxis': _axis('x', y_title),
+        'legend': {'tracegroupgap': 0},
+    }
+    if title:
+        layout['title'] = {'text': title}
+    layout.update(extra)
+    return layout
+
+def _coloraxis(title, scale):
+    # px only pins autocolorscale when the scale was picked explicitly
+    axis = {'colorbar': {'title': {'text': title}}, 'colorscale': colorscale(scale or 'Plasma')}
+    if scale:
+        axis['autocolorscale'] = False
+    return axis
+
+def bar(x, y, color=None, x_label='x', y_label='y', color_label=None, title=None, scale=None):
+    """
+    px.bar(x=..., y=..., color=<numeric>) equivalent. Pass `color` as the
+    same array as `y` when the bars are shaded by their own value.
+    """
+    x, y = _values(x), _values(y)
+    color = _values(color) if color is not None else y
+    color_label = color_label or y_label
+    same = color is y or np.array_equal(color, y)
+    hover = [f"{x_label}=%{{x}}"]
+    if not same:
+        hover.append(f"{y_label}=%{{y}}")
+    hover.append(f"{color_label}=%{{marker.color}}")
+    trace = {
+        'hovertemplate': '<br>'.join(hover) + '<extra></extra>',
+        'legendgroup': '',
+        'marker': {'color': color, 'coloraxis': 'coloraxis', 'pattern': {'shape': ''}},
+        'name': '',
+        'orientation': 'v',
+        'showlegend': False,
+        'textposition': 'auto',
+        'x': x,
+        'xaxis': 'x',
+        'y': y,
+        'yaxis': 'y',
+        'type': 'bar',
+    }
+    layout = _layout(x_label, y_label, title, coloraxis=_coloraxis(color_label, scale), barmode='relative')
+    return {'data': [trace], 'layout': layout}
+
+def pie(labels, values, hole=0.5, title=None):
+    """px.pie(values=..., names=...) equivalent."""
+    trace = {
+        'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+        'hole': hole,
+        'hovertemplate': 'label=%{label}<br>value=%{value}<extra></extra>',
+        'labels': _values(labels),
+        'legendgroup': '',
+        'name': '',
+        'showlegend': True,
+        'values': _values(values),
+        'type': 'pie',
+    }
+    layout = {'legend': {'tracegroupgap': 0}}
+    if title:
+        layout['title'] = {'text': title}
+    return {'data': [trace], 'layout': layout}
+
+def histogram(x, nbins=None, color='#636efa', x_label='x', title=None, weights=None):
+    """
+    px.histogram(x=..., nbins=...) equivalent; binning stays client-side.
+    `weights` counts each x that many times (pre-binned data).
+    """
+    trace = {
+        'bingroup': 'x',
+        'hovertemplate': f"{x_label}=%{{x}}<br>count=%{{y}}<extra></extra>",
+        'legendgroup': '',
+        'marker': {'color': color, 'pattern': {'shape': ''}},
+        'name': '',
+        'orientation': 'v',
+        'showlegend': False,
+        'x': _values(x),
+        'xaxis': 'x',
+        'yaxis': 'y',
+        'type': 'histogram',
+    }
+    if nbins:
+        trace['nbinsx'] = nbins
+    if weights is not None:
+        trace['y'] = _values(weights)
+        trace['histfunc'] = 'sum'
+    return {'data': [trace], 'layout': _layout(x_label, 'count', title, barmode='relative')}
+
+def area(x, y, color='#636efa', x_label='x', y_label='y', title=None):
+    """px.area(x=..., y=...) equivalent for a single series."""
+    trace = {
+        'fillpattern': {'shape': ''},
+        'hovertemplate': f"{x_label}=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+        'legendgroup': '',
+        'line': {'color': color},
+        'marker': {'symbol': 'circle'},
+        'mode': 'lines',
+        'name': '',
+        'orientation': 'v',
+        'showlegend': False,
+        'stackgroup': '1',
+        'x': _values(x),
+        'xaxis': 'x',
+        'y': _values(y),
+        'yaxis': 'y',
+        'type': 'scatter',
+    }
+    return {'data': [trace], 'layout': _layout(x_label, y_label, title)}
+
+def density_heatmap(x, y, z, x_label='x', y_label='y', z_label='z', title=None, scale=None):
+    """px.density_heatmap(x=..., y=..., z=...) equivalent (histfunc 'sum')."""
+    trace = {
+        'coloraxis': 'coloraxis',
+        'histfunc': 'sum',
+        'hovertemplate': f"{x_label}=%{{x}}<br>{y_label}=%{{y}}<br>sum of {z_label}=%{{z}}<extra></extra>",
+        'name': '',
+        'x': _values(x),
+        'xaxis': 'x',
+        'xbingroup': 'x',
+        'y': _values(y),
+        'yaxis': 'y',
+        'ybingroup': 'y',
+        'z': _values(z),
+        'type': 'histogram2d',
+    }
+    layout = _layout(x_label, y_label, title, coloraxis=_coloraxis(f"sum of {z_label}", scale))
+    return {'data': [trace], 'layout': layout}
@@ -0,0 +1,155 @@
+import time
+import numpy as np
+import networkx as nx
+
+# Up to this many stops the order is solved exactly (Held-Karp, 2^n states);
+# larger sets use nearest neighbour + 2-opt within the time budget.
+EXACT_MAX_STOPS = 10
+DEFAULT_TIME_BUDGET = 0.25  # seconds per request
+
+def _leg_costs(park, nodes):
+    """
+    cost[a, b] = the fastest route from nodes[a] to nodes[b] under the
+    park's route weights (walk, congestion delay and the wait at every node
+    entered, see ParkGraph), so each leg costs what route() would charge.
+    Also returns travel = cost less the wait at the leg's end, which is the
+    same in both directions, the waits, and the predecessor rows for
+    drawing each leg.
+    """
+    ids = np.array([park.index[n] for n in nodes])
+    dist, pred = park.shortest_trees(ids)
+    cost = dist[:, ids]
+    if not np.isfinite(cost).all():
+        raise nx.NetworkXNoPath("Some stops are not reachable from each other.")
+    waits = park.wait_array()[ids]
+    travel = cost - waits[None, :]
+    np.fill_diagonal(cost, 0)
+    np.fill_diagonal(travel, 0)
+    return cost, travel, waits, pred
+
+def _route_cost(cost, order, return_to_start):
+    route = [0] + list(order) + ([0] if return_to_start else [])
+    return float(cost[route[:-1], route[1:]].sum())
+
+def _held_karp(cost, return_to_start, deadline):
+    """
+    Exact order over stops 1..m starting from 0. Returns the stop order, or
+    None if the deadline passes first.
+    """
+    m = len(cost) - 1
+    full = (1 << m) - 1
+    C = cost[1:, 1:]
+    bits = 1 << np.arange(m)
+    dp = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int64)
+    dp[bits, np.arange(m)] = cost[0, 1:]
+
+    for mask in range(1, full):
+        if time.perf_counter() > deadline:
+            return None
+        row = dp[mask]
+        if not np.isfinite(row).any():
+            continue
+        # Best predecessor j (inside mask) for every next stop k
+        cand = row[:, None] + C
+        best_j = cand.argmin(axis=0)
+        best = cand[best_j, np.arange(m)]
+        ks = np.flatnonzero((mask & bits) == 0)
+        targets = mask | bits[ks]
+        better = best[ks] < dp[targets, ks]
+        dp[targets[better], ks[better]] = best[ks][better]
+        parent[targets[better], ks[better]] = best_j[ks][better]
+
+    final = dp[full] + (cost[1:, 0] if return_to_start else 0)
+    last = int(final.argmin())
+    order, mask = [], full
+    while last >= 0:
+        order.append(last + 1)
+        prev = parent[mask, last]
+        mask ^= 1 << last
+        last = prev
+    return order[::-1]
+
+def _nearest_neighbour(cost):
+    todo = set(range(1, len(cost)))
+    order, here = [], 0
+    while todo:
+        here = min(todo, key=lambda k: cost[here, k])
+        order.append(here)
+        todo.remove(here)
+    return order
+
+def _two_opt(walk, order, return_to_start, deadline):
+    """
+    2-opt on the open (or closed) route. Waits at the stops depend only on
+    which stops are visited, so reversing a segment changes `walk` (travel
+    between stops, the same both ways) alone.
+    """
+    route = np.array([0] + order + ([0] if return_to_start else []))
+    n = len(route)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            # Reverse route[i..k] for every k > i at once
+            k = np.arange(i + 1, n if not return_to_start else n - 1)
+            if len(k) == 0:
+                continue
+            a, b, c = route[i - 1], route[i], route[k]
+            after = np.where(k + 1 < n, route[np.minimum(k + 1, n - 1)], -1)
+            has_next = after >= 0
+            old = walk[a, b] + np.where(has_next, walk[c, np.maximum(after, 0)], 0)
+            new = walk[a, c] + np.where(has_next, walk[b, np.maximum(after, 0)], 0)
+            delta = new - old
+            best = int(delta.argmin())
+            if delta[best] < -1e-9:
+                route[i:k[best] + 1] = route[i:k[best] + 1][::-1]
+                improved = True
+    return [int(x) for x in route[1:(n - 1 if return_to_start else n)]]
+
+def plan_itinerary(park, stops, start="Entrance", return_to_start=False, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Orders `stops` to minimise total walking + waiting from `start` using
+    the park's current waits and congestion. Legs cost what ParkGraph.route
+    charges: walk plus congestion delay, and the wait at every node entered
+    on the way. Raises ValueError for unknown attractions.
+    """
+    unknown = [s for s in [start, *stops] if s not in park.index]
+    if unknown:
+        raise ValueError(f"Unknown attractions: {', '.join(unknown)}")
+    stops = [s for s in dict.fromkeys(stops) if s != start]
+    nodes = [start] + stops
+
+    started = time.perf_counter()
+    deadline = started + time_budget
+    cost, travel, waits, pred = _leg_costs(park, nodes)
+    ids = [park.index[n] for n in nodes]
+    minutes, node_waits = park.edge_minutes(), park.wait_array()
+
+    order, method = None, "exact"
+    if len(stops) <= EXACT_MAX_STOPS:
+        order = _held_karp(cost, return_to_start, deadline) if stops else []
+    if order is None:
+        method = "2-opt"
+        order = _two_opt(travel, _nearest_neighbour(cost), return_to_start, deadline)
+
+    route = [0] + order + ([0] if return_to_start else [])
+    legs = []
+    for a, b in zip(route, route[1:]):
+        path = park.unwind(pred[a], ids[a], ids[b])
+        legs.append({
+            "target": nodes[b],
+            "path": path,
+            "walk": float(minutes[park.path_edges(path)].sum()),
+            "wait": float(node_waits[[park.index[n] for n in path[1:]]].sum()),
+        })
+
+    return {
+        "order": [nodes[i] for i in order],
+        "legs": legs,
+        "total_time": _route_cost(cost, order, return_to_start),
+        "walk_time": float(sum(leg["walk"] for leg in legs)),
+        "wait_time": float(sum(leg["wait"] for leg in legs)),
+        "method": method,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
@@ -0,0 +1,212 @@
+"""
+Live ride status over Server-Sent Events.
+
+One background poller per worker fetches ride status every POLL_INTERVAL
+seconds while at least one client is connected, diffs it against the last
+state and fans the changes out to every subscriber's queue. Backend load is
+one query per interval whatever the number of open screens.
+
+Every stream holds a server thread for as long as its page is open
+(gunicorn.conf.py runs threaded workers), so a worker keeps at most
+MAX_STREAMS of them; clients turned away poll current() instead.
+"""
+import json
+import queue
+import threading
+import time
+
+POLL_INTERVAL = 15  # seconds between polls
+HEARTBEAT = 15  # seconds of silence before a keep-alive comment
+QUEUE_SIZE = 32  # events buffered per client before it is dropped
+MAX_STREAMS = 24  # open streams per worker; keep below gunicorn's threads
+
+def sse(event, data, event_id=None):
+    """One text/event-stream message."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def diff(old, new):
+    """(changed rows, removed keys) between two {key: row} states."""
+    changed = {key: row for key, row in new.items() if old.get(key) != row}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+class LiveFeed:
+    """
+    Single-poller fan-out. `fetch` returns (rows, summary): rows is a
+    {ride name: row dict} state, summary the page KPIs.
+    """
+
+    def __init__(self, fetch, interval=POLL_INTERVAL, max_streams=MAX_STREAMS):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_streams = max_streams
+        self.lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._wake = threading.Event()
+        self._poll_lock = threading.Lock()
+        self.rows, self.summary = {}, {}
+        self.seq = 0
+        self._polled = False
+        self._polled_at = 0.0
+        # Instrumentation
+        self.total_connections = 0
+        self.peak_connections = 0
+        self.dropped = 0
+        self.refused = 0
+        self.polls = 0
+        self.poll_errors = 0
+        self.last_poll_ms = 0.0
+        self.events = 0
+        self.pushes = 0
+        self._latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def subscribe(self):
+        """
+        Registers a client. Returns (queue, snapshot event); the queue then
+        receives diff events, or None if the client fell too far behind.
+        Returns None when max_streams clients are already connected.
+        """
+        with self.lock:
+            if len(self._subscribers) >= self.max_streams:
+                self.refused += 1
+                return None
+        # The first client after an idle spell fetches right away; clients
+        # arriving meanwhile wait for that fetch instead of repeating it
+        with self._poll_lock:
+            if not self._polled:
+                self._poll()
+        q = queue.Queue(QUEUE_SIZE)
+        with self.lock:
+            if len(self._subscribers) >= self.max_streams:
+                self.refused += 1
+                return None
+            # Registered and snapshotted together, so no diff is missed or
+            # repeated
+            self._subscribers.add(q)
+            self.total_connections += 1
+            self.peak_connections = max(self.peak_connections, len(self._subscribers))
+            snapshot = {'id': self.seq, 'ts': time.time(), 'rows': self.rows, 'summary': self.summary}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return q, snapshot
+
+    def current(self):
+        """
+        The latest state as a snapshot event, for clients that poll; fetched
+        at most once per interval however many of them there are.
+        """
+        with self._poll_lock:
+            if time.monotonic() - self._polled_at >= self.interval:
+                self._poll()
+        with self.lock:
+            return {'id': self.seq, 'ts': time.time(), 'rows': self.rows, 'summary': self.summary}
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self._subscribers.discard(q)
+        if not self._subscribers:
+            self._wake.set()
+
+    def poll(self):
+        """Fetches once and pushes a diff event if anything changed."""
+        with self._poll_lock:
+            self._poll()
+
+    def _poll(self):
+        started = time.perf_counter()
+        try:
+            rows, summary = self.fetch()
+        except Exception as e:
+            print(f"Live feed error: {e}")
+            with self.lock:
+                self.poll_errors += 1
+            return
+        with self.lock:
+            self.polls += 1
+            self._polled = True
+            self._polled_at = time.monotonic()
+            self.last_poll_ms = (time.perf_counter() - started) * 1000
+            changed, removed = diff(self.rows, rows)
+            summary_changed = summary != self.summary
+            self.rows, self.summary = rows, summary
+            if not (changed or removed or summary_changed):
+                return
+            self.seq += 1
+            self.events += 1
+            event = {'id': self.seq, 'ts': time.time(), 'changed': changed, 'removed': removed, 'summary': summary}
+            for q in list(self._subscribers):
+                try:
+                    q.put_nowait(event)
+                except queue.Full:
+                    # A stalled client: cut it loose, EventSource reconnects
+                    # and starts again from a fresh snapshot
+                    self._subscribers.discard(q)
+                    self.dropped += 1
+                    try:
+                        q.get_nowait()
+                        q.put_nowait(None)
+                    except (queue.Empty, queue.Full):
+                        pass
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self.lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._polled = False
+                    return
+            self.poll()
+
+    def record_push(self, event):
+        """Called as an event is written to a client."""
+        latency = time.time() - event['ts']
+        with self.lock:
+            self.pushes += 1
+            self._latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'connections': len(self._subscribers),
+                'peak_connections': self.peak_connections,
+                'total_connections': self.total_connections,
+                'dropped': self.dropped,
+                'refused': self.refused,
+                'max_streams': self.max_streams,
+                'polls': self.polls,
+                'poll_errors': self.poll_errors,
+                'last_poll_ms': round(self.last_poll_ms, 1),
+                'interval': self.interval,
+                'events': self.events,
+                'pushes': self.pushes,
+                'push_latency_ms': {
+                    'mean': round(self._latency_sum / self.pushes * 1000, 2) if self.pushes else 0.0,
+                    'max': round(self.latency_max * 1000, 2),
+                },
+            }
+
+    def stream(self, subscription):
+        """Generator of text/event-stream chunks for one subscribe()d client."""
+        q, snapshot = subscription
+        try:
+            yield f"retry: {self.interval * 1000}\n"
+            yield sse('snapshot', snapshot, snapshot['id'])
+            while True:
+                try:
+                    event = q.get(timeout=HEARTBEAT)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    return
+                self.record_push(event)
+                yield sse('diff', event, event['id'])
+        finally:
+            self.unsubscribe(q)
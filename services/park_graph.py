@@ -0,0 +1,320 @@
+import os
+import json
+import threading
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra, shortest_path
+
+# Park layout file: nodes (name, x, y, zone, kind) and walkways
+# (from, to, minutes, optional capacity in guests per hour)
+TOPOLOGY_PATH = os.environ.get("PARK_TOPOLOGY", "data/park_topology.json")
+NODE_KINDS = {"entrance", "ride", "show", "food", "shop", "junction"}
+
+# Above this many nodes the all-pairs table (n^2 floats) is not kept and
+# every route runs one single-source Dijkstra in scipy instead.
+ALL_PAIRS_MAX_NODES = 1500
+
+def validate_topology(data):
+    """
+    Checks a parsed topology and returns it as ParkGraph keyword arguments.
+    Raises ValueError listing every problem found.
+    """
+    errors = []
+    nodes, zones, kinds, edges, capacities = {}, {}, {}, [], []
+    for i, node in enumerate(data.get("nodes") or []):
+        name = node.get("name")
+        if not name or not isinstance(name, str):
+            errors.append(f"node #{i} has no name")
+            continue
+        if name in nodes:
+            errors.append(f"duplicate node {name!r}")
+            continue
+        try:
+            x, y = float(node["x"]), float(node["y"])
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"node {name!r} needs numeric x and y")
+            continue
+        if not (np.isfinite(x) and np.isfinite(y)):
+            errors.append(f"node {name!r} has non-finite coordinates")
+            continue
+        kind = node.get("kind", "ride")
+        if kind not in NODE_KINDS:
+            errors.append(f"node {name!r} has unknown kind {kind!r}")
+        nodes[name] = (x, y)
+        zones[name] = node.get("zone")
+        kinds[name] = kind
+    if not nodes:
+        errors.append("topology has no nodes")
+
+    seen = set()
+    for i, way in enumerate(data.get("walkways") or []):
+        u, v, minutes = way.get("from"), way.get("to"), way.get("minutes")
+        missing = [n for n in (u, v) if n not in nodes]
+        if missing:
+            errors.append(f"walkway #{i} references unknown node {missing[0]!r}")
+            continue
+        if u == v:
+            errors.append(f"walkway #{i} loops on {u!r}")
+            continue
+        if isinstance(minutes, bool) or not isinstance(minutes, (int, float)) or not minutes > 0 or not np.isfinite(minutes):
+            errors.append(f"walkway {u!r} - {v!r} needs positive minutes")
+            continue
+        capacity = way.get("capacity")
+        if capacity is not None and (isinstance(capacity, bool) or not isinstance(capacity, (int, float)) or not capacity > 0):
+            errors.append(f"walkway {u!r} - {v!r} needs a positive capacity")
+            continue
+        pair = frozenset((u, v))
+        if pair in seen:
+            errors.append(f"duplicate walkway {u!r} - {v!r}")
+            continue
+        seen.add(pair)
+        edges.append((u, v, minutes))
+        capacities.append(capacity)
+
+    if not errors:
+        index = {name: i for i, name in enumerate(nodes)}
+        rows = [index[u] for u, v, w in edges]
+        cols = [index[v] for u, v, w in edges]
+        adjacency = csr_matrix((np.ones(len(edges)), (rows, cols)), shape=(len(nodes),) * 2)
+        n_parts, labels = connected_components(adjacency, directed=False)
+        if n_parts > 1:
+            names = list(nodes)
+            cut_off = [names[i] for i in np.flatnonzero(labels != labels[0])]
+            errors.append(f"{len(cut_off)} node(s) unreachable from {names[0]!r}, e.g. {cut_off[0]!r}")
+
+    if errors:
+        shown = "; ".join(errors[:10])
+        more = f" (+{len(errors) - 10} more)" if len(errors) > 10 else ""
+        raise ValueError(f"Invalid park topology: {shown}{more}")
+    return {"nodes": nodes, "edges": edges, "zones": zones, "kinds": kinds, "capacities": capacities}
+
+def load_topology(path=TOPOLOGY_PATH):
+    """Reads and validates a park topology JSON file."""
+    with open(path) as f:
+        return validate_topology(json.load(f))
+
+class ParkGraph:
+    """
+    The park walkway graph, built once and kept for the life of the worker.
+    Walking a walkway costs its walk time, plus any congestion delay set
+    through update_delays(), plus the wait at the node it enters, in either
+    direction (the rule td_routing uses too).
+
+    For parks up to ALL_PAIRS_MAX_NODES an all-pairs table (distance +
+    predecessor matrices) is rebuilt in a background thread whenever the
+    waits change, so route() is a lookup. Larger parks, and small ones until
+    the rebuild lands, run a single-source Dijkstra on the sparse matrix.
+    """
+
+    def __init__(self, nodes, edges, zones=None, kinds=None, capacities=None):
+        self.nodes = dict(nodes)
+        self.edges = list(edges)
+        self.capacities = list(capacities) if capacities is not None else [None] * len(self.edges)
+        self.zones = dict(zones or {})
+        self.kinds = dict(kinds or {})
+        # Places a visitor can pick; junctions only shape the walkways
+        self.attractions = [n for n in self.nodes if self.kinds.get(n, "ride") != "junction"]
+        self.lock = threading.RLock()
+        self.G = nx.Graph()
+        for node, pos in self.nodes.items():
+            self.G.add_node(node, pos=pos, wait=0)
+        for u, v, walk_time in self.edges:
+            self.G.add_edge(u, v, walk=walk_time, delay=0)
+        self.version = 0
+
+        self.names = list(self.nodes)
+        self.index = {node: i for i, node in enumerate(self.names)}
+        n = len(self.names)
+        self._edge_u = np.array([self.index[u] for u, v, w in self.edges], dtype=np.int32)
+        self._edge_v = np.array([self.index[v] for u, v, w in self.edges], dtype=np.int32)
+        self._edge_walk = np.array([w for u, v, w in self.edges], dtype=float)
+        self._wait = np.zeros(n)
+        self._delay = np.zeros(len(self.edges))
+        self.all_pairs = n <= ALL_PAIRS_MAX_NODES
+        self._matrix = None  # (version, csr weight matrix)
+        self._table = None  # (version, dist, pred)
+        self._dirty = False
+        self._refreshing = False
+        if self.all_pairs:
+            self._build_table(self.version, self._weight_matrix())
+
+        walk_matrix = csr_matrix((self._edge_walk, (self._edge_u, self._edge_v)), shape=(n, n))
+
+        # Sorted (u * n + v) keys in both directions -> edge index
+        keys = np.concatenate([self._edge_u.astype(np.int64) * n + self._edge_v, self._edge_v.astype(np.int64) * n + self._edge_u])
+        order = np.argsort(keys)
+        self._edge_keys, self._edge_ids = keys[order], np.tile(np.arange(len(self.edges)), 2)[order]
+
+        # Symmetric CSR adjacency and coordinates for custom searches
+        both = (walk_matrix + walk_matrix.T).tocsr()
+        self.adj_ptr, self.adj_idx, self.adj_walk = both.indptr, both.indices, both.data
+        self.xy = np.array([self.nodes[name] for name in self.names], dtype=float)
+
+    def update_waits(self, wait_times):
+        """
+        Applies a new wait snapshot. Returns the nodes whose wait changed
+        (and bumps `version` if any did).
+        """
+        changed = []
+        with self.lock:
+            for node, wait in wait_times.items():
+                if node not in self.G or self.G.nodes[node]['wait'] == wait:
+                    continue
+                self.G.nodes[node]['wait'] = wait
+                self._wait[self.index[node]] = wait
+                changed.append(node)
+            if changed:
+                self.version += 1
+        if changed and self.all_pairs:
+            self._request_refresh()
+        return changed
+
+    def update_delays(self, delays):
+        """
+        Sets the congestion delay (minutes) on every edge, aligned with
+        `edges`. Returns the indices of edges that changed.
+        """
+        delays = np.asarray(delays, dtype=float)
+        with self.lock:
+            changed = np.flatnonzero(delays != self._delay)
+            for e in changed:
+                u, v, walk_time = self.edges[e]
+                self.G[u][v]['delay'] = float(delays[e])
+            if len(changed):
+                self._delay = delays.copy()
+                self.version += 1
+        if len(changed) and self.all_pairs:
+            self._request_refresh()
+        return changed
+
+    def walk_adjacency(self):
+        """
+        Symmetric CSR (indptr, indices, minutes) of walk time plus the
+        current congestion delay; same layout as adj_ptr / adj_idx.
+        """
+        with self.lock:
+            minutes = self._edge_walk + self._delay
+        n = len(self.names)
+        matrix = csr_matrix((minutes, (self._edge_u, self._edge_v)), shape=(n, n))
+        both = (matrix + matrix.T).tocsr()
+        return both.indptr, both.indices, both.data
+
+    def edge_endpoints(self):
+        """(u, v) node-index arrays aligned with `edges`."""
+        return self._edge_u, self._edge_v
+
+    def edge_index(self, from_ids, to_ids):
+        """Indices into `edges` for hops given as node-index arrays."""
+        keys = np.asarray(from_ids, dtype=np.int64) * len(self.names) + np.asarray(to_ids, dtype=np.int64)
+        return self._edge_ids[np.searchsorted(self._edge_keys, keys)]
+
+    def path_edges(self, path):
+        """Indices into `edges` along a path of node names."""
+        ids = [self.index[node] for node in path]
+        return self.edge_index(ids[:-1], ids[1:])
+
+    def _weight_matrix(self):
+        with self.lock:
+            if self._matrix is None or self._matrix[0] != self.version:
+                # Both directions, each charged the wait of the node it enters
+                walk = self._edge_walk + self._delay
+                weights = np.concatenate([walk + self._wait[self._edge_v], walk + self._wait[self._edge_u]])
+                rows = np.concatenate([self._edge_u, self._edge_v])
+                cols = np.concatenate([self._edge_v, self._edge_u])
+                n = len(self.names)
+                self._matrix = (self.version, csr_matrix((weights, (rows, cols)), shape=(n, n)))
+            return self._matrix[1]
+
+    def _build_table(self, version, matrix):
+        dist, pred = shortest_path(matrix, method='D', directed=True, return_predecessors=True)
+        with self.lock:
+            if self._table is None or self._table[0] < version:
+                self._table = (version, dist, pred)
+
+    def _request_refresh(self):
+        # One refresher thread per graph; snapshots arriving mid-rebuild
+        # just mark it dirty so it loops once more with the latest weights.
+        with self.lock:
+            self._dirty = True
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            with self.lock:
+                if not self._dirty:
+                    self._refreshing = False
+                    return
+                self._dirty = False
+                version, matrix = self.version, self._weight_matrix()
+            self._build_table(version, matrix)
+
+    def table_is_current(self):
+        with self.lock:
+            return self._table is not None and self._table[0] == self.version
+
+    def unwind(self, pred, i, j):
+        """Node names from i to j, given the predecessor row of source i."""
+        path = [j]
+        while path[-1] != i:
+            path.append(pred[path[-1]])
+        return [self.names[k] for k in reversed(path)]
+
+    def shortest_tree(self, i):
+        """(dist, pred) rows from node index `i` under the current weights."""
+        dist, pred = self.shortest_trees([i])
+        return dist[0], pred[0]
+
+    def shortest_trees(self, ids):
+        """(dist, pred) matrices, one row per source index in `ids`."""
+        with self.lock:
+            if self.table_is_current():
+                version, dist, pred = self._table
+                return dist[ids], pred[ids]
+            matrix = self._weight_matrix()
+        return dijkstra(matrix, directed=True, indices=ids, return_predecessors=True)
+
+    def edge_minutes(self):
+        """Walk time plus current congestion delay per edge, aligned with `edges`."""
+        with self.lock:
+            return self._edge_walk + self._delay
+
+    def wait_array(self):
+        """Current waits as an array aligned with `names`."""
+        with self.lock:
+            return self._wait.copy()
+
+    def route(self, start, end):
+        """
+        Fastest route from start to end. Returns (path, total_time, steps);
+        raises networkx.NetworkXNoPath / NodeNotFound like nx.shortest_path.
+        """
+        for node in (start, end):
+            if node not in self.index:
+                raise nx.NodeNotFound(f"Node {node} not found in graph")
+        i, j = self.index[start], self.index[end]
+        dist, pred = self.shortest_tree(i)
+        if not np.isfinite(dist[j]):
+            raise nx.NetworkXNoPath(f"No path between {start} and {end}.")
+        path = self.unwind(pred, i, j)
+        with self.lock:
+            steps = []
+            for u, v in zip(path, path[1:]):
+                edge = self.G[u][v]
+                steps.append({'target': v, 'walk': edge['walk'] + edge['delay'], 'wait': self.G.nodes[v]['wait']})
+        return path, int(dist[j]), steps
+
+_park_graph = None
+_park_graph_lock = threading.Lock()
+
+def get_park_graph():
+    """Returns this worker's shared ParkGraph, building it on first use."""
+    global _park_graph
+    if _park_graph is None:
+        with _park_graph_lock:
+            if _park_graph is None:
+                _park_graph = ParkGraph(**load_topology())
+    return _park_graph
@@ -1,15 +1,92 @@
 import plotly.express as px
 import plotly.graph_objects as go
-import plotly
-import json
 import pandas as pd
 import numpy as np
+from services import serializer
+from services import downsample
+from services import figures
 
-def to_html(fig):
-    return fig.to_html(full_html=False, include_plotlyjs='cdn', config={'responsive': True, 'displayModeBar': False})
+# Ship numeric arrays as base64 typed arrays (needs plotly.js >= 2.28, the
+# templates load 2.35.2). Set to False to fall back to plain JSON lists.
+TYPED_ARRAYS = True
+
+# Line, area and scatter series longer than DOWNSAMPLE_THRESHOLD points are
+# decimated to DOWNSAMPLE_TARGET points ('lttb' or 'minmax', see downsample.py)
+DOWNSAMPLE_THRESHOLD = 1000
+DOWNSAMPLE_TARGET = 500
+DOWNSAMPLE_METHOD = 'lttb'
+MIN_SERIES_POINTS = 10  # floor per series when a figure-wide budget is split
 
 def to_json(fig):
-    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    return serializer.dumps(fig, typed_arrays=TYPED_ARRAYS)
+
+def to_spec(fig):
+    """
+    Serializes a figure (or a figures.* dict) as a minimal {data, layout} spec
+    for static/js/charts.js. The layout template is dropped: plotly.js already
+    ships its defaults and the express template alone is ~7KB per chart.
+    """
+    spec = fig if isinstance(fig, dict) else fig.to_plotly_json()
+    spec['layout'].pop('template', None)
+    return to_json({'data': spec['data'], 'layout': spec['layout']})
+
+def update_layout(spec, **layout):
+    """Merges layout properties into a figures.* spec like fig.update_layout."""
+    def merge(dst, src):
+        for key, value in src.items():
+            if isinstance(value, dict) and isinstance(dst.get(key), dict):
+                merge(dst[key], value)
+            else:
+                dst[key] = value
+    merge(spec['layout'], layout)
+    return spec
+
+def _numeric_axis(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    try:
+        stamps = pd.to_datetime(values)
+    except (ValueError, TypeError):
+        return None
+    return stamps.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+
+def decimate(df, x_col, y_col, group_col=None, target=None, threshold=None):
+    """
+    Reduces every series (one per `group_col` value) that has more than
+    `threshold` points down to `target` points, keeping peaks. Returns the
+    frame unchanged when nothing needs reducing or x is not ordinal.
+    """
+    target = target or DOWNSAMPLE_TARGET
+    threshold = max(threshold or DOWNSAMPLE_THRESHOLD, target)
+    if df is None or len(df) <= threshold:
+        return df
+
+    x = _numeric_axis(df[x_col])
+    if x is None:
+        return df
+    y = df[y_col].to_numpy(dtype=float)
+
+    if group_col and group_col in df.columns and not pd.api.types.is_numeric_dtype(df[group_col]):
+        codes = pd.factorize(df[group_col])[0]
+    else:
+        codes = np.zeros(len(df), dtype=np.int64)
+
+    # Sort once by (series, x) so each series is a contiguous, ordered slice
+    keep = ~np.isnan(y)
+    order = np.lexsort((x, codes))
+    order = order[keep[order]]
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    reduce = downsample.METHODS[DOWNSAMPLE_METHOD]
+
+    picked = []
+    for rows in np.split(order, bounds):
+        if len(rows) > threshold:
+            rows = rows[reduce(x[rows], y[rows], target)]
+        picked.append(rows)
+    picked = np.sort(np.concatenate(picked)) if picked else order
+    if len(picked) == len(df):
+        return df
+    return df.iloc[picked]
 
 def generate_treemap(chart_df):
     if chart_df is None or chart_df.empty:
@@ -26,20 +103,16 @@ def generate_treemap(chart_df):
         color_continuous_scale='Viridis',
     )
     fig.update_layout(margin=dict(t=0, l=0, r=0, b=0), paper_bgcolor='rgba(0,0,0,0)')
-    return to_json(fig)
+    return to_spec(fig)
 
-def generate_trend_area(chart_df, x_col, y_col, title=None, color='#3b82f6'):
+def generate_trend_area(chart_df, x_col, y_col, title=None, color='#3b82f6', max_points=None):
     if chart_df is None or chart_df.empty:
         return "{}"
     
-    fig = px.area(
-        chart_df,
-        x=x_col,
-        y=y_col,
-        title=title,
-        color_discrete_sequence=[color]
-    )
-    fig.update_layout(
+    chart_df = decimate(chart_df, x_col, y_col, target=max_points)
+    spec = figures.area(chart_df[x_col], chart_df[y_col], color=color, x_label=x_col, y_label=y_col, title=title)
+    update_layout(
+        spec,
         margin=dict(t=30 if title else 10, l=0, r=0, b=0), 
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
@@ -47,63 +120,75 @@ def generate_trend_area(chart_df, x_col, y_col, title=None, color='#3b82f6'):
         yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)'),
         font=dict(family="Outfit", color="#142C63")
     )
-    if title:
-        fig.update_traces(line_color=color)
-        return to_html(fig) # Use HTML for Insights/Feedback
-    else:
-        return to_json(fig) # Use JSON for Dashboard
+    return to_spec(spec)
 
-def generate_line_chart(df, x_col, y_col, title, x_label, y_label):
+def generate_line_chart(df, x_col, y_col, title, x_label, y_label, max_points=None):
     if df is None or df.empty:
         return "{}"
     
+    df = decimate(df, x_col, y_col, target=max_points)
     fig = px.line(df, x=x_col, y=y_col, title=title, labels={x_col: x_label, y_col: y_label})
     fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(family="Outfit", color="#142C63"))
     fig.update_traces(line_color='#F57C00', line_width=3)
-    return to_json(fig)
+    return to_spec(fig)
 
 def generate_bar_chart(df, x_col, y_col, title, x_label, y_label, color_col=None):
     if df is None or df.empty:
-        return "" # Return empty string for HTML
+        return "{}"
     
-    fig = px.bar(df, x=x_col, y=y_col, title=title, labels={x_col: x_label, y_col: y_label},
-                 color=color_col if color_col else y_col, 
-                 color_continuous_scale='Viridis' if color_col else None)
+    labels = {x_col: x_label, y_col: y_label}
+    shade_col = color_col if color_col else y_col
+    spec = figures.bar(df[x_col], df[y_col], color=df[shade_col],
+                       x_label=x_label, y_label=y_label, color_label=labels.get(shade_col, shade_col),
+                       title=title, scale='Viridis' if color_col else None)
     
     if not color_col:
-         fig.update_traces(marker_color='#3b82f6')
+        spec['data'][0]['marker']['color'] = '#3b82f6'
 
-    fig.update_layout(
+    update_layout(
+        spec,
         paper_bgcolor='rgba(0,0,0,0)', 
         plot_bgcolor='rgba(0,0,0,0)', 
         font=dict(family="Outfit", color="#142C63"),
         xaxis=dict(showgrid=False),
         yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)')
     )
-    return to_html(fig) # Default to HTML for most pages now
+    return to_spec(spec)
 
 def generate_pie_chart(df, names, values=None, title=None, color=None, hole=0.5):
-    if df is None or df.empty:
-        return ""
+    if values is None and (df is None or df.empty):
+        return "{}"
     
-    if values:
-        fig = px.pie(values=values, names=names, title=title, color=color, hole=hole, color_discrete_map={'Open': '#A6D86B', 'Closed': '#EF4444'})
+    if values is not None and color is None:
+        spec = figures.pie(names, values, hole=hole, title=title)
+    elif values is not None:
+        spec = px.pie(values=values, names=names, title=title, color=color, hole=hole, color_discrete_map={'Open': '#A6D86B', 'Closed': '#EF4444'}).to_plotly_json()
     else:
-        fig = px.pie(df, names=names, title=title, color=color, hole=hole, color_discrete_map={'Positive': '#A6D86B', 'Neutral': '#FFD54F', 'Negative': '#D92B7D'})
+        spec = px.pie(df, names=names, title=title, color=color, hole=hole, color_discrete_map={'Positive': '#A6D86B', 'Neutral': '#FFD54F', 'Negative': '#D92B7D'}).to_plotly_json()
         
-    fig.update_layout(
+    update_layout(
+        spec,
         height=350,
         paper_bgcolor='rgba(0,0,0,0)',
         font=dict(family="Outfit", color="#142C63"),
         margin=dict(l=20, r=20, t=60 if title else 20, b=20),
         showlegend=False if not title else True
     )
-    return to_html(fig)
+    return to_spec(spec)
 
-def generate_scatter_chart(df, x_col, y_col, color_col, size_col=None, title=None):
+def generate_scatter_chart(df, x_col, y_col, color_col, size_col=None, title=None, max_points=None, max_total=None):
+    """
+    `max_points` caps each series; `max_total` caps the whole figure, split
+    evenly across the `color_col` series.
+    """
     if df is None or df.empty:
-        return ""
+        return "{}"
         
+    if max_total:
+        per_series = max(max_total // max(df[color_col].nunique(), 1), MIN_SERIES_POINTS)
+        df = decimate(df, x_col, y_col, group_col=color_col, target=per_series, threshold=per_series)
+    else:
+        df = decimate(df, x_col, y_col, group_col=color_col, target=max_points)
     fig = px.scatter(df, x=x_col, y=y_col, color=color_col, size=size_col, title=title, color_continuous_scale='Viridis')
     fig.update_layout(
         height=350,
@@ -112,39 +197,43 @@ def generate_scatter_chart(df, x_col, y_col, color_col, size_col=None, title=Non
         font=dict(family="Outfit", color="#142C63"),
         margin=dict(l=50, r=20, t=60, b=50)
     )
-    return to_html(fig)
+    return to_spec(fig)
 
 def generate_heatmap(df, x_col, y_col, z_col, title):
     if df is None or df.empty:
-        return ""
+        return "{}"
         
-    fig = px.density_heatmap(df, x=x_col, y=y_col, z=z_col, title=title, color_continuous_scale='Viridis')
-    fig.update_layout(
+    spec = figures.density_heatmap(df[x_col], df[y_col], df[z_col], x_label=x_col, y_label=y_col, z_label=z_col,
+                                   title=title, scale='Viridis')
+    update_layout(
+        spec,
         height=350,
         paper_bgcolor='rgba(0,0,0,0)', 
         plot_bgcolor='rgba(0,0,0,0)', 
         font=dict(family="Outfit", color="#142C63"),
         margin=dict(l=50, r=20, t=60, b=50)
     )
-    return to_html(fig)
+    return to_spec(spec)
 
-def generate_histogram(df, x_col, title, color_seq=['#142C63'], nbins=30):
+def generate_histogram(df, x_col, title, color_seq=['#142C63'], nbins=30, weights_col=None):
     if df is None or df.empty:
-        return ""
+        return "{}"
         
-    fig = px.histogram(df, x=x_col, nbins=nbins, title=title, color_discrete_sequence=color_seq)
-    fig.update_layout(
+    weights = df[weights_col] if weights_col else None
+    spec = figures.histogram(df[x_col], nbins=nbins, color=color_seq[0], x_label=x_col, title=title, weights=weights)
+    update_layout(
+        spec,
         height=350,
         paper_bgcolor='rgba(0,0,0,0)', 
         plot_bgcolor='rgba(0,0,0,0)', 
         font=dict(family="Outfit", color="#142C63"),
         margin=dict(l=50, r=20, t=60, b=50)
     )
-    return to_html(fig)
+    return to_spec(spec)
 
 def generate_box_plot(df, y_col, title, color_seq=['#142C63']):
     if df is None or df.empty:
-        return ""
+        return "{}"
         
     fig = px.box(df, y=y_col, title=title, color_discrete_sequence=color_seq)
     fig.update_layout(
@@ -154,11 +243,11 @@ def generate_box_plot(df, y_col, title, color_seq=['#142C63']):
         font=dict(family="Outfit", color="#142C63"),
         margin=dict(l=50, r=20, t=60, b=50)
     )
-    return to_html(fig)
+    return to_spec(fig)
 
 def generate_custom_trend(daily, x_col, y_col, title):
     if daily is None or daily.empty:
-        return ""
+        return "{}"
         
     fig = go.Figure()
     fig.add_trace(go.Scatter(
@@ -179,10 +268,10 @@ def generate_custom_trend(daily, x_col, y_col, title):
         yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.05)'),
         margin=dict(l=50, r=20, t=60, b=50)
     )
-    return to_html(fig)
+    return to_spec(fig)
 
 def generate_health_charts(df_cv, df_vis, df_rev):
-    cv_html = res_html = clus_html = ""
+    cv_json = res_json = clus_json = "{}"
     
     # 1. Crowd
     if not df_cv.empty:
@@ -199,12 +288,12 @@ def generate_health_charts(df_cv, df_vis, df_rev):
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
             margin=dict(l=40, r=20, t=60, b=40)
         )
-        cv_html = to_html(fig_cv)
+        cv_json = to_spec(fig_cv)
         
         df_cv['residual'] = df_cv['y'] - df_cv['yhat']
         fig_res = px.histogram(df_cv, x='residual', nbins=20, title="Error Distribution (Residuals)", color_discrete_sequence=['#F57C00'])
         fig_res.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(family="Outfit", color="#142C63"))
-        res_html = to_html(fig_res)
+        res_json = to_spec(fig_res)
 
     # 2. Rec
     if not df_vis.empty:
@@ -212,91 +301,100 @@ def generate_health_charts(df_cv, df_vis, df_rev):
                               title="Visitor Demographics & Group Type",
                               color_continuous_scale='Viridis')
         fig_clus.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(family="Outfit", color="#142C63"))
-        clus_html = to_html(fig_clus)
+        clus_json = to_spec(fig_clus)
 
-    return cv_html, res_html, clus_html
+    return cv_json, res_json, clus_json
 
-def generate_map_json(nodes, edges, wait_times, path):
-    import networkx as nx
-    
-    G = nx.Graph()
-    for node, pos in nodes.items():
-        G.add_node(node, pos=pos, wait=wait_times.get(node, 0))
-    
-    for u, v, walk_time in edges:
-        weight = walk_time + wait_times.get(v, 0)
-        G.add_edge(u, v, weight=weight, walk=walk_time)
-        
-    # Generate Plotly Map
-    edge_x, edge_y = [], []
-    for edge in G.edges():
-        x0, y0 = G.nodes[edge[0]]['pos']
-        x1, y1 = G.nodes[edge[1]]['pos']
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-    
+# Parks with at least this many nodes are drawn with WebGL (scattergl)
+MAP_WEBGL_MIN_NODES = 1000
+# Zoomed in to this many attractions or fewer, static/js/charts.js labels
+# every visible one; zoomed further out only the route is labelled
+MAP_MAX_LABELS = 40
+
+def _segments(xy, u, v):
+    """x, y arrays for line segments u[i]-v[i], NaN-separated for plotly."""
+    seg = np.full((len(u), 3, 2), np.nan, dtype=np.float32)
+    seg[:, 0] = xy[u]
+    seg[:, 1] = xy[v]
+    seg = seg.reshape(-1, 2)
+    return seg[:, 0], seg[:, 1]
+
+def generate_map_json(park, path, webgl=None):
+    """
+    Draws the shared park graph (services.park_graph.ParkGraph) with its
+    current waits, highlighting `path`. Large parks (MAP_WEBGL_MIN_NODES)
+    switch to scattergl traces unless `webgl` says otherwise.
+    """
+    n = len(park.names)
+    if webgl is None:
+        webgl = n >= MAP_WEBGL_MIN_NODES
+    kind = 'scattergl' if webgl else 'scatter'
+    xy = park.xy
+    edge_u, edge_v = park.edge_endpoints()
+
+    edge_x, edge_y = _segments(xy, edge_u, edge_v)
     edge_trace = {
         'x': edge_x, 'y': edge_y,
         'line': {'width': 1, 'color': '#888'},
         'hoverinfo': 'none',
         'mode': 'lines',
-        'type': 'scatter'
+        'type': kind
     }
     
     # Highlight Path
-    path_x, path_y = [], []
-    if path:
-        for i in range(len(path)-1):
-            u, v = path[i], path[i+1]
-            x0, y0 = G.nodes[u]['pos']
-            x1, y1 = G.nodes[v]['pos']
-            path_x.extend([x0, x1, None])
-            path_y.extend([y0, y1, None])
-    
+    path_ids = np.array([park.index[node] for node in path], dtype=np.int64)
+    path_x, path_y = _segments(xy, path_ids[:-1], path_ids[1:])
     path_trace = {
         'x': path_x, 'y': path_y,
         'line': {'width': 4, 'color': '#142C63', 'dash': 'dot'},
         'mode': 'lines',
         'name': 'Optimal Route',
-        'type': 'scatter'
+        'type': kind
     }
     
-    # Nodes
-    node_x, node_y, node_text, node_color, node_size = [], [], [], [], []
-    for node in G.nodes():
-        x, y = G.nodes[node]['pos']
-        wait = G.nodes[node]['wait']
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(f"{node}<br>Wait: {wait} min")
-        
-        if wait < 15:
-            node_color.append("#A6D86B")
-        elif wait < 45:
-            node_color.append("#F57C00")
-        else:
-            node_color.append("#D92B7D")
-        
-        node_size.append(30 if node in path else 20)
+    # Nodes: wait band (0 low, 1 medium, 2 high) mapped through a stepped
+    # colorscale, junctions small, route stops enlarged
+    waits = park.wait_array()
+    band = np.digitize(waits, [15, 45]).astype(np.int8)
+    base = 20 if n <= 200 else max(4.0, 20 * np.sqrt(200 / n))
+    is_attraction = np.array([park.kinds.get(name, "ride") != "junction" for name in park.names])
+    node_size = np.where(is_attraction, base, base / 3)
+    on_path = np.zeros(n, dtype=bool)
+    on_path[path_ids] = True
+    node_size[on_path] *= 1.5
     
     node_trace = {
-        'x': node_x, 'y': node_y,
-        'mode': 'markers+text',
-        'hoverinfo': 'text',
-        'text': [n if n in path else "" for n in G.nodes()],
-        'hovertext': node_text,
-        'textposition': "top center",
+        'x': xy[:, 0], 'y': xy[:, 1],
+        'mode': 'markers',
+        'text': park.names,
+        'customdata': waits,
+        'hovertemplate': "%{text}<br>Wait: %{customdata} min<extra></extra>",
         'marker': {
             'showscale': False,
-            'color': node_color,
-            'size': node_size,
-            'line_width': 2
+            'color': band,
+            'cmin': 0, 'cmax': 2,
+            'colorscale': [[0, "#A6D86B"], [1 / 3, "#A6D86B"], [1 / 3, "#F57C00"], [2 / 3, "#F57C00"], [2 / 3, "#D92B7D"], [1, "#D92B7D"]],
+            'size': np.round(node_size, 1),
+            'line': {'width': 2 if n <= 200 else 0}
         },
-        'type': 'scatter'
+        'type': kind
+    }
+    
+    # Labels: the route's attractions up front; charts.js swaps in every
+    # visible attraction once the view is zoomed in far enough
+    labelled = np.flatnonzero(on_path & is_attraction)
+    attractions = np.flatnonzero(is_attraction)
+    label_trace = {
+        'x': xy[labelled, 0], 'y': xy[labelled, 1],
+        'mode': 'text',
+        'text': [park.names[i] for i in labelled],
+        'textposition': "top center",
+        'hoverinfo': 'skip',
+        'type': kind
     }
     
     map_data = {
-        'data': [edge_trace, path_trace, node_trace],
+        'data': [edge_trace, path_trace, node_trace, label_trace],
         'layout': {
             'showlegend': False,
             'hovermode': 'closest',
@@ -304,11 +402,18 @@ def generate_map_json(nodes, edges, wait_times, path):
             'xaxis': {'showgrid': False, 'zeroline': False, 'showticklabels': False},
             'yaxis': {'showgrid': False, 'zeroline': False, 'showticklabels': False},
             'paper_bgcolor': 'rgba(0,0,0,0)',
-            'plot_bgcolor': 'rgba(0,0,0,0)'
+            'plot_bgcolor': 'rgba(0,0,0,0)',
+            'meta': {'labels': {
+                'trace': 3,
+                'max': MAP_MAX_LABELS,
+                'x': xy[attractions, 0].tolist(),
+                'y': xy[attractions, 1].tolist(),
+                'text': [park.names[i] for i in attractions],
+            }}
         }
     }
     
-    return json.dumps(map_data)
+    return to_spec(map_data)
 
 def generate_forecast_chart(forecast_df):
     if forecast_df is None or forecast_df.empty:
@@ -345,23 +450,24 @@ def generate_forecast_chart(forecast_df):
         margin=dict(l=20, r=20, t=20, b=20),
         hovermode="x unified"
     )
-    return to_json(fig)
+    return to_spec(fig)
 
 def generate_heatmap_chart(heatmap_df):
     if heatmap_df is None or heatmap_df.empty:
         return "{}"
         
-    fig = px.density_heatmap(
-        heatmap_df, x='Hour', y='Day', z='Crowd Level',
-        color_continuous_scale=['#E3F2FD', '#142C63'], # Light blue to Dark Blue
-        labels={'Crowd Level': 'Density'}
+    spec = figures.density_heatmap(
+        heatmap_df['Hour'], heatmap_df['Day'], heatmap_df['Crowd Level'],
+        x_label='Hour', y_label='Day', z_label='Density',
+        scale=['#E3F2FD', '#142C63'] # Light blue to Dark Blue
     )
     
-    fig.update_layout(
+    update_layout(
+        spec,
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
         font=dict(family="Outfit", size=12, color="#142C63"),
         margin=dict(l=0, r=0, t=0, b=0)
     )
-    return to_json(fig)
+    return to_spec(spec)
 
@@ -0,0 +1,198 @@
+"""
+In-memory rolling statistics per ride, kept in fixed-size numpy ring buffers.
+
+Each ride owns one row of a (rides x WINDOW) buffer. Adding a sample is O(1):
+EWMA, rolling sum and the least-squares sums behind the trend slope are
+updated in place (re-summed exactly once per lap of the ring to stop float
+drift). Percentiles are taken across all rides in one vectorised call at
+query time. Queries never touch pandas; only ingest_frame() reads a frame.
+"""
+import threading
+import numpy as np
+import pandas as pd
+
+WINDOW = 48  # samples kept per ride (12 h of 15-minute readings)
+EWMA_ALPHA = 0.3
+
+class RideStats:
+    def __init__(self, window=WINDOW, alpha=EWMA_ALPHA):
+        self.window = window
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.names = []
+        self.index = {}
+        self._ingested = None
+        self._t0 = None  # time origin for the slope sums
+        self._allocate(16)
+
+    def _allocate(self, rows):
+        """(Re)sizes every per-ride array to `rows` rows, keeping contents."""
+        def grow(name, fill, shape, dtype=float):
+            new = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+        grow('_values', np.nan, (rows, self.window))
+        grow('_times', np.nan, (rows, self.window))
+        grow('_head', 0, rows, np.int64)
+        grow('_count', 0, rows, np.int64)
+        grow('_last_t', -np.inf, rows)
+        grow('_ewma', np.nan, rows)
+        grow('_latest', np.nan, rows)
+        # Rolling sums: y, t, t*t, t*y (t in minutes since self._t0)
+        grow('_sums', 0.0, (rows, 4))
+
+    def _row(self, name):
+        r = self.index.get(name)
+        if r is None:
+            r = len(self.names)
+            if r == len(self._head):
+                self._allocate(2 * r)
+            self.names.append(name)
+            self.index[name] = r
+        return r
+
+    def add(self, name, minute, wait):
+        """
+        Adds one sample (`minute` = minutes since the epoch). Samples not
+        newer than the ride's last one are ignored; returns whether it was
+        kept.
+        """
+        with self.lock:
+            return self._add(self._row(name), float(minute), float(wait))
+
+    def _add(self, r, t, y):
+        if t <= self._last_t[r] or np.isnan(y):
+            return False
+        if self._t0 is None:
+            self._t0 = t
+        t -= self._t0
+        h = self._head[r]
+        sums = self._sums[r]
+        if self._count[r] == self.window:
+            old_t, old_y = self._times[r, h], self._values[r, h]
+            sums -= (old_y, old_t, old_t * old_t, old_t * old_y)
+        self._values[r, h], self._times[r, h] = y, t
+        sums += (y, t, t * t, t * y)
+        self._head[r] = (h + 1) % self.window
+        self._count[r] = min(self._count[r] + 1, self.window)
+        self._last_t[r] = t + self._t0
+        self._latest[r] = y
+        self._ewma[r] = y if np.isnan(self._ewma[r]) else self.alpha * y + (1 - self.alpha) * self._ewma[r]
+        if self._head[r] == 0:
+            # Once per lap: exact re-sum so add/remove rounding cannot pile up
+            vals, times = self._values[r], self._times[r]
+            ok = ~np.isnan(vals)
+            sums[:] = (vals[ok].sum(), times[ok].sum(), (times[ok] ** 2).sum(), (times[ok] * vals[ok]).sum())
+        return True
+
+    def ingest_frame(self, df):
+        """
+        Adds the samples of a waiting_times frame that are newer than what
+        each ride already holds. The same snapshot (row count, first and
+        last timestamps) is skipped outright.
+        """
+        if df is None or df.empty:
+            return 0
+        key = (len(df), str(df['work_date'].iloc[0]), str(df['work_date'].iloc[-1]))
+        with self.lock:
+            if key == self._ingested:
+                return 0
+        minutes = pd.to_datetime(df['work_date']).to_numpy().astype('datetime64[s]').astype(np.int64) / 60.0
+        waits = pd.to_numeric(df['wait_time_max'], errors='coerce').to_numpy(dtype=float)
+        names = df['entity_description_short'].to_numpy()
+        order = np.argsort(minutes, kind='stable')
+        added = 0
+        with self.lock:
+            rows = np.array([self._row(name) for name in names[order]], dtype=np.int64)
+            t_sorted, y_sorted = minutes[order], waits[order]
+            fresh = np.flatnonzero(t_sorted > self._last_t[rows])
+            for i in fresh.tolist():
+                added += self._add(rows[i], t_sorted[i], y_sorted[i])
+            self._ingested = key
+        return added
+
+    def arrays(self):
+        """
+        Stats for every ride as aligned numpy arrays: names, count, latest,
+        ewma, mean, p50, p90 and slope (wait minutes per hour).
+        """
+        with self.lock:
+            n = len(self.names)
+            count = self._count[:n].copy()
+            sums = self._sums[:n].copy()
+            values = self._values[:n].copy()
+            latest = self._latest[:n].copy()
+            ewma = self._ewma[:n].copy()
+            names = list(self.names)
+        safe = np.maximum(count, 1)
+        sy, st, stt, sty = sums.T
+        mean = np.where(count > 0, sy / safe, np.nan)
+        denom = count * stt - st * st
+        slope = np.zeros(n)
+        np.divide(count * sty - st * sy, denom, out=slope, where=(count > 1) & (np.abs(denom) > 1e-9))
+        p50, p90 = _percentiles(values, count)
+        return {
+            'names': names, 'count': count, 'latest': latest, 'ewma': ewma,
+            'mean': mean, 'p50': p50, 'p90': p90, 'slope': slope * 60,
+        }
+
+    def stats(self):
+        """{ride: {count, latest, ewma, mean, p50, p90, slope}} with rounded floats."""
+        a = self.arrays()
+        keys = ('latest', 'ewma', 'mean', 'p50', 'p90', 'slope')
+        columns = []
+        for key in keys:
+            col = np.round(a[key], 1).astype(object)
+            col[~np.isfinite(a[key])] = None
+            columns.append(col.tolist())
+        counts = a['count'].tolist()
+        return {
+            name: {'count': counts[i], **dict(zip(keys, values))}
+            for i, (name, values) in enumerate(zip(a['names'], zip(*columns)))
+        }
+
+    def least_crowded(self, k=5):
+        """[(name, ewma)] for the k open rides with the lowest smoothed wait."""
+        a = self.arrays()
+        open_ = np.flatnonzero(a['latest'] > 0)
+        best = open_[np.argsort(a['ewma'][open_], kind='stable')[:k]]
+        return [(a['names'][i], float(a['ewma'][i])) for i in best]
+
+    def park_average(self):
+        """(mean smoothed wait, mean slope per hour) over open rides, or None."""
+        a = self.arrays()
+        open_ = a['latest'] > 0
+        if not open_.any():
+            return None
+        return float(a['ewma'][open_].mean()), float(a['slope'][open_].mean())
+
+def _percentiles(values, count, qs=(0.5, 0.9)):
+    """
+    Row-wise percentiles (numpy's linear method) of the first `count`
+    valid entries: NaN sorts last, so one sort serves every ride.
+    """
+    ordered = np.sort(values, axis=1)
+    rows = np.arange(len(values))
+    out = []
+    for q in qs:
+        pos = q * np.maximum(count - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, np.maximum(count - 1, 0))
+        frac = pos - lo
+        p = ordered[rows, lo] * (1 - frac) + ordered[rows, hi] * frac
+        out.append(np.where(count > 0, p, np.nan))
+    return out
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """This worker's RideStats."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RideStats()
+    return _store
@@ -0,0 +1,108 @@
+"""
+Tiered time-series rollups of waiting_times: 5-minute, hourly and daily
+min / mean / max / count per ride.
+
+A day's rollup is computed once from its raw rows (see analytics.append_waits)
+and stored with the other per-day aggregates. The hourly tier is the day's
+ride x hour cells and the daily tier their sum over hours, so only the
+5-minute tier needs arrays of its own, and is only stored where it is
+smaller than the raw rows (see analytics._day_rollup). Charts ask for a time range and get
+the finest tier that keeps each ride's series within TARGET_POINTS, so a
+chart over a year reads 365 daily points per ride, not every raw sample.
+"""
+import numpy as np
+import pandas as pd
+
+FIVE_MINUTES = 300
+FIVE_KEYS = ("five_slot", "five_ride", "five_count", "five_sum", "five_min", "five_max")
+TIERS = (("5min", 300), ("hour", 3600), ("day", 86400))
+TARGET_POINTS = 800  # per ride; about what a chart can show
+
+def five_minute(ts, ride, wait, n_rides):
+    """5-minute (slot of day, ride, count, sum, min, max) rows of one day's waits."""
+    slot = (ts % 86400) // FIVE_MINUTES
+    key, inverse = np.unique(slot * n_rides + ride, return_inverse=True)
+    size = len(key)
+    low = np.full(size, np.inf)
+    high = np.zeros(size)
+    np.minimum.at(low, inverse, wait)
+    np.maximum.at(high, inverse, wait)
+    return {
+        "five_slot": (key // n_rides).astype(np.int16),
+        "five_ride": (key % n_rides).astype(np.int32),
+        "five_count": np.bincount(inverse, minlength=size).astype(np.int32),
+        "five_sum": np.bincount(inverse, weights=wait, minlength=size),
+        "five_min": low.astype(np.float32),
+        "five_max": high.astype(np.float32),
+    }
+
+CELL_FIELDS = ("count", "sum", "min", "max")
+
+def hour_cells(ride, hour, wait, n_rides):
+    """
+    One day's waits per (ride, hour) as a single (4, n_rides, 24) array of
+    CELL_FIELDS, so a day's tier is one array to read back.
+    """
+    cell = ride * 24 + hour
+    size = n_rides * 24
+    low = np.full(size, np.inf)
+    high = np.zeros(size)
+    np.minimum.at(low, cell, wait)
+    np.maximum.at(high, cell, wait)
+    low[np.isinf(low)] = 0
+    cells = np.stack([np.bincount(cell, minlength=size), np.bincount(cell, weights=wait, minlength=size), low, high])
+    return cells.reshape(len(CELL_FIELDS), n_rides, 24)
+
+def unpack_cells(cells):
+    """{'cell_count', 'cell_sum', 'cell_min', 'cell_max'} (n_rides, 24) arrays from hour_cells."""
+    fields = {f"cell_{name}": values for name, values in zip(CELL_FIELDS, cells)}
+    fields["cell_count"] = fields["cell_count"].astype(np.int64)
+    return fields
+
+def pick_tier(span, available=("5min", "hour", "day"), target=TARGET_POINTS):
+    """
+    Finest tier whose points per ride over `span` seconds stay within
+    `target`; the daily tier when none do (or when only it is available).
+    """
+    for name, step in TIERS:
+        if name in available and span / step <= target:
+            return name
+    return "day"
+
+def tier_rows(day, roll, tier):
+    """
+    (ts, ride, count, sum, min, max) arrays of one day's rollup at `tier`;
+    `day` is days since the epoch.
+    """
+    start = day * 86400
+    if tier == "5min":
+        return (start + roll["five_slot"].astype(np.int64) * FIVE_MINUTES, roll["five_ride"],
+                roll["five_count"], roll["five_sum"], roll["five_min"], roll["five_max"])
+    count = roll["cell_count"]
+    if tier == "hour":
+        ride, hour = np.nonzero(count)
+        return (start + hour * 3600, ride, count[ride, hour], roll["cell_sum"][ride, hour],
+                roll["cell_min"][ride, hour], roll["cell_max"][ride, hour])
+    seen = count > 0
+    ride = np.flatnonzero(seen.any(axis=1))
+    low = np.where(seen, roll["cell_min"], np.inf).min(axis=1)
+    return (np.full(len(ride), start), ride, count.sum(axis=1)[ride], roll["cell_sum"].sum(axis=1)[ride],
+            low[ride], roll["cell_max"].max(axis=1)[ride])
+
+def to_frame(rows, names):
+    """
+    Tier rows as DataFrame(work_date, entity_description_short,
+    wait_time_max, wait_time_mean, wait_time_min, samples), one row per ride
+    and bucket. wait_time_max is the highest posted wait in the bucket, so
+    it means what the raw column does.
+    """
+    ts, ride, count, total, low, high = (np.concatenate(parts) for parts in zip(*rows))
+    order = np.lexsort((ride, ts))
+    return pd.DataFrame({
+        "work_date": ts[order].astype("datetime64[s]"),
+        "entity_description_short": np.asarray(names, dtype=object)[ride[order]],
+        "wait_time_max": high[order].astype(float),
+        "wait_time_mean": total[order] / count[order],
+        "wait_time_min": low[order].astype(float),
+        "samples": count[order],
+    })
@@ -0,0 +1,112 @@
+import base64
+import datetime
+import decimal
+import json
+import math
+import numpy as np
+import pandas as pd
+
+# plotly.js (>= 2.28) decodes {"dtype", "bdata"} typed arrays natively.
+# int64/uint64 are not supported there, so they are narrowed first.
+TYPED_ARRAY_DTYPES = {'i1', 'u1', 'i2', 'u2', 'i4', 'u4', 'f4', 'f8'}
+
+# Arrays shorter than this are cheaper to ship as plain JSON lists.
+TYPED_ARRAY_MIN_SIZE = 64
+
+def _narrow_int(arr):
+    if arr.size == 0:
+        return arr.astype('i4')
+    lo, hi = arr.min(), arr.max()
+    for dtype in ('i1', 'i2', 'i4'):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return arr.astype(dtype)
+    return arr.astype('f8')
+
+def _datetimes_to_list(arr):
+    # Second precision unless the data actually carries sub-second parts
+    nat = np.isnat(arr)
+    valid = arr[~nat]
+    unit = 's' if (valid.astype('datetime64[s]') == valid).all() else 'ms'
+    out = np.datetime_as_string(arr, unit=unit).astype(object)
+    out[nat] = None
+    return out.tolist()
+
+def _floats_to_list(arr):
+    mask = ~np.isfinite(arr)
+    if not mask.any():
+        return arr.tolist()
+    out = arr.astype(object)
+    out[mask] = None
+    return out.tolist()
+
+def encode_array(arr, typed_arrays=False):
+    """
+    Converts a numpy array into a JSON-ready value in one vectorized step:
+    a list, or a plotly typed-array dict when `typed_arrays` is set.
+    """
+    kind = arr.dtype.kind
+    if kind == 'M':
+        return _datetimes_to_list(arr)
+    if kind == 'm':
+        return (arr / np.timedelta64(1, 'ms')).tolist()
+    if kind == 'b':
+        return arr.tolist()
+    if kind in 'iuf':
+        if arr.ndim > 1 and not typed_arrays:
+            return [encode_array(row) for row in arr]
+        if typed_arrays and arr.size >= TYPED_ARRAY_MIN_SIZE:
+            if kind == 'f' and np.isfinite(arr).all() and (arr == np.round(arr)).all():
+                # Whole-number floats (counts, minutes) pack far tighter as ints
+                arr = _narrow_int(arr)
+            elif kind in 'iu' and arr.dtype.str[1:] not in TYPED_ARRAY_DTYPES:
+                arr = _narrow_int(arr)
+            arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+            typed = {'dtype': arr.dtype.str[1:], 'bdata': base64.b64encode(arr.tobytes()).decode('ascii')}
+            if arr.ndim > 1:
+                typed['shape'] = ','.join(str(n) for n in arr.shape)
+            return typed
+        return _floats_to_list(arr) if kind == 'f' else arr.tolist()
+    # Object arrays (labels, pre-formatted dates, mixed None): leftovers such
+    # as Timestamps come back through _default
+    return arr.tolist()
+
+def _default(obj, typed_arrays=False):
+    if isinstance(obj, np.ndarray):
+        return encode_array(obj, typed_arrays)
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return encode_array(obj.to_numpy(), typed_arrays)
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        return None if isinstance(value, float) and not math.isfinite(value) else value
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if hasattr(obj, 'to_plotly_json'):
+        return obj.to_plotly_json()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _strict(obj):
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _strict(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_strict(v) for v in obj]
+    return obj
+
+def dumps(obj, typed_arrays=False):
+    """
+    Drop-in replacement for json.dumps(obj, cls=PlotlyJSONEncoder).
+    The C encoder walks the figure skeleton and only arrays reach Python,
+    where they are converted in bulk. PlotlyJSONEncoder always decodes and
+    re-encodes its output to scrub NaN; here that only happens when a bare
+    Python NaN/Infinity actually made it into the output.
+    """
+    encoded = json.dumps(obj, default=lambda o: _default(o, typed_arrays), separators=(',', ':'))
+    if 'NaN' in encoded or 'Infinity' in encoded:
+        encoded = json.dumps(_strict(json.loads(encoded)), separators=(',', ':'))
+    return encoded
@@ -0,0 +1,64 @@
+"""
+Mergeable quantile sketches for wait times.
+
+Each sketch is an array of counts over fixed, logarithmically spaced
+buckets (the DDSketch layout): a wait w > 0 lands in bucket
+ceil(log(w) / log(GAMMA)), so every bucket spans a RELATIVE_ACCURACY band.
+A quantile q read back is within RELATIVE_ACCURACY of the wait at rank
+ceil(q * n) (the nearest-rank quantile), however many waits went in.
+Interpolated percentiles (pandas' default) can also sit between two
+neighbouring waits, which adds their gap: about 2.2% at p99 on a year of
+synthetic data. Because the bucket layout never changes,
+merging two sketches (two days, two workers) is adding their count arrays,
+and building sketches for many keys at once (rides, hours) is one bincount.
+"""
+import numpy as np
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+MIN_WAIT = 1.0  # waits below this (closed rides) share the zero bucket
+MAX_WAIT = 12 * 60.0  # longer waits are clamped
+N_BUCKETS = int(np.ceil(np.log(MAX_WAIT) / np.log(GAMMA))) + 2
+
+def bucket_index(waits):
+    """Bucket of every wait (NaN must be dropped first)."""
+    w = np.minimum(np.asarray(waits, dtype=float), MAX_WAIT)
+    index = np.zeros(len(w), dtype=np.int64)
+    positive = w >= MIN_WAIT
+    index[positive] = 1 + np.ceil(np.log(w[positive]) / np.log(GAMMA)).astype(np.int64)
+    return index
+
+def bucket_values():
+    """Representative wait of each bucket (the zero bucket reads as 0)."""
+    k = np.arange(N_BUCKETS - 1)
+    return np.concatenate([[0.0], 2 * GAMMA ** k / (GAMMA + 1)])
+
+def build(keys, waits, n_keys):
+    """(n_keys, N_BUCKETS) sketch counts: one sketch per key (ride, hour...)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    cells = keys * N_BUCKETS + bucket_index(waits)
+    return np.bincount(cells, minlength=n_keys * N_BUCKETS).reshape(n_keys, N_BUCKETS).astype(np.int32)
+
+def merge(a, b):
+    """Sum of two sketch arrays, padding the one with fewer keys."""
+    if len(a) < len(b):
+        a, b = b, a
+    out = a.astype(np.int64, copy=True)
+    out[:len(b)] += b
+    return out
+
+def quantiles(counts, qs):
+    """
+    (n_keys, len(qs)) nearest-rank quantile estimates from sketch counts
+    (one row per key, or a single 1-D sketch). Keys with no waits give NaN.
+    """
+    counts = np.atleast_2d(counts)
+    qs = np.asarray(qs, dtype=float)
+    cum = np.cumsum(counts, axis=1)
+    total = cum[:, -1]
+    # Rank of each quantile; its bucket is the first whose running count reaches it
+    rank = np.maximum(np.ceil(qs[None, :] * total[:, None]), 1)
+    index = (cum[:, :, None] < rank[:, None, :]).sum(axis=1)
+    out = bucket_values()[np.minimum(index, N_BUCKETS - 1)]
+    out[total == 0] = np.nan
+    return out
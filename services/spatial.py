@@ -0,0 +1,95 @@
+"""
+Spatial queries over attraction positions: "what is close to me with a short
+line?". Live waits come from the park graph at query time and filter the
+candidates. Up to BRUTE_FORCE_MAX attractions one vectorised pass over every
+distance is fastest; larger parks query a KD-tree over the (static)
+coordinates instead.
+"""
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+
+from services import park_graph
+
+# Attractions up to which a full distance scan beats the KD-tree per query
+# (bench_routing.bench_nearby: 0.025 vs 0.087 ms at 250, even near 4000)
+BRUTE_FORCE_MAX = 4000
+
+class AttractionIndex:
+    """A park's attractions (junctions and entrances left out) for nearest-neighbour queries."""
+
+    def __init__(self, park):
+        self.park = park
+        self.names = [n for n in park.attractions if park.kinds.get(n, "ride") != "entrance"]
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self.ids = np.array([park.index[n] for n in self.names], dtype=np.int64)
+        self.xy = park.xy[self.ids] if len(self.ids) else np.zeros((0, 2))
+        self.tree = cKDTree(self.xy) if len(self.ids) > BRUTE_FORCE_MAX else None
+
+    def nearby(self, x, y, k=5, radius=None, max_wait=None, exclude=()):
+        """
+        Up to `k` attractions nearest to (x, y), optionally only those within
+        `radius` map units and with a current wait of at most `max_wait`.
+        Returns [{name, zone, distance, wait}] nearest first.
+        """
+        n = len(self.names)
+        if n == 0 or k <= 0:
+            return []
+        waits = self.park.wait_array()[self.ids]
+        limit = np.inf if radius is None else radius
+        skip = [self.position[name] for name in exclude if name in self.position]
+        if self.tree is None:
+            dist, idx = self._scan(x, y, k, limit, waits, max_wait, skip)
+        else:
+            dist, idx = self._query(x, y, k, limit, waits, max_wait, skip)
+        results = []
+        for d, i in zip(dist, idx):
+            name = self.names[i]
+            results.append({'name': name, 'zone': self.park.zones.get(name), 'distance': round(float(d), 2), 'wait': float(waits[i])})
+        return results
+
+    def _scan(self, x, y, k, limit, waits, max_wait, skip):
+        """(distances, indices) of the k nearest that pass, from every distance at once."""
+        dist = np.hypot(self.xy[:, 0] - x, self.xy[:, 1] - y)
+        keep = dist <= limit
+        if max_wait is not None:
+            keep &= waits <= max_wait
+        keep[skip] = False
+        idx = np.flatnonzero(keep)
+        if len(idx) > k:
+            idx = idx[np.argpartition(dist[idx], k - 1)[:k]]
+        idx = idx[np.argsort(dist[idx], kind='stable')]
+        return dist[idx], idx
+
+    def _query(self, x, y, k, limit, waits, max_wait, skip):
+        """(distances, indices) of the k nearest that pass, from the KD-tree."""
+        n = len(self.names)
+        # Ask the tree for a few more than k and widen while the wait filter
+        # (or excluded names) leaves us short
+        want = min(n, k + len(skip)) if max_wait is None else min(n, 4 * k + len(skip))
+        while True:
+            dist, idx = self.tree.query((x, y), k=want, distance_upper_bound=limit)
+            dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+            found = idx < n
+            dist, idx = dist[found], idx[found]
+            keep = np.ones(len(idx), dtype=bool)
+            if max_wait is not None:
+                keep &= waits[idx] <= max_wait
+            if skip:
+                keep &= ~np.isin(idx, skip)
+            if keep.sum() >= k or want >= n or len(idx) < want:
+                break
+            want = min(n, want * 4)
+        return dist[keep][:k], idx[keep][:k]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_attraction_index():
+    """This worker's AttractionIndex for the shared park graph."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AttractionIndex(park_graph.get_park_graph())
+    return _index
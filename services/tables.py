@@ -0,0 +1,184 @@
+"""
+Paginated, sortable JSON tables for the pages' raw-data views.
+
+Pages use keyset (cursor) pagination: each page is "the next `limit` rows
+after the last one you saw" in the chosen order, so a page deep into a
+large table costs the same indexed range scan as the first one (OFFSET
+would read and discard every earlier row). The sort column is always
+followed by the table's unique key so rows with equal values page
+deterministically. data/table_indexes.sql holds the matching indexes.
+
+Cursors are opaque to the browser: base64 JSON of the last row's sort and
+key values.
+"""
+import base64
+import json
+import numpy as np
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 200
+
+# Per table: the columns served, which of them can be sorted on, the unique
+# key that breaks ties, the default order and the columns the filters act on
+# (search: case-insensitive substring, date: from/to, value: min/max).
+TABLES = {
+    'waiting_times': {
+        'columns': ['work_date', 'entity_description_short', 'wait_time_max'],
+        'sortable': ['work_date', 'entity_description_short', 'wait_time_max'],
+        'key': ['id'],
+        'sort': 'work_date', 'order': 'desc',
+        'search': 'entity_description_short', 'date': 'work_date', 'value': 'wait_time_max',
+    },
+    'attendance': {
+        'columns': ['usage_date', 'attendance'],
+        'sortable': ['usage_date', 'attendance'],
+        'key': ['id'],
+        'sort': 'usage_date', 'order': 'desc',
+        'search': None, 'date': 'usage_date', 'value': 'attendance',
+    },
+    'visitors': {
+        'columns': ['age', 'weight_kg', 'accompanied_with'],
+        'sortable': ['age', 'weight_kg', 'accompanied_with'],
+        'key': ['id'],
+        'sort': 'id', 'order': 'asc',
+        'search': 'accompanied_with', 'date': None, 'value': 'age',
+    },
+}
+
+# /rides: the latest sample of every ride, built per request from the cached
+# frame (see app.ride_table_rows) and paged in memory.
+RIDE_TABLE = {
+    'columns': ['name', 'wait', 'status', 'p50', 'p90', 'slope', 'updated'],
+    'sortable': ['name', 'wait', 'status', 'p50', 'p90', 'slope', 'updated'],
+    'key': ['name'],
+    'sort': 'wait', 'order': 'desc',
+    'search': 'name', 'date': None, 'value': 'wait',
+}
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    """Values of the last row seen; raises ValueError for a malformed cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+def parse_args(spec, args):
+    """
+    Validated paging options from query args (sort, order, limit, after,
+    q, from, to, min, max). Raises ValueError with a message for the client.
+    """
+    sort = args.get('sort') or spec['sort']
+    if sort not in spec['sortable'] and sort not in spec['key']:
+        raise ValueError(f"Cannot sort by {sort}; choose one of {', '.join(spec['sortable'])}")
+    order = args.get('order') or (spec['order'] if sort == spec['sort'] else 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError('"order" must be asc or desc')
+    try:
+        limit = min(max(int(args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        low = float(args['min']) if args.get('min') else None
+        high = float(args['max']) if args.get('max') else None
+    except ValueError:
+        raise ValueError('"limit", "min" and "max" must be numbers')
+    columns = [sort] + [k for k in spec['key'] if k != sort]
+    after = decode_cursor(args['after']) if args.get('after') else None
+    if after is not None and len(after) != len(columns):
+        raise ValueError("Invalid cursor")
+    return {
+        'sort': sort, 'order': order, 'limit': limit, 'after': after, 'columns': columns,
+        'q': args.get('q') or None, 'from': args.get('from') or None, 'to': args.get('to') or None,
+        'min': low, 'max': high,
+    }
+
+def _quote(value):
+    # PostgREST filter values: quoted so commas and parentheses stay literal
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def keyset_filter(columns, values, order):
+    """
+    PostgREST `or` filter for rows after `values` in (columns...) order:
+    c1 > v1, or c1 = v1 and c2 > v2, ... (< for descending).
+    """
+    op = 'gt' if order == 'asc' else 'lt'
+    terms = []
+    for i, column in enumerate(columns):
+        equal = [f"{c}.eq.{_quote(v)}" for c, v in zip(columns[:i], values[:i])]
+        step = f"{column}.{op}.{_quote(values[i])}"
+        terms.append(f"and({','.join(equal + [step])})" if equal else step)
+    return ','.join(terms)
+
+def fetch_page(supabase, table, options):
+    """
+    One page of `table` from Supabase: {'rows', 'next'}. `next` is the
+    cursor for the following page, or None on the last one.
+    """
+    spec = TABLES[table]
+    columns = list(dict.fromkeys(spec['columns'] + spec['key']))
+    query = supabase.table(table).select(', '.join(columns))
+    if options['q'] and spec['search']:
+        query = query.ilike(spec['search'], f"%{options['q']}%")
+    if spec['date']:
+        if options['from']:
+            query = query.gte(spec['date'], options['from'])
+        if options['to']:
+            query = query.lte(spec['date'], options['to'])
+    if spec['value']:
+        if options['min'] is not None:
+            query = query.gte(spec['value'], options['min'])
+        if options['max'] is not None:
+            query = query.lte(spec['value'], options['max'])
+    # Empty sort values have no place in the keyset order
+    query = query.not_.is_(options['sort'], 'null')
+    if options['after'] is not None:
+        query = query.or_(keyset_filter(options['columns'], options['after'], options['order']))
+    desc = options['order'] == 'desc'
+    for column in options['columns']:
+        query = query.order(column, desc=desc)
+    # One extra row tells us whether another page exists
+    rows = query.limit(options['limit'] + 1).execute().data
+    return _page(rows, options)
+
+def _page(rows, options):
+    more = len(rows) > options['limit']
+    rows = rows[:options['limit']]
+    next_cursor = encode_cursor([rows[-1][c] for c in options['columns']]) if more else None
+    return {'rows': rows, 'next': next_cursor}
+
+def page_rows(rows, spec, options):
+    """
+    The same paging over an in-memory list of dicts (e.g. the latest sample
+    of every ride, or a table read from the analytics mirror).
+    """
+    if options['q'] and spec['search']:
+        needle = options['q'].lower()
+        rows = [r for r in rows if needle in str(r.get(spec['search'], '')).lower()]
+    if spec['date'] and (options['from'] or options['to']):
+        # ISO dates compare as strings
+        low, high, col = options['from'], options['to'], spec['date']
+        rows = [r for r in rows if r.get(col) is not None
+                and (low is None or str(r[col]) >= low) and (high is None or str(r[col]) <= high)]
+    if spec['value'] and (options['min'] is not None or options['max'] is not None):
+        low = -np.inf if options['min'] is None else options['min']
+        high = np.inf if options['max'] is None else options['max']
+        rows = [r for r in rows if r.get(spec['value']) is not None and low <= r[spec['value']] <= high]
+    columns = options['columns']
+    rows = [r for r in rows if r.get(columns[0]) is not None]
+    keys = [tuple(r[c] for c in columns) for r in rows]
+    order = sorted(range(len(rows)), key=keys.__getitem__, reverse=options['order'] == 'desc')
+    if options['after'] is not None:
+        after = tuple(options['after'])
+        if options['order'] == 'desc':
+            order = [i for i in order if keys[i] < after]
+        else:
+            order = [i for i in order if keys[i] > after]
+    picked = [rows[i] for i in order[:options['limit'] + 1]]
+    return _page(picked, options)
+
+def json_safe(rows):
+    """numpy scalars -> plain Python so the rows and cursors serialize."""
+    return [{k: v.item() if isinstance(v, np.generic) else v for k, v in row.items()} for row in rows]
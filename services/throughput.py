@@ -0,0 +1,170 @@
+"""
+Ride throughput (guests per hour) from per-ride capacity and wait dynamics.
+
+Hourly capacity per ride is riders per cycle * 60 / cycle minutes, taken
+from the facilities table, with defaults by facility type for missing
+figures. In each hour a ride with a queue of at least one cycle is assumed
+to run full (serving its capacity); a shorter queue means partly empty
+loads. A rising wait means arrivals outpaced service: the queue grew by
+capacity * (wait change per hour) / 60 guests, so guests arriving per hour
+are served plus that growth. Arrivals are the figure /rides shows: served
+alone is just capacity whenever there is a queue.
+"""
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+# Facilities columns tried, in order, for riders per cycle and cycle minutes
+CAPACITY_COLUMNS = ('riders_per_cycle', 'capacity', 'ride_capacity', 'vehicle_capacity')
+CYCLE_COLUMNS = ('cycle_minutes', 'cycle_time', 'ride_duration', 'duration')
+
+# (riders per cycle, cycle minutes) by keyword in the facility type
+TYPE_DEFAULTS = [
+    ('Show', (250, 20)),
+    ('Coaster', (24, 1.5)),
+    ('Thrill', (24, 2)),
+    ('Water', (12, 1)),
+    ('Family', (20, 2.5)),
+    ('Kids', (16, 2.5)),
+]
+DEFAULT_RIDE = (24, 2.5)
+
+# Words that say nothing about which ride a name means
+NAME_STOPWORDS = {'the', 'a', 'an', 'of', 'and', 'at', 'in', 'on', 'ride', 'rides', 'show', 'attraction', 'experience'}
+
+def _first_numeric(df, columns):
+    for col in columns:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce')
+            if values.notna().any():
+                return values.to_numpy(dtype=float)
+    return np.full(len(df), np.nan)
+
+def facility_capacity(facilities):
+    """
+    DataFrame indexed by lower-cased facility name with riders, cycle
+    (minutes) and hourly (guests per hour at full loads).
+    """
+    if facilities is None or facilities.empty or 'facility_name' not in facilities.columns:
+        return pd.DataFrame(columns=['riders', 'cycle', 'hourly'])
+    kind = facilities['type'].astype(str) if 'type' in facilities.columns else pd.Series('', index=facilities.index)
+    conditions = [kind.str.contains(key, case=False, na=False).to_numpy() for key, _ in TYPE_DEFAULTS]
+    riders_default = np.select(conditions, [d[0] for _, d in TYPE_DEFAULTS], DEFAULT_RIDE[0])
+    cycle_default = np.select(conditions, [d[1] for _, d in TYPE_DEFAULTS], DEFAULT_RIDE[1])
+
+    riders = _first_numeric(facilities, CAPACITY_COLUMNS)
+    cycle = _first_numeric(facilities, CYCLE_COLUMNS)
+    riders = np.where(riders > 0, riders, riders_default)
+    cycle = np.where(cycle > 0, cycle, cycle_default)
+    out = pd.DataFrame({'riders': riders, 'cycle': cycle, 'hourly': riders * 60 / cycle},
+                       index=facilities['facility_name'].astype(str).str.lower())
+    return out[~out.index.duplicated()]
+
+def name_tokens(name):
+    """Lower-cased words of a ride or facility name, stopwords dropped."""
+    return frozenset(re.findall(r"[a-z0-9]+", str(name).lower().replace("'", ""))) - NAME_STOPWORDS
+
+def match_facility(ride, facilities):
+    """
+    The facility name meaning `ride`, or None. `facilities` is
+    {name: name_tokens(name)}. Same words first; else the facility whose
+    words contain all of the ride's (or the reverse) with the most in
+    common, when exactly one does.
+    """
+    words = name_tokens(ride)
+    if not words:
+        return None
+    same = [name for name, tokens in facilities.items() if tokens == words]
+    if same:
+        return same[0]
+    best, best_score, tied = None, 0.0, False
+    for name, tokens in facilities.items():
+        if not tokens or not (words <= tokens or tokens <= words):
+            continue
+        score = len(words & tokens) / len(words | tokens)
+        if score > best_score:
+            best, best_score, tied = name, score, False
+        elif score == best_score:
+            tied = True
+    return None if tied else best
+
+def match_rides(ride_names, capacity):
+    """
+    Capacity rows aligned with `ride_names` (see match_facility). Rides
+    matching no facility get NaN: no capacity rather than a guessed one.
+    """
+    facilities = {name: name_tokens(name) for name in capacity.index}
+    keys = [match_facility(ride, facilities) for ride in ride_names]
+    found = capacity.reindex(keys)
+    riders = found['riders'].to_numpy(dtype=float)
+    cycle = found['cycle'].to_numpy(dtype=float)
+    return pd.DataFrame({'riders': riders, 'cycle': cycle, 'hourly': riders * 60 / cycle}, index=list(ride_names))
+
+def hourly_throughput(df, facilities):
+    """
+    Per ride and hour: mean wait, capacity, guests served and estimated
+    arrivals (guests per hour). `df` is waiting_times rows; rides without
+    a facility match get NaN capacity, served and arrivals.
+    """
+    frame = pd.DataFrame({
+        'ride': df['entity_description_short'].to_numpy(),
+        'hour': pd.to_datetime(df['work_date']).dt.floor('h').to_numpy(),
+        'wait': pd.to_numeric(df['wait_time_max'], errors='coerce').to_numpy(dtype=float),
+    })
+    hourly = frame.groupby(['ride', 'hour'], sort=True)['wait'].mean().reset_index()
+    if hourly.empty:
+        return hourly.assign(capacity=[], served=[], arrivals=[])
+
+    rides = hourly['ride'].to_numpy()
+    caps = match_rides(pd.unique(rides), facility_capacity(facilities))
+    codes = pd.Index(caps.index).get_indexer(rides)
+    capacity = caps['hourly'].to_numpy()[codes]
+    cycle = caps['cycle'].to_numpy()[codes]
+    wait = np.nan_to_num(hourly['wait'].to_numpy(), nan=0.0)
+
+    # Full loads once the queue is at least one cycle long
+    served = np.where(wait > 0, capacity * np.clip(wait / cycle, 0, 1), 0.0)
+
+    # Wait change per hour within each ride (0 for a ride's first hour)
+    hours = hourly['hour'].to_numpy().astype('datetime64[m]').astype(np.int64) / 60.0
+    same = np.r_[False, rides[1:] == rides[:-1]]
+    gap = np.diff(hours, prepend=hours[0])
+    slope = np.zeros(len(wait))
+    np.divide(np.diff(wait, prepend=wait[0]), gap, out=slope, where=same & (gap > 0))
+    arrivals = np.maximum(served + capacity * slope / 60, 0)
+
+    return hourly.assign(wait=wait, capacity=capacity, served=served, arrivals=arrivals)
+
+_snapshot = None  # (key, result)
+_snapshot_lock = threading.Lock()
+
+def snapshot_throughput(df, facilities):
+    """
+    hourly_throughput, computed once per data snapshot. Wait rows come
+    ordered by work_date, so row count plus first and last timestamps
+    identify a snapshot without scanning it.
+    """
+    global _snapshot
+    dates = df['work_date']
+    key = (len(df), str(dates.iloc[0]) if len(df) else None, str(dates.iloc[-1]) if len(df) else None,
+           0 if facilities is None or facilities.empty else int(pd.util.hash_pandas_object(facilities).sum()))
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot[0] == key:
+            return _snapshot[1]
+    result = hourly_throughput(df, facilities)
+    with _snapshot_lock:
+        _snapshot = (key, result)
+    return result
+
+def current_throughput(df, facilities):
+    """
+    Estimated guests arriving per hour at each ride in its most recent hour
+    (pd.Series by ride); rides without a known capacity are left out.
+    """
+    hourly = snapshot_throughput(df, facilities)
+    if hourly.empty:
+        return pd.Series(dtype=float)
+    # Each ride's latest hour as is (groupby.last would skip back past NaN)
+    latest = hourly.drop_duplicates('ride', keep='last')
+    return latest.set_index('ride')['arrivals'].dropna()
@@ -0,0 +1,120 @@
+"""
+Hour-of-week wait profile cube: ride x day-of-week x hour.
+
+Every cell keeps the count, sum and max of the waits seen at that ride,
+weekday (0 = Monday) and hour, plus a quantile sketch (services.sketch), as
+dense NumPy arrays indexed by integers. New waits are added in place, so the
+cube stays current without rescanning history, and the park's per-hour,
+day x hour and ride x hour views are sums over its axes.
+"""
+import os
+import numpy as np
+
+from services import sketch
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+AXES = ("ride", "day", "hour")
+
+class WaitCube:
+    def __init__(self, n_rides=0):
+        self.count = np.zeros((n_rides, 7, 24), dtype=np.int64)
+        self.sum = np.zeros((n_rides, 7, 24))
+        self.max = np.zeros((n_rides, 7, 24))  # waits are never negative
+        self.sketch = np.zeros((n_rides, 7, 24, sketch.N_BUCKETS), dtype=np.int32)
+
+    @property
+    def n_rides(self):
+        return len(self.count)
+
+    def _grow(self, n_rides):
+        extra = n_rides - self.n_rides
+        if extra <= 0:
+            return
+        self.count = np.concatenate([self.count, np.zeros((extra, 7, 24), dtype=np.int64)])
+        self.sum = np.concatenate([self.sum, np.zeros((extra, 7, 24))])
+        self.max = np.concatenate([self.max, np.zeros((extra, 7, 24))])
+        self.sketch = np.concatenate([self.sketch, np.zeros((extra, 7, 24, sketch.N_BUCKETS), dtype=np.int32)])
+
+    def add(self, ts, ride, wait):
+        """Adds waits at `ts` (wall-clock seconds since the epoch) for ride codes `ride`."""
+        wait = np.asarray(wait, dtype=float)
+        ok = ~np.isnan(wait)
+        ts, ride, wait = np.asarray(ts)[ok], np.asarray(ride, dtype=np.int64)[ok], wait[ok]
+        if not len(wait):
+            return
+        self._grow(int(ride.max()) + 1)
+        # 1970-01-01 was a Thursday
+        day = (ts // 86400 + 3) % 7
+        hour = (ts // 3600) % 24
+        cell = (ride * 7 + day) * 24 + hour
+        size = self.count.size
+        self.count += np.bincount(cell, minlength=size).reshape(self.count.shape)
+        self.sum += np.bincount(cell, weights=wait, minlength=size).reshape(self.sum.shape)
+        np.maximum.at(self.max.reshape(-1), cell, wait)
+        # Scattered in place: a dense bincount over every sketch bucket would
+        # allocate the whole cube again for each batch
+        np.add.at(self.sketch.reshape(-1), cell * sketch.N_BUCKETS + sketch.bucket_index(wait), 1)
+
+    def add_cells(self, day, count, total, peak, sketch_index, sketch_count):
+        """
+        Adds one day's pre-aggregated (ride, hour) cells (see
+        analytics._day_rollup); `day` is days since the epoch.
+        """
+        n = len(count)
+        self._grow(n)
+        weekday = (day + 3) % 7
+        self.count[:n, weekday] += count
+        self.sum[:n, weekday] += total
+        np.maximum(self.max[:n, weekday], peak, out=self.max[:n, weekday])
+        cell, bucket = np.divmod(np.asarray(sketch_index, dtype=np.int64), sketch.N_BUCKETS)
+        ride, hour = np.divmod(cell, 24)
+        flat = ((ride * 7 + weekday) * 24 + hour) * sketch.N_BUCKETS + bucket
+        np.add.at(self.sketch.reshape(-1), flat, np.asarray(sketch_count, dtype=np.int32))
+
+    def open_count(self):
+        """
+        Readings per cell with the ride open: all but those in the sketch's
+        zero bucket (waits under sketch.MIN_WAIT, posted while closed).
+        """
+        return self.count - self.sketch[..., 0]
+
+    def _axes(self, keep):
+        unknown = set(keep) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown cube axes: {', '.join(sorted(unknown))}")
+        return tuple(i for i, axis in enumerate(AXES) if axis not in keep)
+
+    def mean(self, keep):
+        """Mean wait over the axes not in `keep` (NaN where nothing was seen)."""
+        drop = self._axes(keep)
+        count = self.count.sum(axis=drop)
+        total = self.sum.sum(axis=drop)
+        out = np.full(count.shape, np.nan)
+        np.divide(total, count, out=out, where=count > 0)
+        return out, count
+
+    def peak(self, keep):
+        """Highest wait over the axes not in `keep` (NaN where nothing was seen)."""
+        drop = self._axes(keep)
+        count = self.count.sum(axis=drop)
+        return np.where(count > 0, self.max.max(axis=drop, initial=0), np.nan)
+
+    def quantiles(self, keep, qs):
+        """Quantiles over the axes not in `keep`: shape (*kept axes, len(qs))."""
+        drop = self._axes(keep)
+        merged = self.sketch.sum(axis=drop) if drop else self.sketch
+        shape = merged.shape[:-1]
+        return sketch.quantiles(merged.reshape(-1, sketch.N_BUCKETS), qs).reshape(*shape, len(qs))
+
+    def save(self, path):
+        # Mostly empty cells compress well; write then rename like the partitions
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, count=self.count, sum=self.sum, max=self.max, sketch=self.sketch)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        cube = cls()
+        with np.load(path, allow_pickle=False) as data:
+            cube.count, cube.sum, cube.max, cube.sketch = data["count"], data["sum"], data["max"], data["sketch"]
+        return cube
@@ -0,0 +1,54 @@
+// Shared renderer for the chart specs produced by services/plots.py.
+// Every chart is a {data, layout} JSON object; "{}" means "no data".
+
+var RAHHAL_CHART_CONFIG = { responsive: true, displayModeBar: false };
+
+function renderChart(id, spec) {
+    var el = document.getElementById(id);
+    if (!el || !spec || !spec.data) {
+        return;
+    }
+    try {
+        Plotly.newPlot(el, spec.data, spec.layout || {}, RAHHAL_CHART_CONFIG);
+        enableLabelDetail(el);
+    } catch (e) {
+        console.error("Chart Error (" + id + "):", e);
+    }
+}
+
+// Level-of-detail labels (layout.meta.labels, see plots.generate_map_json):
+// once the view holds at most `max` labelled points, all visible ones are
+// shown on trace `trace`; zoomed further out it goes back to the original set.
+function enableLabelDetail(el) {
+    var lod = el.layout && el.layout.meta && el.layout.meta.labels;
+    if (!lod || typeof el.on !== "function") {
+        return;
+    }
+    var base = el.data[lod.trace];
+    var original = { x: [base.x], y: [base.y], text: [base.text] };
+    el.on("plotly_relayout", function () {
+        var xr = el.layout.xaxis.range, yr = el.layout.yaxis.range;
+        if (!xr || !yr) {
+            return;
+        }
+        var x = [], y = [], text = [];
+        for (var i = 0; i < lod.text.length && x.length <= lod.max; i++) {
+            if (lod.x[i] >= xr[0] && lod.x[i] <= xr[1] && lod.y[i] >= yr[0] && lod.y[i] <= yr[1]) {
+                x.push(lod.x[i]);
+                y.push(lod.y[i]);
+                text.push(lod.text[i]);
+            }
+        }
+        var update = x.length <= lod.max ? { x: [x], y: [y], text: [text] } : original;
+        Plotly.restyle(el, update, [lod.trace]);
+    });
+}
+
+// Fetches a spec from /api/charts/<page>/<chart> and renders it. Calls made
+// back to back run in parallel, so a page's charts load concurrently.
+function loadChart(id, url) {
+    return fetch(url, { credentials: "same-origin" })
+        .then(function (response) { return response.ok ? response.json() : {}; })
+        .then(function (spec) { renderChart(id, spec); })
+        .catch(function (e) { console.error("Chart Error (" + id + "):", e); });
+}
@@ -0,0 +1,97 @@
+// Incremental data tables over /api/tables/<table> (see services/tables.py).
+//
+// The page renders an empty <table> whose <th data-col="..."> cells name the
+// sortable columns; loadTable fills its <tbody> one page at a time, appends
+// the next page on "Load more" (keyset cursor) and restarts from the first
+// page when a header is clicked or the search box changes.
+
+function escapeHtml(value) {
+    return String(value === null || value === undefined ? "" : value)
+        .replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+}
+
+// renderRow(row) returns the <tr> HTML for one row (values escaped by the caller)
+function loadTable(tableId, url, renderRow, options) {
+    var table = document.getElementById(tableId);
+    if (!table) {
+        return;
+    }
+    options = options || {};
+    var body = table.querySelector("tbody");
+    var state = { sort: options.sort || "", order: options.order || "", q: "", next: null, busy: false };
+
+    var more = document.createElement("button");
+    more.type = "button";
+    more.className = "table-more";
+    more.textContent = "Load more";
+    more.style.display = "none";
+    table.parentNode.insertBefore(more, table.nextSibling);
+
+    function query(after) {
+        var params = new URLSearchParams();
+        if (state.sort) { params.set("sort", state.sort); }
+        if (state.order) { params.set("order", state.order); }
+        if (state.q) { params.set("q", state.q); }
+        if (options.limit) { params.set("limit", options.limit); }
+        if (after) { params.set("after", after); }
+        return url + "?" + params.toString();
+    }
+
+    function markSorted() {
+        table.querySelectorAll("th[data-col]").forEach(function (th) {
+            var active = th.getAttribute("data-col") === state.sort;
+            th.setAttribute("aria-sort", active ? (state.order === "desc" ? "descending" : "ascending") : "none");
+        });
+    }
+
+    function load(after) {
+        if (state.busy) {
+            return;
+        }
+        state.busy = true;
+        fetch(query(after), { credentials: "same-origin" })
+            .then(function (response) { return response.ok ? response.json() : { rows: [], next: null }; })
+            .then(function (page) {
+                state.sort = page.sort || state.sort;
+                state.order = page.order || state.order;
+                var html = (page.rows || []).map(renderRow).join("");
+                if (!after) {
+                    body.innerHTML = html || '<tr><td colspan="' + table.querySelectorAll("th").length +
+                        '" style="text-align: center; padding: 20px;">' + escapeHtml(options.empty || "No data available") + "</td></tr>";
+                } else {
+                    body.insertAdjacentHTML("beforeend", html);
+                }
+                state.next = page.next;
+                more.style.display = page.next ? "" : "none";
+                markSorted();
+                if (options.onPage) { options.onPage(page); }
+            })
+            .catch(function (e) { console.error("Table Error (" + tableId + "):", e); })
+            .then(function () { state.busy = false; });
+    }
+
+    more.addEventListener("click", function () { load(state.next); });
+
+    table.querySelectorAll("th[data-col]").forEach(function (th) {
+        th.style.cursor = "pointer";
+        th.addEventListener("click", function () {
+            var col = th.getAttribute("data-col");
+            state.order = state.sort === col && state.order === "desc" ? "asc" : "desc";
+            state.sort = col;
+            load(null);
+        });
+    });
+
+    if (options.search) {
+        var input = document.getElementById(options.search);
+        var timer = null;
+        if (input) {
+            input.addEventListener("input", function () {
+                clearTimeout(timer);
+                timer = setTimeout(function () { state.q = input.value.trim(); load(null); }, 250);
+            });
+        }
+    }
+
+    load(null);
+}